@@ -18,7 +18,12 @@ from ai_services.main import (
     process_text,
     generate_text,
     search_documents,
+    search_documents_batch,
+    asearch_documents,
+    asearch_documents_batch,
     add_document_to_vector_store,
+    add_markdown_document_to_vector_store,
+    aadd_documents_to_vector_store,
     add_entity_to_knowledge_graph,
     add_relationship_to_knowledge_graph,
     save_ai_services,
@@ -33,6 +38,7 @@ from ai_services.vector_store.base_vector_store import BaseVectorStore, VectorSt
 from ai_services.vector_store.faiss_vector_store import FAISSVectorStore
 from ai_services.kg.base_knowledge_graph import BaseKnowledgeGraph, Entity, Relationship
 from ai_services.kg.networkx_knowledge_graph import NetworkXKnowledgeGraph
+from ai_services.nlp.markdown_chunker import MarkdownChunker
 from ai_services.nlp.text_processor import TextProcessor
 
 # 导出工具模块
@@ -65,7 +71,12 @@ __all__ = [
     'process_text',
     'generate_text',
     'search_documents',
+    'search_documents_batch',
+    'asearch_documents',
+    'asearch_documents_batch',
     'add_document_to_vector_store',
+    'add_markdown_document_to_vector_store',
+    'aadd_documents_to_vector_store',
     'add_entity_to_knowledge_graph',
     'add_relationship_to_knowledge_graph',
     'save_ai_services',
@@ -83,6 +94,7 @@ __all__ = [
     'Relationship',
     'NetworkXKnowledgeGraph',
     'TextProcessor',
+    'MarkdownChunker',
     
     # 版本信息
     '__version__',
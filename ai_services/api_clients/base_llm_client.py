@@ -3,6 +3,7 @@
 
 """基础大模型客户端接口"""
 
+import asyncio
 from abc import ABC, abstractmethod
 from typing import Dict, List, Optional, Union
 
@@ -64,6 +65,42 @@ class BaseLLMClient(ABC):
         """
         pass
 
+    def generate_embeddings(
+        self,
+        texts: List[str],
+        **kwargs
+    ) -> List[List[float]]:
+        """批量生成文本嵌入向量
+        
+        默认逐条调用generate_embedding，支持批量请求的客户端应重写该方法。
+        
+        Args:
+            texts: 输入文本列表
+            **kwargs: 其他参数
+            
+        Returns:
+            List[List[float]]: 嵌入向量列表，与输入文本顺序一致
+        """
+        return [self.generate_embedding(text, **kwargs) for text in texts]
+
+    async def agenerate_embeddings(
+        self,
+        texts: List[str],
+        **kwargs
+    ) -> List[List[float]]:
+        """异步批量生成文本嵌入向量
+        
+        默认在线程中调用generate_embeddings，提供异步SDK的客户端应重写该方法。
+        
+        Args:
+            texts: 输入文本列表
+            **kwargs: 其他参数
+            
+        Returns:
+            List[List[float]]: 嵌入向量列表，与输入文本顺序一致
+        """
+        return await asyncio.to_thread(self.generate_embeddings, texts, **kwargs)
+
     @abstractmethod
     def chat_completion(
         self,
@@ -58,6 +58,10 @@ class OpenAIClient(BaseLLMClient):
         # 初始化客户端
         self.client = openai.OpenAI(api_key=self.api_key)
         
+        # 异步客户端（openai库版本较旧时不可用）
+        async_client_class = getattr(openai, 'AsyncOpenAI', None)
+        self.async_client = async_client_class(api_key=self.api_key) if async_client_class else None
+        
         # 设置默认模型
         self.default_model = self.config.get('model', 'gpt-3.5-turbo')
         self.embedding_model = self.config.get('embedding_model', 'text-embedding-3-small')
@@ -121,6 +125,64 @@ class OpenAIClient(BaseLLMClient):
         response = self.client.embeddings.create(**params)
         return response.data[0].embedding
 
+    def generate_embeddings(
+        self,
+        texts: List[str],
+        **kwargs
+    ) -> List[List[float]]:
+        """使用OpenAI模型批量生成文本嵌入向量（一次请求）
+        
+        Args:
+            texts: 输入文本列表
+            **kwargs: 其他参数
+            
+        Returns:
+            List[List[float]]: 嵌入向量列表，与输入文本顺序一致
+        """
+        if not texts:
+            return []
+        
+        params = {
+            "model": kwargs.pop('model', self.embedding_model),
+            "input": list(texts)
+        }
+        
+        response = self.client.embeddings.create(**params)
+        
+        # 按返回的index排序，保证与输入顺序一致
+        data = sorted(response.data, key=lambda item: getattr(item, 'index', 0))
+        return [item.embedding for item in data]
+
+    async def agenerate_embeddings(
+        self,
+        texts: List[str],
+        **kwargs
+    ) -> List[List[float]]:
+        """使用OpenAI异步客户端批量生成文本嵌入向量（一次请求）
+        
+        Args:
+            texts: 输入文本列表
+            **kwargs: 其他参数
+            
+        Returns:
+            List[List[float]]: 嵌入向量列表，与输入文本顺序一致
+        """
+        if self.async_client is None:
+            return await super().agenerate_embeddings(texts, **kwargs)
+        if not texts:
+            return []
+        
+        params = {
+            "model": kwargs.pop('model', self.embedding_model),
+            "input": list(texts)
+        }
+        
+        response = await self.async_client.embeddings.create(**params)
+        
+        # 按返回的index排序，保证与输入顺序一致
+        data = sorted(response.data, key=lambda item: getattr(item, 'index', 0))
+        return [item.embedding for item in data]
+
     def chat_completion(
         self,
         messages: List[Dict[str, str]],
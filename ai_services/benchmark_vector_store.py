@@ -0,0 +1,426 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""FAISS向量存储检索性能基准测试
+
+生成合成向量数据集，对FAISSVectorStore的各种索引配置测量：
+- 以精确检索为基准的recall@k
+- 单条查询延迟的p50/p95/p99和批量查询吞吐量
+- 建索引耗时、索引内存占用和保存后的磁盘占用（总量、索引文件和原始向量文件分别统计）
+
+IVF索引按nprobe、HNSW索引按ef_search、量化索引按refine_factor扫描查询参数，
+得到召回率-延迟曲线。结果以JSON格式输出。
+
+示例:
+    python -m ai_services.benchmark_vector_store --num-vectors 100000 --dimension 256 --output bench.json
+"""
+
+import argparse
+import json
+import math
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from ai_services.vector_store.base_vector_store import VectorStoreDocument
+from ai_services.vector_store.faiss_vector_store import FAISSVectorStore, faiss
+
+# 各索引类型扫描的查询参数
+SWEEPS = {
+    'flat': [{}],
+    'hnsw': [{'ef_search': ef_search} for ef_search in (16, 32, 64, 128, 256)],
+    'sq8': [{'refine_factor': 1}, {'refine_factor': 4}],
+    'pq': [{'refine_factor': 1}, {'refine_factor': 4}, {'refine_factor': 16}],
+    'ivf_flat': [{'nprobe': nprobe} for nprobe in (1, 4, 16, 64)],
+    'ivf_sq8': [{'nprobe': nprobe, 'refine_factor': refine} for nprobe in (4, 16, 64) for refine in (1, 4)],
+    'ivf_pq': [{'nprobe': nprobe, 'refine_factor': refine} for nprobe in (4, 16, 64) for refine in (1, 16)],
+}
+
+
+def generate_dataset(
+    num_vectors: int,
+    dimension: int,
+    num_queries: int,
+    num_clusters: int = 100,
+    seed: int = 0
+):
+    """生成带聚类结构的合成向量数据集
+    
+    真实的文本嵌入分布并不均匀，使用高斯混合分布比均匀随机向量更能反映IVF等索引的实际召回率。
+    查询向量从同一分布中独立采样。
+    
+    Args:
+        num_vectors: 向量数量
+        dimension: 向量维度
+        num_queries: 查询数量
+        num_clusters: 聚类数量
+        seed: 随机种子
+    
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: float32数据向量矩阵和查询向量矩阵
+    """
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((num_clusters, dimension)).astype(np.float32)
+    
+    def sample(count: int) -> np.ndarray:
+        vectors = np.empty((count, dimension), dtype=np.float32)
+        # 分块生成，避免大数据集时产生float64的中间矩阵
+        for start in range(0, count, 100000):
+            end = min(start + 100000, count)
+            labels = rng.integers(0, num_clusters, end - start)
+            noise = rng.standard_normal((end - start, dimension), dtype=np.float32) * 0.5
+            vectors[start:end] = centers[labels] + noise
+        return vectors
+    
+    return sample(num_vectors), sample(num_queries)
+
+
+def exact_neighbors(data: np.ndarray, queries: np.ndarray, top_k: int, metric: str) -> np.ndarray:
+    """精确检索得到基准近邻
+    
+    Args:
+        data: 数据向量矩阵
+        queries: 查询向量矩阵
+        top_k: 近邻数量
+        metric: 相似度度量（l2、ip或cosine）
+    
+    Returns:
+        np.ndarray: 每个查询的近邻行号矩阵
+    """
+    if metric == 'cosine':
+        data, queries = data.copy(), queries.copy()
+        faiss.normalize_L2(data)
+        faiss.normalize_L2(queries)
+    faiss_metric = faiss.METRIC_L2 if metric == 'l2' else faiss.METRIC_INNER_PRODUCT
+    _, indices = faiss.knn(queries, data, top_k, metric=faiss_metric)
+    return indices
+
+
+def recall_at_k(results: List[List[int]], ground_truth: np.ndarray) -> float:
+    """计算recall@k
+    
+    Args:
+        results: 每个查询返回的行号列表
+        ground_truth: 精确检索的近邻行号矩阵
+    
+    Returns:
+        float: 所有查询的平均召回率
+    """
+    top_k = ground_truth.shape[1]
+    hits = sum(len(set(found[:top_k]) & set(expected.tolist())) for found, expected in zip(results, ground_truth))
+    return hits / (len(ground_truth) * top_k)
+
+
+def latency_summary(latencies: List[float]) -> Dict[str, float]:
+    """汇总延迟分布
+    
+    Args:
+        latencies: 单条查询延迟（秒）
+    
+    Returns:
+        Dict[str, float]: 均值和p50/p95/p99延迟（毫秒）
+    """
+    values = np.array(latencies) * 1000
+    return {
+        'mean': float(values.mean()),
+        'p50': float(np.percentile(values, 50)),
+        'p95': float(np.percentile(values, 95)),
+        'p99': float(np.percentile(values, 99)),
+    }
+
+
+def rss_bytes() -> Optional[int]:
+    """获取当前进程的常驻内存
+    
+    Returns:
+        Optional[int]: 常驻内存字节数，无法获取时返回None
+    """
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        pass
+    
+    # 非Linux平台只能取得峰值常驻内存（macOS单位为字节，其余为KB），Windows没有resource模块
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def disk_bytes(directory: str, marker: Optional[str] = None) -> int:
+    """统计目录下文件的大小
+    
+    Args:
+        directory: 目录
+        marker: 只统计文件名包含该字符串的文件（可选，默认统计所有文件）
+    
+    Returns:
+        int: 字节数
+    """
+    return sum(
+        os.path.getsize(os.path.join(root, name))
+        for root, _, names in os.walk(directory)
+        for name in names
+        if marker is None or marker in name
+    )
+
+
+def build_store(
+    data: np.ndarray,
+    index_type: str,
+    metric: str,
+    batch_size: int,
+    **params
+) -> FAISSVectorStore:
+    """创建向量存储并分批添加数据向量（文档ID为行号）
+    
+    Args:
+        data: 数据向量矩阵
+        index_type: 索引类型
+        metric: 相似度度量
+        batch_size: 每批添加的向量数量
+        **params: 其他索引参数
+    
+    Returns:
+        FAISSVectorStore: 向量存储
+    """
+    store = FAISSVectorStore(
+        dimension=data.shape[1],
+        index_type=index_type,
+        metric=metric,
+        query_cache_size=0,
+        **params
+    )
+    
+    # 需要训练的索引在首批数据到达时训练，首批使用max_train_size个向量以保证训练质量
+    start = 0
+    while start < len(data):
+        end = min(start + (max(batch_size, store.max_train_size) if start == 0 else batch_size), len(data))
+        store.add_documents([
+            VectorStoreDocument(id=str(row), content='', embedding=data[row])
+            for row in range(start, end)
+        ])
+        start = end
+    return store
+
+
+def run_queries(store: FAISSVectorStore, queries: np.ndarray, top_k: int):
+    """逐条执行查询，再执行一次批量查询
+    
+    Args:
+        store: 向量存储
+        queries: 查询向量矩阵
+        top_k: 每个查询返回的结果数
+    
+    Returns:
+        Tuple[List[List[int]], List[float], float]: 每个查询返回的行号、单条查询延迟（秒）和批量查询吞吐量（QPS）
+    """
+    # 预热
+    store.search('', embedding=queries[0], top_k=top_k)
+    
+    results, latencies = [], []
+    for query in queries:
+        start = time.perf_counter()
+        hits = store.search('', embedding=query, top_k=top_k)
+        latencies.append(time.perf_counter() - start)
+        results.append([int(document.id) for document, _ in hits])
+    
+    start = time.perf_counter()
+    store.search_batch([''] * len(queries), embeddings=list(queries), top_k=top_k)
+    qps = len(queries) / (time.perf_counter() - start)
+    
+    return results, latencies, qps
+
+
+def benchmark_index(
+    data: np.ndarray,
+    queries: np.ndarray,
+    ground_truth: np.ndarray,
+    index_type: str,
+    metric: str,
+    batch_size: int,
+    work_dir: str,
+    **params
+) -> Dict:
+    """测量一种索引配置
+    
+    Args:
+        data: 数据向量矩阵
+        queries: 查询向量矩阵
+        ground_truth: 精确检索的近邻行号矩阵
+        index_type: 索引类型
+        metric: 相似度度量
+        batch_size: 每批添加的向量数量
+        work_dir: 保存索引的临时目录
+        **params: 其他索引参数
+    
+    Returns:
+        Dict: 测量结果
+    """
+    top_k = ground_truth.shape[1]
+    
+    rss_before = rss_bytes()
+    start = time.perf_counter()
+    store = build_store(data, index_type, metric, batch_size, **params)
+    build_time = time.perf_counter() - start
+    rss_after = rss_bytes()
+    
+    index_dir = os.path.join(work_dir, index_type)
+    os.makedirs(index_dir, exist_ok=True)
+    store.save(os.path.join(index_dir, 'store'))
+    
+    points = []
+    for sweep in SWEEPS[index_type]:
+        if 'refine_factor' in sweep:
+            store.refine_factor = sweep['refine_factor']
+        store.set_search_params(nprobe=sweep.get('nprobe'), ef_search=sweep.get('ef_search'))
+        
+        results, latencies, qps = run_queries(store, queries, top_k)
+        points.append({
+            'search_params': sweep,
+            f'recall_at_{top_k}': recall_at_k(results, ground_truth),
+            'latency_ms': latency_summary(latencies),
+            'batch_qps': qps,
+        })
+    
+    result = {
+        'index_type': index_type,
+        'index_params': params,
+        'build_time_s': build_time,
+        'index_bytes': int(faiss.serialize_index(store.index).nbytes),
+        'rss_delta_bytes': rss_after - rss_before if rss_before is not None and rss_after is not None else None,
+        'disk_bytes': disk_bytes(index_dir),
+        'index_disk_bytes': disk_bytes(index_dir, '.faiss'),
+        'embedding_disk_bytes': disk_bytes(index_dir, '_embeddings'),
+        'points': points,
+    }
+    
+    del store
+    shutil.rmtree(index_dir, ignore_errors=True)
+    return result
+
+
+def run_benchmark(
+    num_vectors: int = 10000,
+    dimension: int = 128,
+    num_queries: int = 1000,
+    top_k: int = 10,
+    metric: str = 'l2',
+    index_types: Optional[List[str]] = None,
+    nlist: Optional[int] = None,
+    batch_size: int = 10000,
+    threads: Optional[int] = None,
+    seed: int = 0
+) -> Dict:
+    """运行基准测试
+    
+    Args:
+        num_vectors: 数据向量数量
+        dimension: 向量维度
+        num_queries: 查询数量
+        top_k: 召回率和延迟测量使用的k
+        metric: 相似度度量（l2、ip或cosine）
+        index_types: 要测量的索引类型（可选，默认全部）
+        nlist: IVF聚类中心数量（可选，默认4*sqrt(num_vectors)）
+        batch_size: 每批添加的向量数量
+        threads: FAISS使用的线程数（可选）
+        seed: 随机种子
+    
+    Returns:
+        Dict: 数据集信息和各索引配置的测量结果
+    """
+    if not hasattr(faiss, 'knn'):
+        raise RuntimeError("The benchmark requires the faiss library (pip install faiss-cpu)")
+    if threads:
+        faiss.omp_set_num_threads(threads)
+    
+    index_types = index_types or list(FAISSVectorStore.SUPPORTED_INDEX_TYPES)
+    nlist = nlist or max(1, int(4 * math.sqrt(num_vectors)))
+    
+    data, queries = generate_dataset(num_vectors, dimension, num_queries, seed=seed)
+    start = time.perf_counter()
+    ground_truth = exact_neighbors(data, queries, top_k, metric)
+    exact_time = time.perf_counter() - start
+    
+    report = {
+        'dataset': {
+            'num_vectors': num_vectors,
+            'dimension': dimension,
+            'num_queries': num_queries,
+            'top_k': top_k,
+            'metric': metric,
+            'seed': seed,
+            'exact_search_time_s': exact_time,
+        },
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'faiss_threads': faiss.omp_get_max_threads(),
+        },
+        'results': [],
+    }
+    
+    work_dir = tempfile.mkdtemp(prefix='vector_benchmark_')
+    try:
+        for index_type in index_types:
+            params = {'nlist': nlist} if index_type in FAISSVectorStore.IVF_INDEX_TYPES else {}
+            print(f"Benchmarking {index_type} ...", file=sys.stderr)
+            report['results'].append(benchmark_index(
+                data, queries, ground_truth, index_type, metric, batch_size, work_dir, **params
+            ))
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    
+    return report
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='FAISS向量存储检索性能基准测试')
+    parser.add_argument('--num-vectors', type=int, default=10000, help='数据向量数量（建议10000 ~ 1000000）')
+    parser.add_argument('--dimension', type=int, default=128, help='向量维度')
+    parser.add_argument('--num-queries', type=int, default=1000, help='查询数量')
+    parser.add_argument('--top-k', type=int, default=10, help='召回率和延迟测量使用的k')
+    parser.add_argument('--metric', choices=FAISSVectorStore.SUPPORTED_METRICS, default='l2', help='相似度度量')
+    parser.add_argument('--index-types', nargs='+', choices=FAISSVectorStore.SUPPORTED_INDEX_TYPES,
+                        help='要测量的索引类型（默认全部）')
+    parser.add_argument('--nlist', type=int, help='IVF聚类中心数量（默认4*sqrt(向量数量)）')
+    parser.add_argument('--batch-size', type=int, default=10000, help='每批添加的向量数量')
+    parser.add_argument('--threads', type=int, help='FAISS使用的线程数')
+    parser.add_argument('--seed', type=int, default=0, help='随机种子')
+    parser.add_argument('--output', type=str, help='结果JSON文件路径（默认输出到标准输出）')
+    args = parser.parse_args()
+    
+    report = run_benchmark(
+        num_vectors=args.num_vectors,
+        dimension=args.dimension,
+        num_queries=args.num_queries,
+        top_k=args.top_k,
+        metric=args.metric,
+        index_types=args.index_types,
+        nlist=args.nlist,
+        batch_size=args.batch_size,
+        threads=args.threads,
+        seed=args.seed
+    )
+    
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""测试共用的文档和嵌入模型"""
+
+import numpy as np
+
+from ai_services.vector_store.base_vector_store import VectorStoreDocument
+
+DIMENSION = 8
+
+
+def make_documents(count, seed=0, prefix='doc'):
+    """生成带随机向量的测试文档"""
+    rng = np.random.default_rng(seed)
+    return [
+        VectorStoreDocument(id=f"{prefix}{i}", content=f"content {prefix}{i}",
+                            metadata={'group': i % 3, 'tag': f"t{i % 2}"},
+                            embedding=rng.standard_normal(DIMENSION).tolist())
+        for i in range(count)
+    ]
+
+
+class CountingEmbeddingModel:
+    """记录批量调用次数和生成的嵌入向量数量的测试模型"""
+
+    def __init__(self):
+        self.calls = 0
+        self.count = 0
+
+    def generate_embeddings(self, texts):
+        self.calls += 1
+        self.count += len(texts)
+        return [self.generate_embedding(text) for text in texts]
+
+    def generate_embedding(self, text):
+        return np.random.default_rng(abs(hash(text)) % (2 ** 32)).standard_normal(DIMENSION).tolist()
@@ -28,8 +28,13 @@ from ai_services.api_clients.base_llm_client import BaseLLMClient
 from ai_services.api_clients.openai_client import OpenAIClient
 from ai_services.vector_store.base_vector_store import BaseVectorStore, VectorStoreDocument
 from ai_services.vector_store.faiss_vector_store import FAISSVectorStore
+from ai_services.vector_store.hybrid_vector_store import HybridVectorStore
+from ai_services.vector_store.namespaced_vector_store import NamespacedVectorStore
+from ai_services.vector_store.sharded_vector_store import ShardedVectorStore
+from ai_services.vector_store.time_partitioned_vector_store import TimePartitionedVectorStore
 from ai_services.kg.base_knowledge_graph import BaseKnowledgeGraph, Entity, Relationship
 from ai_services.kg.networkx_knowledge_graph import NetworkXKnowledgeGraph
+from ai_services.nlp.markdown_chunker import MarkdownChunker
 from ai_services.nlp.text_processor import TextProcessor
 
 # 导入异常类
@@ -159,11 +164,26 @@ class AIService:
         
         # 创建新向量存储
         vector_store = None
+        hybrid = kwargs.pop('hybrid', False)
         if provider.lower() == 'faiss':
             vector_store = FAISSVectorStore(**kwargs)
+        elif provider.lower() == 'faiss_sharded':
+            vector_store = ShardedVectorStore(**kwargs)
+        elif provider.lower() == 'faiss_time_partitioned':
+            vector_store = TimePartitionedVectorStore(**kwargs)
+        elif provider.lower() == 'faiss_namespace':
+            # 共用名为store的FAISS向量存储中的一个命名空间（默认与名称相同）
+            vector_store = NamespacedVectorStore(
+                vector_store=self.get_vector_store(kwargs.pop('store', 'default')),
+                namespace=kwargs.pop('namespace', name)
+            )
         else:
             raise ValueError(f"Unsupported vector store provider: {provider}")
         
+        # 在向量存储旁维护BM25索引，支持混合检索
+        if hybrid:
+            vector_store = HybridVectorStore(vector_store=vector_store, **kwargs)
+        
         # 缓存向量存储
         self._vector_stores[name] = vector_store
         self.logger.info(f"Vector store '{name}' created with provider '{provider}'")
@@ -336,6 +356,33 @@ class AIService:
             self.logger.error(f"Error searching documents: {e}")
             raise
     
+    def search_documents_batch(
+        self, 
+        queries: list,
+        vector_store_name: str = 'default',
+        k: int = 5,
+        **kwargs
+    ) -> list:
+        """批量搜索文档（一次向量检索处理全部查询）
+        
+        Args:
+            queries: 搜索查询列表
+            vector_store_name: 向量存储名称
+            k: 每个查询返回的结果数量
+            **kwargs: 搜索参数
+            
+        Returns:
+            list: 每个查询的搜索结果列表
+        """
+        try:
+            vector_store = self.get_vector_store(vector_store_name)
+            results = vector_store.search_batch(queries, top_k=k, **kwargs)
+            self.logger.info(f"Batch of {len(queries)} queries searched with vector store '{vector_store_name}'")
+            return results
+        except Exception as e:
+            self.logger.error(f"Error batch searching documents: {e}")
+            raise
+    
     def add_document_to_vector_store(
         self, 
         document: dict, 
@@ -368,6 +415,148 @@ class AIService:
             self.logger.error(f"Error adding document to vector store: {e}")
             raise
     
+    def add_markdown_document_to_vector_store(
+        self, 
+        document: dict, 
+        vector_store_name: str = 'default',
+        max_tokens: int = 512,
+        overlap_tokens: int = 64,
+        processor_name: str = 'default'
+    ) -> list:
+        """按标题和句子边界将Markdown文档切分为分块后添加到向量存储
+        
+        每个分块的元数据中记录parent_id（原文档ID），搜索时可通过collapse_by_parent=True按原文档折叠结果。
+        重复导入同一文档时只重新写入内容变化的分块，并删除新版本中已不存在的分块。
+        
+        Args:
+            document: 文档数据（id、content、metadata）
+            vector_store_name: 向量存储名称
+            max_tokens: 每个分块的最大token数
+            overlap_tokens: 相邻分块重叠的最大token数
+            processor_name: 用于分句的文本处理器名称
+            
+        Returns:
+            list: 分块ID列表
+        """
+        try:
+            chunker = MarkdownChunker(
+                text_processor=self.get_text_processor(processor_name),
+                max_tokens=max_tokens,
+                overlap_tokens=overlap_tokens
+            )
+            chunks = chunker.chunk_document(
+                document.get('id'), document.get('content', ''), document.get('metadata', {})
+            )
+            
+            vector_store = self.get_vector_store(vector_store_name)
+            chunk_ids = vector_store.upsert_documents([
+                VectorStoreDocument(id=chunk['id'], content=chunk['content'], metadata=chunk['metadata'])
+                for chunk in chunks
+            ])
+            
+            # 分块序号连续，旧版本多出的分块从len(chunks)开始
+            stale_ids = []
+            chunk_id = f"{document.get('id')}#{len(chunks)}"
+            while vector_store.get_document(chunk_id) is not None:
+                stale_ids.append(chunk_id)
+                chunk_id = f"{document.get('id')}#{len(chunks) + len(stale_ids)}"
+            if stale_ids:
+                vector_store.delete_documents(stale_ids)
+            
+            self.logger.info(
+                f"Document '{document.get('id')}' added to vector store '{vector_store_name}' as {len(chunk_ids)} chunks"
+            )
+            return chunk_ids
+        except Exception as e:
+            self.logger.error(f"Error adding markdown document to vector store: {e}")
+            raise
+    
+    async def asearch_documents(
+        self, 
+        query: str,
+        vector_store_name: str = 'default',
+        k: int = 5,
+        **kwargs
+    ) -> list:
+        """异步搜索文档（检索在线程池中执行，不阻塞事件循环）
+        
+        Args:
+            query: 搜索查询
+            vector_store_name: 向量存储名称
+            k: 返回的结果数量
+            **kwargs: 搜索参数
+            
+        Returns:
+            list: 搜索结果列表
+        """
+        try:
+            vector_store = self.get_vector_store(vector_store_name)
+            results = await vector_store.asearch(query, top_k=k, **kwargs)
+            self.logger.info(f"Documents searched with vector store '{vector_store_name}', found {len(results)} results")
+            return results
+        except Exception as e:
+            self.logger.error(f"Error searching documents: {e}")
+            raise
+    
+    async def asearch_documents_batch(
+        self, 
+        queries: list,
+        vector_store_name: str = 'default',
+        k: int = 5,
+        **kwargs
+    ) -> list:
+        """异步批量搜索文档
+        
+        Args:
+            queries: 搜索查询列表
+            vector_store_name: 向量存储名称
+            k: 每个查询返回的结果数量
+            **kwargs: 搜索参数
+            
+        Returns:
+            list: 每个查询的搜索结果列表
+        """
+        try:
+            vector_store = self.get_vector_store(vector_store_name)
+            results = await vector_store.asearch_batch(queries, top_k=k, **kwargs)
+            self.logger.info(f"Batch of {len(queries)} queries searched with vector store '{vector_store_name}'")
+            return results
+        except Exception as e:
+            self.logger.error(f"Error batch searching documents: {e}")
+            raise
+    
+    async def aadd_documents_to_vector_store(
+        self, 
+        documents: list, 
+        vector_store_name: str = 'default'
+    ) -> list:
+        """异步批量添加文档到向量存储
+        
+        Args:
+            documents: 文档数据列表
+            vector_store_name: 向量存储名称
+            
+        Returns:
+            list: 文档ID列表
+        """
+        try:
+            vs_documents = [
+                VectorStoreDocument(
+                    id=document.get('id'),
+                    content=document.get('content', ''),
+                    metadata=document.get('metadata', {})
+                )
+                for document in documents
+            ]
+            
+            vector_store = self.get_vector_store(vector_store_name)
+            doc_ids = await vector_store.aadd_documents(vs_documents)
+            self.logger.info(f"{len(doc_ids)} documents added to vector store '{vector_store_name}'")
+            return doc_ids
+        except Exception as e:
+            self.logger.error(f"Error adding documents to vector store: {e}")
+            raise
+    
     def add_entity_to_knowledge_graph(
         self, 
         entity_data: dict,
@@ -434,7 +623,14 @@ class AIService:
         """保存所有服务状态"""
         try:
             # 保存向量存储
+            saved = set()
             for name, vector_store in self._vector_stores.items():
+                # 命名空间视图随共享存储一起保存，共享存储只处理一次
+                if isinstance(vector_store, NamespacedVectorStore):
+                    vector_store = vector_store.vector_store
+                if id(vector_store) in saved:
+                    continue
+                saved.add(id(vector_store))
                 try:
                     vector_store.save()
                     self.logger.info(f"Vector store '{name}' saved")
@@ -457,7 +653,14 @@ class AIService:
         """加载所有服务状态"""
         try:
             # 加载向量存储
+            loaded = set()
             for name, vector_store in self._vector_stores.items():
+                # 命名空间视图随共享存储一起加载，共享存储只处理一次
+                if isinstance(vector_store, NamespacedVectorStore):
+                    vector_store = vector_store.vector_store
+                if id(vector_store) in loaded:
+                    continue
+                loaded.add(id(vector_store))
                 try:
                     vector_store.load()
                     self.logger.info(f"Vector store '{name}' loaded")
@@ -569,6 +772,28 @@ def search_documents(
     service = get_ai_service(config_path)
     return service.search_documents(query, vector_store_name, k, **kwargs)
 
+def search_documents_batch(
+    queries: list,
+    vector_store_name: str = 'default',
+    k: int = 5,
+    config_path: str = None,
+    **kwargs
+) -> list:
+    """批量搜索文档（便捷函数）
+    
+    Args:
+        queries: 搜索查询列表
+        vector_store_name: 向量存储名称
+        k: 每个查询返回的结果数量
+        config_path: 配置文件路径
+        **kwargs: 搜索参数
+        
+    Returns:
+        list: 每个查询的搜索结果列表
+    """
+    service = get_ai_service(config_path)
+    return service.search_documents_batch(queries, vector_store_name, k, **kwargs)
+
 def add_document_to_vector_store(
     document: dict, 
     vector_store_name: str = 'default',
@@ -589,6 +814,90 @@ def add_document_to_vector_store(
     service = get_ai_service(config_path)
     return service.add_document_to_vector_store(document, vector_store_name, **kwargs)
 
+def add_markdown_document_to_vector_store(
+    document: dict, 
+    vector_store_name: str = 'default',
+    max_tokens: int = 512,
+    overlap_tokens: int = 64,
+    config_path: str = None
+) -> list:
+    """将Markdown文档切分为分块后添加到向量存储（便捷函数）
+    
+    Args:
+        document: 文档数据
+        vector_store_name: 向量存储名称
+        max_tokens: 每个分块的最大token数
+        overlap_tokens: 相邻分块重叠的最大token数
+        config_path: 配置文件路径
+        
+    Returns:
+        list: 分块ID列表
+    """
+    service = get_ai_service(config_path)
+    return service.add_markdown_document_to_vector_store(document, vector_store_name, max_tokens, overlap_tokens)
+
+async def asearch_documents(
+    query: str,
+    vector_store_name: str = 'default',
+    k: int = 5,
+    config_path: str = None,
+    **kwargs
+) -> list:
+    """异步搜索文档（便捷函数）
+    
+    Args:
+        query: 搜索查询
+        vector_store_name: 向量存储名称
+        k: 返回的结果数量
+        config_path: 配置文件路径
+        **kwargs: 搜索参数
+        
+    Returns:
+        list: 搜索结果列表
+    """
+    service = get_ai_service(config_path)
+    return await service.asearch_documents(query, vector_store_name, k, **kwargs)
+
+async def asearch_documents_batch(
+    queries: list,
+    vector_store_name: str = 'default',
+    k: int = 5,
+    config_path: str = None,
+    **kwargs
+) -> list:
+    """异步批量搜索文档（便捷函数）
+    
+    Args:
+        queries: 搜索查询列表
+        vector_store_name: 向量存储名称
+        k: 每个查询返回的结果数量
+        config_path: 配置文件路径
+        **kwargs: 搜索参数
+        
+    Returns:
+        list: 每个查询的搜索结果列表
+    """
+    service = get_ai_service(config_path)
+    return await service.asearch_documents_batch(queries, vector_store_name, k, **kwargs)
+
+async def aadd_documents_to_vector_store(
+    documents: list, 
+    vector_store_name: str = 'default',
+    config_path: str = None
+) -> list:
+    """异步批量添加文档到向量存储（便捷函数）
+    
+    Args:
+        documents: 文档数据列表
+        vector_store_name: 向量存储名称
+        config_path: 配置文件路径
+        
+    Returns:
+        list: 文档ID列表
+    """
+    service = get_ai_service(config_path)
+    return await service.aadd_documents_to_vector_store(documents, vector_store_name)
+
 def add_entity_to_knowledge_graph(
     entity_data: dict,
     kg_name: str = 'default',
@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""按Markdown结构切分长文档"""
+
+import re
+from typing import Callable, Dict, List, Optional, Tuple
+
+from ai_services.nlp.text_processor import TextProcessor
+
+
+class MarkdownChunk:
+    """Markdown文档分块"""
+    
+    def __init__(self, content: str, index: int, headings: Optional[List[str]] = None):
+        self.content = content
+        self.index = index
+        self.headings = headings or []
+    
+    @property
+    def section(self) -> str:
+        """获取分块所在章节的标题路径
+        
+        Returns:
+            str: 以' > '连接的各级标题
+        """
+        return ' > '.join(self.headings)
+
+
+class MarkdownChunker:
+    """按标题和句子边界切分Markdown文档
+    
+    先按ATX标题（``#`` ~ ``######``，忽略代码块中的行）把文档切分为章节，
+    章节内使用TextProcessor.split_sentences分句，再把连续的句子合并为不超过 ``max_tokens`` 的分块，
+    相邻分块之间重叠不超过 ``overlap_tokens`` 的句子。代码块作为整体参与合并，
+    超过 ``max_tokens`` 的单个句子或代码块按长度硬切分。每个分块以所在章节的标题路径开头。
+    """
+    
+    # ATX标题
+    _HEADING_PATTERN = re.compile(r'^ {0,3}(#{1,6})\s+(.*?)\s*#*\s*$')
+    
+    # 代码块围栏
+    _FENCE_PATTERN = re.compile(r'^ {0,3}(`{3,}|~{3,})')
+    
+    def __init__(
+        self,
+        text_processor: Optional[TextProcessor] = None,
+        max_tokens: int = 512,
+        overlap_tokens: int = 64,
+        language: str = 'chinese',
+        token_counter: Optional[Callable[[str], int]] = None
+    ):
+        """初始化Markdown分块器
+        
+        Args:
+            text_processor: 文本处理器（可选，默认新建）
+            max_tokens: 每个分块的最大token数
+            overlap_tokens: 相邻分块重叠的最大token数
+            language: 分句使用的语言类型，支持'chinese'和'english'
+            token_counter: token计数函数（可选），默认按字符数估算
+        """
+        if max_tokens < 1:
+            raise ValueError("max_tokens must be at least 1")
+        if not 0 <= overlap_tokens < max_tokens:
+            raise ValueError("overlap_tokens must be between 0 and max_tokens - 1")
+        
+        self.text_processor = text_processor or TextProcessor()
+        self.max_tokens = max_tokens
+        self.overlap_tokens = overlap_tokens
+        self.language = language
+        self.token_counter = token_counter or len
+    
+    def split(self, text: str) -> List[MarkdownChunk]:
+        """切分Markdown文本
+        
+        Args:
+            text: Markdown文本
+        
+        Returns:
+            List[MarkdownChunk]: 按原文顺序排列的分块列表
+        """
+        chunks = []
+        for headings, lines in self._split_sections(text):
+            prefix = '\n'.join(f"{'#' * level} {title}" for level, title in headings)
+            budget = self.max_tokens - (self.token_counter(prefix) + 1 if prefix else 0)
+            if budget < self.max_tokens // 2:
+                # 标题路径过长时不再作为前缀，避免正文被切得过碎
+                prefix, budget = '', self.max_tokens
+            
+            for body in self._pack(self._split_units(lines, budget), budget):
+                content = f"{prefix}\n{body}" if prefix else body
+                chunks.append(MarkdownChunk(content, len(chunks), [title for _, title in headings]))
+        return chunks
+    
+    def chunk_document(
+        self,
+        document_id: str,
+        text: str,
+        metadata: Optional[Dict] = None
+    ) -> List[Dict]:
+        """将文档切分为带父文档ID的分块
+        
+        分块ID为 ``{document_id}#{序号}``，元数据在原文档元数据的基础上增加
+        ``parent_id``（原文档ID）、``chunk_index``（序号）和 ``section``（章节标题路径）。
+        
+        Args:
+            document_id: 原文档ID
+            text: Markdown文本
+            metadata: 原文档元数据（可选）
+        
+        Returns:
+            List[Dict]: 分块列表，每项包含id、content和metadata
+        """
+        return [
+            {
+                'id': f"{document_id}#{chunk.index}",
+                'content': chunk.content,
+                'metadata': {
+                    **(metadata or {}),
+                    'parent_id': document_id,
+                    'chunk_index': chunk.index,
+                    'section': chunk.section
+                }
+            }
+            for chunk in self.split(text)
+        ]
+    
+    def _split_sections(self, text: str) -> List[Tuple[List[Tuple[int, str]], List[str]]]:
+        """按标题切分章节
+        
+        Args:
+            text: Markdown文本
+        
+        Returns:
+            List[Tuple[List[Tuple[int, str]], List[str]]]: 各章节的标题路径（级别, 标题）和正文行
+        """
+        sections = []
+        headings: List[Tuple[int, str]] = []
+        lines: List[str] = []
+        fence = None
+        
+        for line in text.splitlines():
+            fence_match = self._FENCE_PATTERN.match(line)
+            if fence_match:
+                marker = fence_match.group(1)
+                if fence is None:
+                    fence = marker
+                elif marker[0] == fence[0] and len(marker) >= len(fence):
+                    fence = None
+            
+            heading_match = self._HEADING_PATTERN.match(line) if fence is None and not fence_match else None
+            if heading_match is None:
+                lines.append(line)
+                continue
+            
+            if any(line.strip() for line in lines):
+                sections.append((list(headings), lines))
+            lines = []
+            
+            level = len(heading_match.group(1))
+            headings = [heading for heading in headings if heading[0] < level]
+            headings.append((level, heading_match.group(2)))
+        
+        if any(line.strip() for line in lines):
+            sections.append((list(headings), lines))
+        return sections
+    
+    def _split_units(self, lines: List[str], budget: int) -> List[Tuple[str, str]]:
+        """将章节正文切分为句子和代码块
+        
+        Args:
+            lines: 章节正文行
+            budget: 每个分块的正文token预算
+        
+        Returns:
+            List[Tuple[str, str]]: (与前一单元之间的分隔符, 单元文本)列表
+        """
+        units = []
+        fence_lines: Optional[List[str]] = None
+        fence = None
+        
+        for line in lines:
+            fence_match = self._FENCE_PATTERN.match(line)
+            if fence_lines is not None:
+                fence_lines.append(line)
+                if fence_match and fence_match.group(1)[0] == fence[0] and len(fence_match.group(1)) >= len(fence):
+                    units.extend(self._hard_split('\n'.join(fence_lines), budget, '\n'))
+                    fence_lines = None
+                continue
+            if fence_match:
+                fence = fence_match.group(1)
+                fence_lines = [line]
+                continue
+            
+            sentences = self.text_processor.split_sentences(line, self.language, keep_delimiters=True)
+            for i, sentence in enumerate(sentences):
+                separator = '\n' if i == 0 else ('' if self.language == 'chinese' else ' ')
+                units.extend(self._hard_split(sentence, budget, separator))
+        
+        if fence_lines is not None:
+            # 未闭合的代码块
+            units.extend(self._hard_split('\n'.join(fence_lines), budget, '\n'))
+        return units
+    
+    def _hard_split(self, text: str, budget: int, separator: str) -> List[Tuple[str, str]]:
+        """将超过预算的单元按长度切分
+        
+        Args:
+            text: 单元文本
+            budget: token预算
+            separator: 与前一单元之间的分隔符
+        
+        Returns:
+            List[Tuple[str, str]]: (分隔符, 文本)列表
+        """
+        tokens = self.token_counter(text)
+        if tokens <= budget:
+            return [(separator, text)]
+        
+        # 按token数与字符数的比例估算每段的字符数
+        size = max(1, len(text) * budget // tokens)
+        return [(separator if start == 0 else '', text[start:start + size]) for start in range(0, len(text), size)]
+    
+    def _pack(self, units: List[Tuple[str, str]], budget: int) -> List[str]:
+        """将连续的单元合并为不超过预算的分块，相邻分块之间保留重叠
+        
+        Args:
+            units: (分隔符, 单元文本)列表
+            budget: 每个分块的正文token预算
+        
+        Returns:
+            List[str]: 分块正文列表
+        """
+        chunks = []
+        current: List[Tuple[str, str, int]] = []
+        current_tokens = 0
+        
+        for separator, text in units:
+            tokens = self.token_counter(text)
+            if current and current_tokens + tokens > budget:
+                chunks.append(self._join(current))
+                
+                # 从上一分块末尾保留不超过overlap_tokens的单元
+                overlap: List[Tuple[str, str, int]] = []
+                overlap_tokens = 0
+                for unit in reversed(current):
+                    if overlap_tokens + unit[2] > self.overlap_tokens or overlap_tokens + unit[2] + tokens > budget:
+                        break
+                    overlap.insert(0, unit)
+                    overlap_tokens += unit[2]
+                current, current_tokens = overlap, overlap_tokens
+            
+            current.append((separator, text, tokens))
+            current_tokens += tokens
+        
+        if current:
+            chunks.append(self._join(current))
+        return chunks
+    
+    @staticmethod
+    def _join(units: List[Tuple[str, str, int]]) -> str:
+        """拼接单元文本
+        
+        Args:
+            units: (分隔符, 单元文本, token数)列表
+        
+        Returns:
+            str: 拼接后的文本
+        """
+        return ''.join(
+            (separator if i > 0 else '') + text
+            for i, (separator, text, _) in enumerate(units)
+        ).strip()
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""基于SimHash的近重复文本检测"""
+
+import hashlib
+import re
+from collections import Counter
+from typing import Dict, Hashable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from ai_services.nlp.text_processor import TextProcessor
+
+
+class SimHasher:
+    """计算文本的64位SimHash指纹
+    
+    指纹由TextProcessor分词（去停用词）后的词项按词频加权计算，
+    内容大体相同、只有少量差异的文本，其指纹的汉明距离很小。
+    """
+    
+    # 指纹位数
+    BITS = 64
+    
+    # 包含字母、数字或汉字的词项才参与计算
+    _TOKEN_PATTERN = re.compile(r'\w')
+    
+    def __init__(self, text_processor: Optional[TextProcessor] = None):
+        """初始化SimHash计算器
+        
+        Args:
+            text_processor: 文本处理器（可选，默认新建）
+        """
+        self.text_processor = text_processor or TextProcessor()
+        self._bit_positions = np.arange(self.BITS, dtype=np.uint64)
+    
+    def fingerprint(self, text: str) -> Optional[int]:
+        """计算文本指纹
+        
+        Args:
+            text: 输入文本
+        
+        Returns:
+            Optional[int]: 64位指纹，文本中没有有效词项时返回None
+        """
+        tokens = self.text_processor.remove_stopwords(self.text_processor.tokenize(text))
+        counts = Counter(token.lower() for token in tokens if self._TOKEN_PATTERN.search(token))
+        if not counts:
+            return None
+        
+        hashes = np.array([self._hash(token) for token in counts], dtype=np.uint64)
+        weights = np.array(list(counts.values()), dtype=np.float64)
+        
+        # 每一位按词频加权投票：该位为1加权重，为0减权重
+        bits = ((hashes[:, None] >> self._bit_positions) & np.uint64(1)).astype(np.float64)
+        votes = weights @ (2 * bits - 1)
+        
+        return int.from_bytes(np.packbits(votes > 0, bitorder='little').tobytes(), 'little')
+    
+    @staticmethod
+    def distance(a: int, b: int) -> int:
+        """计算两个指纹的汉明距离
+        
+        Args:
+            a: 指纹
+            b: 指纹
+        
+        Returns:
+            int: 汉明距离
+        """
+        return bin(a ^ b).count('1')
+    
+    @staticmethod
+    def _hash(token: str) -> int:
+        """计算词项的64位哈希
+        
+        Args:
+            token: 词项
+        
+        Returns:
+            int: 哈希值
+        """
+        return int.from_bytes(hashlib.blake2b(token.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+class NearDuplicateIndex:
+    """SimHash指纹的LSH分桶索引
+    
+    将64位指纹切分为 ``max_distance + 1`` 段，每段建立一个哈希桶。
+    汉明距离不超过 ``max_distance`` 的两个指纹至少有一段完全相同（抽屉原理），
+    因此只需比较同桶的候选指纹，查询代价与桶大小相关而与总文档数无关。
+    """
+    
+    def __init__(self, max_distance: int = 3):
+        """初始化近重复索引
+        
+        Args:
+            max_distance: 判定为近重复的最大汉明距离
+        """
+        if not 0 <= max_distance < SimHasher.BITS:
+            raise ValueError(f"max_distance must be between 0 and {SimHasher.BITS - 1}")
+        
+        self.max_distance = max_distance
+        
+        # 每段的位区间
+        bands = max_distance + 1
+        bounds = [round(i * SimHasher.BITS / bands) for i in range(bands + 1)]
+        self._bands = [(start, (1 << (end - start)) - 1) for start, end in zip(bounds, bounds[1:])]
+        
+        self._buckets: List[Dict[int, Set[Hashable]]] = [{} for _ in self._bands]
+        self._fingerprints: Dict[Hashable, int] = {}
+    
+    def __len__(self) -> int:
+        """获取指纹数量
+        
+        Returns:
+            int: 指纹数量
+        """
+        return len(self._fingerprints)
+    
+    def add(self, key: Hashable, fingerprint: int) -> None:
+        """添加指纹
+        
+        Args:
+            key: 指纹对应的键（如文档的内部ID）
+            fingerprint: 64位指纹
+        """
+        self.remove(key)
+        self._fingerprints[key] = fingerprint
+        for buckets, band_value in zip(self._buckets, self._band_values(fingerprint)):
+            buckets.setdefault(band_value, set()).add(key)
+    
+    def remove(self, key: Hashable) -> None:
+        """删除指纹
+        
+        Args:
+            key: 指纹对应的键
+        """
+        fingerprint = self._fingerprints.pop(key, None)
+        if fingerprint is None:
+            return
+        
+        for buckets, band_value in zip(self._buckets, self._band_values(fingerprint)):
+            bucket = buckets.get(band_value)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del buckets[band_value]
+    
+    def find(self, fingerprint: int, exclude: Optional[Set[Hashable]] = None) -> Optional[Tuple[Hashable, int]]:
+        """查找与指纹最接近的近重复项
+        
+        Args:
+            fingerprint: 64位指纹
+            exclude: 不参与查找的键（可选）
+        
+        Returns:
+            Optional[Tuple[Hashable, int]]: 最接近的键及其汉明距离，没有近重复项时返回None
+        """
+        best = None
+        seen = set()
+        for buckets, band_value in zip(self._buckets, self._band_values(fingerprint)):
+            for key in buckets.get(band_value, ()):
+                if key in seen or (exclude and key in exclude):
+                    continue
+                seen.add(key)
+                
+                distance = SimHasher.distance(fingerprint, self._fingerprints[key])
+                if distance <= self.max_distance and (best is None or distance < best[1]):
+                    best = (key, distance)
+                    if distance == 0:
+                        return best
+        return best
+    
+    def items(self) -> List[Tuple[Hashable, int]]:
+        """获取所有键和指纹
+        
+        Returns:
+            List[Tuple[Hashable, int]]: 键和指纹列表
+        """
+        return list(self._fingerprints.items())
+    
+    def clear(self) -> None:
+        """清空索引"""
+        self._buckets = [{} for _ in self._bands]
+        self._fingerprints = {}
+    
+    def _band_values(self, fingerprint: int) -> List[int]:
+        """计算指纹各段的值
+        
+        Args:
+            fingerprint: 64位指纹
+        
+        Returns:
+            List[int]: 各段的值
+        """
+        return [(fingerprint >> start) & mask for start, mask in self._bands]
@@ -255,17 +255,22 @@ class TextProcessor:
         
         return text
     
-    def split_sentences(self, text: str, language: str = 'chinese') -> List[str]:
+    def split_sentences(self, text: str, language: str = 'chinese', keep_delimiters: bool = False) -> List[str]:
         """分句
         
         Args:
             text: 输入文本
             language: 语言类型，支持'chinese'和'english'
+            keep_delimiters: 是否在句子末尾保留中文分句标点（仅对中文有效）
             
         Returns:
             List[str]: 句子列表
         """
-        if language == 'chinese':
+        if language == 'chinese' and keep_delimiters:
+            # 分句标点保留在句子末尾，换行只作为分隔
+            sentences = re.findall(r'[^。！？；\n\r]+[。！？；]*|[。！？；]+', text)
+            sentences = [s.strip() for s in sentences if s.strip()]
+        elif language == 'chinese':
             # 中文分句（简单实现）
             # 使用中文句号、问号、感叹号等作为分句标志
             sentences = re.split(r'[。！？；；\n\r]', text)
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""向量存储异步接口测试"""
+
+import asyncio
+
+import numpy as np
+import pytest
+
+from ai_services.vector_store.base_vector_store import VectorStoreDocument
+from ai_services.vector_store.faiss_vector_store import FAISSVectorStore
+from ai_services.vector_store.sharded_vector_store import ShardedVectorStore
+from ai_services.vector_store.time_partitioned_vector_store import TimePartitionedVectorStore
+
+DIMENSION = 8
+
+
+class AsyncEmbeddingModel:
+    """只记录异步调用次数的测试模型"""
+
+    def __init__(self):
+        self.sync_texts = 0
+        self.async_texts = 0
+
+    def generate_embeddings(self, texts):
+        self.sync_texts += len(texts)
+        return [self._vector(text) for text in texts]
+
+    async def agenerate_embeddings(self, texts):
+        self.async_texts += len(texts)
+        await asyncio.sleep(0)
+        return [self._vector(text) for text in texts]
+
+    @staticmethod
+    def _vector(text):
+        return np.random.default_rng(abs(hash(text)) % (2 ** 32)).standard_normal(DIMENSION).tolist()
+
+
+def make_text_documents(count, prefix='doc'):
+    """生成没有嵌入向量的测试文档"""
+    return [
+        VectorStoreDocument(id=f"{prefix}{i}", content=f"text {i}", metadata={'date': f"2024-03-{i % 28 + 1:02d}"})
+        for i in range(count)
+    ]
+
+
+@pytest.mark.parametrize('store_class,config', [
+    (FAISSVectorStore, {}),
+    (ShardedVectorStore, {'num_shards': 3}),
+    (TimePartitionedVectorStore, {'partition_granularity': 'month'}),
+])
+def test_async_api_awaits_embedding_model(store_class, config):
+    """异步写入和检索直接等待模型的异步接口，结果与同步检索一致"""
+    model = AsyncEmbeddingModel()
+    store = store_class(dimension=DIMENSION, embedding_model=model, **config)
+    documents = make_text_documents(30)
+
+    async def run():
+        ids = await store.aadd_documents(documents)
+        results = await asyncio.gather(*(store.asearch(f"text {i}", top_k=3) for i in range(5)))
+        batch = await store.asearch_batch(['text 7', 'text 8'], top_k=1)
+        return ids, results, batch
+
+    ids, results, batch = asyncio.run(run())
+
+    assert ids == [doc.id for doc in documents]
+    assert model.sync_texts == 0
+    assert model.async_texts == 30 + 5 + 2
+    assert [hits[0][0].id for hits in results] == [f"doc{i}" for i in range(5)]
+    assert [hits[0][0].id for hits in batch] == ['doc7', 'doc8']
+    assert [doc.id for doc, _ in store.search('text 3', top_k=3)] == [doc.id for doc, _ in results[3]]
+
+
+def test_async_query_embeddings_are_cached():
+    """重复的异步查询命中查询向量缓存"""
+    model = AsyncEmbeddingModel()
+    store = ShardedVectorStore(dimension=DIMENSION, num_shards=2, embedding_model=model)
+    asyncio.run(store.aadd_documents(make_text_documents(10)))
+
+    async def run():
+        for _ in range(3):
+            await store.asearch('text 1', top_k=1)
+
+    asyncio.run(run())
+
+    assert model.async_texts == 10 + 1
+    assert store.query_cache_stats()['hits'] == 2
+
+
+def test_async_add_with_dedup_embeds_only_kept_documents():
+    """开启近重复检测时异步写入不预先生成向量，近重复文档不调用嵌入模型"""
+    model = AsyncEmbeddingModel()
+    store = FAISSVectorStore(dimension=DIMENSION, embedding_model=model, dedup='skip')
+    content = 'the quick brown fox jumps over the lazy dog near the river bank'
+    documents = [VectorStoreDocument('a', content), VectorStoreDocument('b', content)]
+
+    ids = asyncio.run(store.aadd_documents(documents))
+
+    assert ids == ['a', 'a']
+    assert model.sync_texts == 1
+    assert store.count() == 1
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""向量存储基准测试脚本测试"""
+
+import builtins
+
+from ai_services import benchmark_vector_store
+
+
+def test_run_benchmark_reports_recall_and_disk_usage():
+    """小数据集上运行基准测试，精确索引召回率为1，索引文件和向量文件分别统计"""
+    report = benchmark_vector_store.run_benchmark(
+        num_vectors=500, dimension=16, num_queries=20, top_k=5, index_types=['flat', 'hnsw'], batch_size=200
+    )
+
+    results = {result['index_type']: result for result in report['results']}
+    assert results['flat']['points'][0]['recall_at_5'] == 1.0
+    for result in results.values():
+        assert result['index_disk_bytes'] > 0
+        assert result['embedding_disk_bytes'] == 500 * 16 * 4
+        assert result['disk_bytes'] >= result['index_disk_bytes'] + result['embedding_disk_bytes']
+
+
+def test_rss_bytes_without_procfs_or_resource(monkeypatch):
+    """既没有/proc也没有resource模块的平台上返回None"""
+    real_open, real_import = builtins.open, builtins.__import__
+
+    def fake_open(file, *args, **kwargs):
+        if file == '/proc/self/statm':
+            raise OSError(file)
+        return real_open(file, *args, **kwargs)
+
+    def fake_import(name, *args, **kwargs):
+        if name == 'resource':
+            raise ImportError(name)
+        return real_import(name, *args, **kwargs)
+
+    monkeypatch.setattr(builtins, 'open', fake_open)
+    monkeypatch.setattr(builtins, '__import__', fake_import)
+
+    assert benchmark_vector_store.rss_bytes() is None
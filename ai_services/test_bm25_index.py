@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""BM25索引测试"""
+
+from ai_services.vector_store.bm25_index import BM25Index
+
+
+def test_search_ranks_exact_terms_first():
+    """包含查询词项的文档排在前面，股票代码等词项可以精确命中"""
+    index = BM25Index()
+    index.add_many([
+        ('a', '贵州茅台 600519 发布年报'),
+        ('b', 'MACD 指标出现金叉'),
+        ('c', '年报 显示 营收 增长'),
+    ])
+
+    assert index.search('600519')[0][0] == 'a'
+    assert index.search('macd')[0][0] == 'b'
+    assert {doc_id for doc_id, _ in index.search('年报')} == {'a', 'c'}
+
+
+def test_pending_documents_are_searchable_without_merge():
+    """未合并的缓冲段文档可以被检索，检索不会触发合并"""
+    index = BM25Index()
+    index.add_many([(f"doc{i}", f"common term{i}") for i in range(100)])
+    index.add('new', 'common fresh')
+
+    assert index._pending_count > 0
+    assert index.search('fresh') == [('new', index.search('fresh')[0][1])]
+    assert len(index.search('common', top_k=200)) == 101
+    assert index._pending_count > 0
+
+
+def test_merge_above_threshold_keeps_results(monkeypatch):
+    """缓冲段超过阈值时合并进CSR数组，合并前后命中的文档一致"""
+    monkeypatch.setattr(BM25Index, 'MIN_MERGE_POSTINGS', 10)
+    index = BM25Index()
+    index.add_many([(f"doc{i}", f"alpha beta{i % 4}") for i in range(8)])
+    before = [doc_id for doc_id, _ in index.search('beta1', top_k=10)]
+
+    index.add_many([(f"more{i}", f"gamma delta{i}") for i in range(20)])
+
+    assert index._pending_count == 0
+    assert [doc_id for doc_id, _ in index.search('beta1', top_k=10)] == before == ['doc1', 'doc5']
+    assert index.search('delta7')[0][0] == 'more7'
+
+
+def test_remove_and_replace_reclaim_slots():
+    """删除和替换的文档不再返回，失效槽位过多时回收"""
+    index = BM25Index()
+    index.add_many([(f"doc{i}", f"shared word{i}") for i in range(10)])
+    index.add('doc0', 'replaced content')
+    for i in range(1, 5):
+        assert index.remove(f"doc{i}")
+    assert not index.remove('missing')
+
+    assert len(index) == 6
+    assert {doc_id for doc_id, _ in index.search('shared', top_k=20)} == {f"doc{i}" for i in range(5, 10)}
+    assert index.search('replaced')[0][0] == 'doc0'
+    # 5个失效槽位超过15个槽位的20%，删除时已经回收
+    assert len(index._doc_ids) == len(index)
+
+
+def test_save_and_load_roundtrip(tmp_path):
+    """保存后加载得到相同的检索结果"""
+    index = BM25Index()
+    index.add_many([(f"doc{i}", f"term{i % 3} 文本{i}") for i in range(30)])
+    index.remove('doc4')
+    path = str(tmp_path / 'store')
+    index.save(path)
+
+    loaded = BM25Index()
+    loaded.load(path)
+
+    assert len(loaded) == 29
+    assert loaded.search('term1', top_k=20) == index.search('term1', top_k=20)
+    loaded.add('doc4', 'term1 again')
+    assert 'doc4' in {doc_id for doc_id, _ in loaded.search('term1', top_k=20)}
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""二进制文档内容存储测试"""
+
+import os
+
+from ai_services.vector_store.doc_store import BinaryDocStore
+
+
+def test_save_load_and_lazy_read(tmp_path):
+    """保存后加载只读取偏移表，内容按内部ID读取，支持非ASCII内容"""
+    path = str(tmp_path / 'x')
+    store = BinaryDocStore()
+    for int_id in range(5):
+        store.put(int_id, f"内容 {int_id}")
+    store.delete(2)
+    data_path, table_path = store.save(path, generation=1)
+
+    loaded = BinaryDocStore()
+    loaded.load(path, (data_path, table_path))
+
+    assert len(loaded) == 4
+    assert loaded.get(3) == '内容 3'
+    assert loaded.get(2) is None
+    assert 2 not in loaded and 4 in loaded
+    assert list(loaded.ids()) == [0, 1, 3, 4]
+
+
+def test_save_to_same_path_appends_new_records(tmp_path):
+    """保存到同一路径时只在内容文件末尾追加新记录，被覆盖的内容读取最新版本"""
+    path = str(tmp_path / 'x')
+    store = BinaryDocStore()
+    store.put(0, 'a' * 100)
+    store.put(1, 'b' * 100)
+    data_path, _ = store.save(path, generation=1)
+    size = os.path.getsize(data_path)
+
+    store.put(2, 'c')
+    store.put(1, 'updated')
+    appended_path, table_path = store.save(path, generation=2)
+
+    assert appended_path == data_path
+    assert os.path.getsize(data_path) > size
+    assert table_path.endswith('_docs.2.idx')
+    assert [store.get(int_id) for int_id in range(3)] == ['a' * 100, 'updated', 'c']
+
+
+def test_compaction_rewrites_file_without_deleted_records(tmp_path):
+    """已删除记录过多时整体重写内容文件，旧快照的文件保持不变"""
+    path = str(tmp_path / 'x')
+    store = BinaryDocStore()
+    for int_id in range(10):
+        store.put(int_id, 'x' * 1000)
+    first_path, _ = store.save(path, generation=1)
+    first_size = os.path.getsize(first_path)
+
+    for int_id in range(8):
+        store.delete(int_id)
+    second_path, _ = store.save(path, generation=2)
+
+    assert second_path != first_path
+    assert os.path.getsize(first_path) == first_size
+    assert os.path.getsize(second_path) < first_size / 2
+    assert [store.get(int_id) for int_id in (8, 9)] == ['x' * 1000] * 2
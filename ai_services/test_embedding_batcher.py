@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""批量嵌入生成测试"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from ai_services.vector_store.embedding_batcher import EmbeddingBatcher
+
+
+class RecordingModel:
+    """记录每批请求的测试模型，向量为文本长度"""
+
+    def __init__(self, delay=0.0):
+        self.batches = []
+        self.delay = delay
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+    def generate_embeddings(self, texts):
+        with self._lock:
+            self.batches.append(list(texts))
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(self.delay)
+        with self._lock:
+            self.active -= 1
+        return [[float(len(text))] for text in texts]
+
+
+class SingleTextModel:
+    """只提供逐条接口的测试模型"""
+
+    def generate_embedding(self, text):
+        return [float(len(text))]
+
+
+def test_batches_by_count_and_token_budget():
+    """按数量和token预算切分批次，超出预算的单条文本单独成批"""
+    model = RecordingModel()
+    batcher = EmbeddingBatcher(model, batch_size=3, max_batch_tokens=10, max_workers=1)
+
+    embeddings = batcher.embed(['a', 'bb', 'ccc', 'dddd', 'e' * 20, 'f'])
+
+    assert model.batches == [['a', 'bb', 'ccc'], ['dddd'], ['e' * 20], ['f']]
+    assert embeddings == [[1.0], [2.0], [3.0], [4.0], [20.0], [1.0]]
+
+
+def test_batches_run_concurrently_and_keep_order():
+    """多批并发请求，结果与输入顺序一致"""
+    model = RecordingModel(delay=0.05)
+    batcher = EmbeddingBatcher(model, batch_size=2, max_workers=4)
+    texts = ['x' * i for i in range(1, 17)]
+
+    embeddings = batcher.embed(texts)
+
+    assert embeddings == [[float(i)] for i in range(1, 17)]
+    assert len(model.batches) == 8
+    assert 1 < model.max_active <= 4
+
+
+def test_async_embed_limits_concurrency():
+    """异步接口同时进行的请求不超过max_workers，结果与输入顺序一致"""
+    model = RecordingModel(delay=0.02)
+    batcher = EmbeddingBatcher(model, batch_size=1, max_workers=2)
+
+    embeddings = asyncio.run(batcher.aembed(['a', 'bbb', 'cc', 'dddd']))
+
+    assert embeddings == [[1.0], [3.0], [2.0], [4.0]]
+    assert model.max_active <= 2
+
+
+def test_single_text_model_and_length_mismatch():
+    """只有逐条接口的模型在批内逐条调用，返回数量不一致时报错"""
+    assert EmbeddingBatcher(SingleTextModel()).embed(['ab', 'c']) == [[2.0], [1.0]]
+
+    class BrokenModel:
+        def generate_embeddings(self, texts):
+            return [[0.0]]
+
+    with pytest.raises(ValueError):
+        EmbeddingBatcher(BrokenModel()).embed(['a', 'b'])
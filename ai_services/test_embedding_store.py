@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""嵌入向量存储测试"""
+
+import os
+
+import numpy as np
+
+from ai_services.vector_store.base_vector_store import VectorStoreDocument
+from ai_services.vector_store.embedding_store import EmbeddingStore
+from ai_services.vector_store.faiss_vector_store import FAISSVectorStore
+
+DIMENSION = 8
+ROW_BYTES = DIMENSION * 4
+
+
+def random_vectors(count, seed=0):
+    """生成随机向量矩阵"""
+    return np.random.default_rng(seed).standard_normal((count, DIMENSION)).astype(np.float32)
+
+
+def test_unsaved_vectors_spill_to_temporary_file(tmp_path):
+    """未保存过的存储超过内存上限时写入临时文件，保存后临时文件被删除"""
+    store = EmbeddingStore(DIMENSION, max_pending_bytes=10 * ROW_BYTES)
+    vectors = random_vectors(35)
+    for start in range(0, 35, 5):
+        store.append(vectors[start:start + 5])
+
+    assert store._pending_rows <= 10
+    spill_path = store._path
+    assert spill_path is not None and os.path.exists(spill_path)
+    np.testing.assert_array_equal(store.get(range(35)), vectors)
+
+    saved_path = store.save(str(tmp_path / 'x'), generation=1)
+
+    assert not os.path.exists(spill_path)
+    assert os.path.getsize(saved_path) == 35 * ROW_BYTES
+    np.testing.assert_array_equal(store.get(range(35)), vectors)
+
+
+def test_flush_appends_to_bound_file(tmp_path):
+    """已保存的存储写出时追加到当前文件，按快照行数加载时忽略多出的行"""
+    path = str(tmp_path / 'x')
+    store = EmbeddingStore(DIMENSION, max_pending_bytes=4 * ROW_BYTES)
+    vectors = random_vectors(20)
+    store.append(vectors[:3])
+    saved_path = store.save(path, generation=1)
+
+    store.append(vectors[3:20])
+
+    assert store._path == saved_path
+    assert store._pending_rows == 0
+    np.testing.assert_array_equal(store.get(range(20)), vectors)
+
+    snapshot = EmbeddingStore(DIMENSION)
+    snapshot.load(path, rows=3, file_path=saved_path)
+    assert len(snapshot) == 3
+    np.testing.assert_array_equal(snapshot.get(range(3)), vectors[:3])
+
+
+def test_clear_removes_spill_file():
+    """清空存储时删除临时文件"""
+    store = EmbeddingStore(DIMENSION, max_pending_bytes=ROW_BYTES)
+    store.append(random_vectors(4))
+    spill_path = store._path
+
+    store.clear()
+
+    assert len(store) == 0
+    assert not os.path.exists(spill_path)
+
+
+def test_wal_only_store_keeps_pending_vectors_bounded(tmp_path):
+    """只依赖预写日志持久化时，内存中的向量不随写入量增长，重新加载后数据完整"""
+    path = str(tmp_path / 'store')
+    store = FAISSVectorStore(dimension=DIMENSION, wal_enabled=True, embedding_buffer_bytes=16 * ROW_BYTES)
+    store.save(path)
+    vectors = random_vectors(200)
+    for start in range(0, 200, 10):
+        store.add_documents([
+            VectorStoreDocument(f"d{i}", f"content {i}", embedding=vectors[i].tolist())
+            for i in range(start, start + 10)
+        ])
+
+    assert store._embeddings._pending_rows <= 16
+    assert store.get_document('d150').content == 'content 150'
+
+    reopened = FAISSVectorStore(dimension=DIMENSION, wal_enabled=True)
+    reopened.load(path)
+
+    assert reopened.count() == 200
+    assert reopened.search('q', embedding=vectors[123].tolist(), top_k=1)[0][0].id == 'd123'
+    np.testing.assert_allclose(reopened._document_vectors(['d199'])[0], vectors[199])
+
+
+def test_save_after_spill_writes_snapshot_file(tmp_path):
+    """加载后写出到溢出文件，保存（含日志压缩）时把向量写入快照文件而不是引用溢出文件"""
+    path = str(tmp_path / 'store')
+    config = {'dimension': DIMENSION, 'wal_enabled': True, 'wal_compact_threshold': 5, 'embedding_buffer_bytes': 100}
+    vectors = random_vectors(6)
+    documents = [VectorStoreDocument(f"d{i}", f"content {i}", embedding=vectors[i].tolist()) for i in range(6)]
+
+    store = FAISSVectorStore(**config)
+    store.add_documents(documents[:1])
+    store.save(path)
+    store.add_documents(documents[1:5])
+    store.save(path)
+
+    loaded = FAISSVectorStore(**config)
+    loaded.load(path)
+    loaded.add_documents(documents[5:])
+    spill_path = loaded._embeddings._path
+    loaded.save(path)
+
+    saved_path = loaded._embeddings._path
+    assert saved_path != spill_path and saved_path.startswith(path)
+    assert not os.path.exists(spill_path)
+
+    reopened = FAISSVectorStore(**config)
+    reopened.load(path)
+    reopened.reindex('hnsw')
+
+    assert reopened.count() == 6
+    np.testing.assert_array_equal(reopened._document_vectors(['d0', 'd5']), vectors[[0, 5]])
+
+
+def test_load_maps_file_and_ignores_rows_beyond_snapshot(tmp_path):
+    """加载时以内存映射读取向量，只映射快照记录的行数"""
+    path = str(tmp_path / 'x')
+    vectors = random_vectors(12)
+    store = EmbeddingStore(DIMENSION)
+    store.append(vectors)
+    file_path = store.save(path, generation=1)
+
+    loaded = EmbeddingStore(DIMENSION)
+    loaded.load(path, rows=10, file_path=file_path)
+
+    assert isinstance(loaded._mmap, np.memmap)
+    assert len(loaded) == 10
+    np.testing.assert_array_equal(loaded.get([9, 0]), vectors[[9, 0]])
+
+    loaded.append(vectors[10:])
+    np.testing.assert_array_equal(loaded.get(range(12)), vectors)
+
+
+def test_float16_halves_file_size(tmp_path):
+    """float16存储的文件大小是float32的一半，读取时转换为float32"""
+    vectors = random_vectors(16)
+    sizes = {}
+    for dtype in ('float32', 'float16'):
+        store = EmbeddingStore(DIMENSION, dtype)
+        store.append(vectors)
+        sizes[dtype] = os.path.getsize(store.save(str(tmp_path / dtype), generation=1))
+        restored = store.get(range(16))
+        assert restored.dtype == np.float32
+        np.testing.assert_allclose(restored, vectors, atol=1e-2)
+
+    assert sizes['float16'] * 2 == sizes['float32']
+
+
+def test_reindex_after_load_reads_stored_embeddings(tmp_path):
+    """加载后切换索引类型时从向量文件重建，不需要嵌入模型"""
+    path = str(tmp_path / 'store')
+    vectors = random_vectors(100)
+    store = FAISSVectorStore(dimension=DIMENSION)
+    store.add_documents([VectorStoreDocument(f"d{i}", f"content {i}", embedding=vectors[i].tolist()) for i in range(100)])
+    store.delete_document('d5')
+    store.save(path)
+
+    loaded = FAISSVectorStore(dimension=DIMENSION)
+    loaded.load(path)
+    loaded.reindex('hnsw')
+
+    assert loaded.index_type == 'hnsw'
+    assert loaded.index.ntotal == 99
+    assert loaded.search('q', embedding=vectors[42].tolist(), top_k=1)[0][0].id == 'd42'
+    np.testing.assert_array_equal(loaded._document_vectors(['d42'])[0], vectors[42])
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""FAISS向量存储索引类型测试"""
+
+import numpy as np
+import pytest
+
+from ai_services.conftest import DIMENSION, make_documents
+from ai_services.vector_store.faiss_vector_store import FAISSVectorStore
+
+
+def query_vector(seed=100):
+    """生成随机查询向量"""
+    return np.random.default_rng(seed).standard_normal(DIMENSION).tolist()
+
+
+@pytest.mark.parametrize('index_type', ['pq', 'ivf_pq'])
+def test_single_document_on_empty_pq_store(index_type):
+    """空的PQ存储添加单个文档不报错，并且可以检索到"""
+    store = FAISSVectorStore(dimension=DIMENSION, index_type=index_type, nlist=4, pq_m=4, pq_nbits=4)
+    document = make_documents(1)[0]
+    store.add_document(document)
+
+    assert not store.index.is_trained
+    assert [doc.id for doc, _ in store.search('q', embedding=query_vector(), top_k=3)] == [document.id]
+    assert len(store.search_range('q', 1e9, embedding=query_vector())) == 1
+
+
+@pytest.mark.parametrize('index_type', ['sq8', 'pq', 'ivf_sq8', 'ivf_pq'])
+def test_quantized_index_trains_with_configured_parameters(index_type):
+    """向量达到训练所需数量后才训练，并保留配置的pq_nbits"""
+    store = FAISSVectorStore(dimension=DIMENSION, index_type=index_type, nlist=4, pq_m=4, pq_nbits=4)
+    for document in make_documents(40):
+        store.add_document(document)
+
+    assert store.index.is_trained
+    assert store.index.ntotal == 40
+    if index_type in ('pq', 'ivf_pq'):
+        assert store._base_index().pq.nbits == 4
+
+
+@pytest.mark.parametrize('index_type', ['sq8', 'pq', 'ivf_pq'])
+def test_quantized_search_with_refine_matches_exact(index_type):
+    """开启精确重排后，返回结果的分数与原始向量的精确距离一致"""
+    documents = make_documents(300)
+    store = FAISSVectorStore(dimension=DIMENSION, index_type=index_type, nlist=4, pq_m=4, pq_nbits=4, refine_factor=8)
+    store.add_documents(documents)
+
+    vectors = {doc.id: np.array(doc.embedding, dtype=np.float32) for doc in documents}
+    query = np.array(query_vector(), dtype=np.float32)
+    results = store.search('q', embedding=query.tolist(), top_k=5)
+
+    assert len(results) == 5
+    for doc, score in results:
+        assert score == pytest.approx(float(((vectors[doc.id] - query) ** 2).sum()), rel=1e-4)
+    scores = [score for _, score in results]
+    assert scores == sorted(scores)
+
+
+def test_ivf_store_keeps_configured_nlist_after_small_first_batch():
+    """首批文档较少时推迟训练，之后使用配置的nlist训练，向量足够多时在后台重新训练"""
+    store = FAISSVectorStore(dimension=DIMENSION, index_type='ivf_flat', nlist=8)
+    store.add_documents(make_documents(3, prefix='small'))
+    assert not store.index.is_trained
+
+    store.add_documents(make_documents(10, seed=1, prefix='first'))
+    assert store.index.is_trained
+    assert store._base_index().nlist == 8
+    assert store._trained_size == 13
+
+    store.add_documents(make_documents(400, seed=2, prefix='more'))
+    store._wait_for_rebuild()
+
+    assert store._base_index().nlist == 8
+    assert store._trained_size == 413
+    assert store.index.ntotal == 413
+    assert len(store.search('q', embedding=query_vector(), top_k=5)) == 5
+
+
+def test_sq8_waits_for_enough_vectors_before_training():
+    """SQ8在向量足够估计取值范围之前不训练，未训练时精确检索"""
+    documents = make_documents(39)
+    store = FAISSVectorStore(dimension=DIMENSION, index_type='sq8')
+    store.add_documents(documents[:10])
+
+    assert not store.index.is_trained
+    results = store.search('q', embedding=documents[7].embedding, top_k=1)
+    assert results[0][0].id == 'doc7' and results[0][1] == 0.0
+
+    store.add_documents(documents[10:])
+    assert store.index.is_trained
+    assert store._trained_size == 39
+    assert store.index.ntotal == 39
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""FAISS向量存储持久化测试（快照、预写日志和旧版本迁移）"""
+
+import json
+import os
+
+import numpy as np
+import pytest
+
+from ai_services.conftest import DIMENSION, make_documents
+from ai_services.vector_store.base_vector_store import VectorStoreDocument
+from ai_services.vector_store.faiss_vector_store import FAISSVectorStore, faiss
+
+
+def test_save_and_load_roundtrip(tmp_path):
+    """保存后加载得到相同的文档、元数据和检索结果"""
+    path = str(tmp_path / 'store')
+    store = FAISSVectorStore(dimension=DIMENSION)
+    store.add_documents(make_documents(20))
+    store.delete_document('doc3')
+    store.save(path)
+
+    loaded = FAISSVectorStore(dimension=DIMENSION)
+    loaded.load(path)
+
+    assert loaded.count() == 19
+    assert loaded.get_document('doc3') is None
+    assert loaded.get_document('doc5').content == 'content doc5'
+    assert loaded.get_document('doc5').metadata == {'group': 2, 'tag': 't1'}
+    query = make_documents(1, seed=9)[0].embedding
+    assert [doc.id for doc, _ in loaded.search('q', embedding=query)] == \
+        [doc.id for doc, _ in store.search('q', embedding=query)]
+
+
+def test_wal_replays_operations_after_snapshot(tmp_path):
+    """开启预写日志时，快照之后的添加、删除和元数据合并在加载时重放"""
+    path = str(tmp_path / 'store')
+    store = FAISSVectorStore(dimension=DIMENSION, wal_enabled=True)
+    store.add_documents(make_documents(5))
+    store.save(path)
+
+    store.add_documents(make_documents(3, seed=1, prefix='new'))
+    store.delete_document('doc0')
+    store.add_documents([VectorStoreDocument('doc1', 'replaced', {}, make_documents(1, seed=2)[0].embedding)])
+    store.save()
+
+    loaded = FAISSVectorStore(dimension=DIMENSION, wal_enabled=True)
+    loaded.load(path)
+
+    assert loaded.count() == 7
+    assert loaded.index.ntotal == 7
+    assert loaded.get_document('doc0') is None
+    assert loaded.get_document('doc1').content == 'replaced'
+    assert loaded.get_document('new2') is not None
+
+
+def test_wal_compaction_writes_new_snapshot(tmp_path):
+    """日志操作数达到阈值时写入完整快照并换用新一代日志"""
+    path = str(tmp_path / 'store')
+    store = FAISSVectorStore(dimension=DIMENSION, wal_enabled=True, wal_compact_threshold=3)
+    store.save(path)
+    store.add_documents(make_documents(5))
+    store.save()
+
+    with open(f"{path}_data.json", encoding='utf-8') as f:
+        data = json.load(f)
+    assert data['wal_generation'] == store._wal_generation
+    assert len(data['int_ids']) == 5
+    assert not os.path.exists(f"{path}_wal_{store._wal_generation - 1}.bin")
+
+
+def test_crash_before_data_file_keeps_previous_snapshot(tmp_path, monkeypatch):
+    """写入快照时在替换数据文件前中断，加载得到旧快照并重放日志，不会出现重复向量"""
+    path = str(tmp_path / 'store')
+    store = FAISSVectorStore(dimension=DIMENSION, wal_enabled=True, wal_compact_threshold=1)
+    store.add_documents(make_documents(4))
+    store.save(path)
+    store.add_documents(make_documents(3, seed=1, prefix='new'))
+
+    real_replace = os.replace
+
+    def crashing_replace(src, dst):
+        if str(dst).endswith('_data.json'):
+            raise OSError('simulated crash')
+        return real_replace(src, dst)
+
+    monkeypatch.setattr(os, 'replace', crashing_replace)
+    with pytest.raises(OSError):
+        store.save()
+    monkeypatch.setattr(os, 'replace', real_replace)
+
+    loaded = FAISSVectorStore(dimension=DIMENSION, wal_enabled=True)
+    loaded.load(path)
+
+    assert loaded.count() == 7
+    assert loaded.index.ntotal == 7
+    assert loaded.get_document('new1').content == 'content new1'
+
+
+def test_snapshot_removes_files_of_previous_generation(tmp_path):
+    """新快照提交后删除旧快照的索引和偏移表文件，追加写入的文件继续使用"""
+    path = str(tmp_path / 'store')
+    store = FAISSVectorStore(dimension=DIMENSION)
+    store.add_documents(make_documents(3))
+    store.save(path)
+    store.add_documents(make_documents(3, seed=1, prefix='new'))
+    store.save(path)
+
+    with open(f"{path}_data.json", encoding='utf-8') as f:
+        files = set(json.load(f)['files'].values())
+    snapshot_files = {
+        name for name in os.listdir(tmp_path)
+        if name.startswith('store_') and not name.endswith('_data.json')
+    }
+    assert snapshot_files == files
+    assert 'store_embeddings.1.bin' in files
+    assert 'store_index.2.faiss' in files
+
+
+def test_load_legacy_snapshot_without_file_names(tmp_path):
+    """数据文件中没有文件名的旧快照使用不带代数的文件名加载"""
+    path = str(tmp_path / 'store')
+    store = FAISSVectorStore(dimension=DIMENSION)
+    store.add_documents(make_documents(4))
+    store.save(path)
+
+    data_path = f"{path}_data.json"
+    with open(data_path, encoding='utf-8') as f:
+        data = json.load(f)
+    legacy_names = {
+        'index': 'store_index.faiss', 'embeddings': 'store_embeddings.bin',
+        'docs': 'store_docs.bin', 'docs_index': 'store_docs.idx'
+    }
+    for name, file_name in data.pop('files').items():
+        os.rename(tmp_path / file_name, tmp_path / legacy_names[name])
+    with open(data_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+
+    loaded = FAISSVectorStore(dimension=DIMENSION)
+    loaded.load(path)
+
+    assert loaded.count() == 4
+    assert loaded.get_document('doc2').content == 'content doc2'
+
+
+def test_migrate_legacy_index_with_id_to_doc(tmp_path):
+    """迁移按插入顺序编号、文档内容保存在JSON中的旧版本数据"""
+    path = str(tmp_path / 'store')
+    vectors = np.random.default_rng(0).standard_normal((3, DIMENSION)).astype(np.float32)
+    index = faiss.IndexFlatL2(DIMENSION)
+    index.add(vectors)
+    faiss.write_index(index, f"{path}_index.faiss")
+    with open(f"{path}_data.json", 'w', encoding='utf-8') as f:
+        json.dump({
+            'id_to_doc': {'a': 'alpha', 'b': 'beta', 'c': 'gamma'},
+            'id_to_metadata': {'a': {}, 'b': {'k': 1}, 'c': {}},
+            'dimension': DIMENSION,
+            'index_type': 'flat',
+        }, f)
+
+    store = FAISSVectorStore(dimension=DIMENSION)
+    store.load(path)
+
+    assert store.count() == 3
+    assert store.get_document('b').content == 'beta'
+    assert store.search('q', embedding=vectors[2].tolist(), top_k=1)[0][0].id == 'c'
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""FAISS向量存储后台重建索引测试"""
+
+import threading
+
+import pytest
+
+from ai_services.conftest import DIMENSION, make_documents
+from ai_services.vector_store.faiss_vector_store import FAISSVectorStore
+
+
+@pytest.fixture
+def paused_rebuild(monkeypatch):
+    """让后台重建在开始构建前暂停，直到测试放行"""
+    started, release = threading.Event(), threading.Event()
+    rebuild_index = FAISSVectorStore._rebuild_index
+
+    def paused(self, int_ids=None):
+        started.set()
+        assert release.wait(10)
+        rebuild_index(self, int_ids)
+
+    monkeypatch.setattr(FAISSVectorStore, '_rebuild_index', paused)
+    yield started, release
+    release.set()
+
+
+def test_writes_during_rebuild_are_replayed(paused_rebuild):
+    """重建期间旧索引继续提供检索，期间的添加和删除在替换前重放到新索引"""
+    started, release = paused_rebuild
+    documents = make_documents(100)
+    store = FAISSVectorStore(dimension=DIMENSION)
+    store.add_documents(documents)
+
+    future = store.reindex_async('ivf_flat', nlist=4, nprobe=4)
+    assert started.wait(10)
+
+    late = make_documents(5, seed=1, prefix='late')
+    store.add_documents(late)
+    store.delete_documents(['doc1', 'doc2'])
+    assert store.index_type == 'flat'
+    assert store.search('q', embedding=late[0].embedding, top_k=1)[0][0].id == 'late0'
+    with pytest.raises(RuntimeError):
+        store.reindex_async('hnsw')
+
+    release.set()
+    assert future.result(timeout=10) is True
+
+    assert store.index_type == 'ivf_flat'
+    assert store._base_index().nlist == 4
+    assert store.index.ntotal == 103
+    assert store.search('q', embedding=late[3].embedding, top_k=1)[0][0].id == 'late3'
+    assert 'doc1' not in [doc.id for doc, _ in store.search('q', embedding=documents[1].embedding, top_k=5)]
+
+
+def test_clear_during_rebuild_discards_new_index(paused_rebuild):
+    """重建期间清空存储时放弃本次重建"""
+    started, release = paused_rebuild
+    store = FAISSVectorStore(dimension=DIMENSION)
+    store.add_documents(make_documents(50))
+
+    future = store.reindex_async('hnsw')
+    assert started.wait(10)
+    store.clear()
+    release.set()
+
+    assert future.result(timeout=10) is False
+    assert store.index_type == 'flat'
+    assert store.count() == 0
+
+
+def test_untrained_rebuild_does_not_duplicate_replayed_vectors(paused_rebuild):
+    """新索引开始时向量不足无法训练、重建期间的写入使其达到训练数量时，每个向量只加入索引一次"""
+    started, release = paused_rebuild
+    documents = make_documents(10)
+    store = FAISSVectorStore(dimension=DIMENSION, index_type='ivf_flat', nlist=4, nprobe=16)
+    # 首次训练同样经过_rebuild_index，训练完成后再暂停后台重建
+    release.set()
+    store.add_documents(documents)
+    started.clear()
+    release.clear()
+
+    future = store.reindex_async(nlist=16)
+    assert started.wait(10)
+    store.add_documents(make_documents(10, seed=1, prefix='late'))
+    store.add_documents(make_documents(10, seed=2, prefix='later'))
+
+    release.set()
+    assert future.result(timeout=10) is True
+
+    assert store._base_index().nlist == 16
+    assert store.index.ntotal == store.count() == 30
+    results = store.search('q', embedding=documents[0].embedding, top_k=30)
+    ids = [doc.id for doc, _ in results]
+    assert len(ids) == len(set(ids)) == 30
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""FAISS向量存储的替换写入、upsert和批量删除测试"""
+
+import asyncio
+
+from ai_services.conftest import DIMENSION, CountingEmbeddingModel, make_documents
+from ai_services.vector_store.base_vector_store import VectorStoreDocument
+from ai_services.vector_store.faiss_vector_store import FAISSVectorStore
+
+
+def test_add_existing_id_replaces_document():
+    """添加已存在的ID时替换旧版本，索引中不保留旧向量"""
+    store = FAISSVectorStore(dimension=DIMENSION)
+    store.add_documents(make_documents(5))
+    replacement = make_documents(1, seed=1)[0]
+    replacement.content = 'new content'
+
+    store.add_documents([replacement])
+
+    assert store.count() == 5
+    assert store.index.ntotal == 5
+    assert store.get_document('doc0').content == 'new content'
+    assert store.search('q', embedding=replacement.embedding, top_k=1)[0][0].id == 'doc0'
+
+
+def test_upsert_skips_unchanged_documents():
+    """upsert只为内容或元数据变化的文档生成嵌入向量"""
+    model = CountingEmbeddingModel()
+    store = FAISSVectorStore(dimension=DIMENSION, embedding_model=model)
+    documents = [VectorStoreDocument(f"d{i}", f"text {i}", {'v': 1}) for i in range(4)]
+    store.upsert_documents(documents)
+    assert model.count == 4
+
+    updated = [VectorStoreDocument(f"d{i}", f"text {i}", {'v': 1}) for i in range(4)]
+    updated[1] = VectorStoreDocument('d1', 'changed', {'v': 1})
+    updated[2] = VectorStoreDocument('d2', 'text 2', {'v': 2})
+    store.upsert_documents(updated + [VectorStoreDocument('d9', 'new', {})])
+
+    assert model.count == 7
+    assert store.count() == 5
+    assert store.get_document('d1').content == 'changed'
+    assert store.get_document('d2').metadata == {'v': 2}
+
+
+def test_aupsert_documents():
+    """异步upsert与同步版本行为一致"""
+    store = FAISSVectorStore(dimension=DIMENSION, embedding_model=CountingEmbeddingModel())
+
+    ids = asyncio.run(store.aupsert_documents([VectorStoreDocument('a', 'x', {}), VectorStoreDocument('a', 'y', {})]))
+
+    assert ids == ['a', 'a']
+    assert store.get_document('a').content == 'y'
+
+
+def test_delete_documents_in_batch():
+    """批量删除返回实际删除的数量，重复和不存在的ID被忽略"""
+    store = FAISSVectorStore(dimension=DIMENSION)
+    store.add_documents(make_documents(10))
+
+    assert store.delete_documents(['doc1', 'doc1', 'doc2', 'missing']) == 2
+    assert store.count() == 8
+    assert store.index.ntotal == 8
+    assert store.get_document('doc2') is None
+
+
+def test_hnsw_search_excludes_deleted_vectors_without_growing_k():
+    """HNSW删除的向量留在索引中，检索通过ID选择器排除，仍返回top_k个有效结果"""
+    store = FAISSVectorStore(dimension=DIMENSION, index_type='hnsw', tombstone_reindex_ratio=0.5)
+    documents = make_documents(200)
+    store.add_documents(documents)
+    deleted = {f"doc{i}" for i in range(0, 200, 3)}
+    store.delete_documents(sorted(deleted))
+
+    assert len(store._deleted_int_ids) == len(deleted)
+    for doc in documents[:5]:
+        results = store.search('q', embedding=doc.embedding, top_k=10)
+        assert len(results) == 10
+        assert not deleted & {result.id for result, _ in results}
+
+
+def test_hnsw_rebuilds_when_deleted_fraction_is_high():
+    """HNSW中已删除向量的占比超过阈值时自动在后台重建索引"""
+    store = FAISSVectorStore(dimension=DIMENSION, index_type='hnsw', tombstone_reindex_ratio=0.2)
+    store.add_documents(make_documents(100))
+    store.delete_documents([f"doc{i}" for i in range(10)])
+    assert store._rebuild_future is None
+
+    store.delete_documents([f"doc{i}" for i in range(10, 30)])
+    store._wait_for_rebuild()
+
+    assert not store._deleted_int_ids
+    assert store.index.ntotal == 70
+    assert store.count() == 70
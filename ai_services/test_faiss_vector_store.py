@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""FAISS向量存储检索行为测试"""
+
+import numpy as np
+import pytest
+
+from ai_services.conftest import DIMENSION, CountingEmbeddingModel, make_documents
+from ai_services.vector_store.base_vector_store import VectorStoreDocument
+from ai_services.vector_store.faiss_vector_store import FAISSVectorStore
+
+
+def brute_force(documents, query, top_k):
+    """按L2距离暴力计算前top_k个文档ID"""
+    vectors = np.array([doc.embedding for doc in documents], dtype=np.float32)
+    distances = ((vectors - np.array(query, dtype=np.float32)) ** 2).sum(axis=1)
+    return [documents[i].id for i in np.argsort(distances)[:top_k]]
+
+
+def test_search_maps_internal_ids_to_documents():
+    """检索结果通过内部ID映射还原为正确的文档"""
+    documents = make_documents(50)
+    store = FAISSVectorStore(dimension=DIMENSION)
+    store.add_documents(documents)
+
+    for document in documents[:5]:
+        doc, score = store.search('q', embedding=document.embedding, top_k=1)[0]
+        assert doc.id == document.id
+        assert doc.content == document.content
+        assert score == 0.0
+
+    query = np.random.default_rng(9).standard_normal(DIMENSION).tolist()
+    assert [doc.id for doc, _ in store.search('q', embedding=query, top_k=7)] == brute_force(documents, query, 7)
+
+
+def test_internal_ids_are_not_reused_after_delete():
+    """删除的向量从索引中移除，内部ID单调递增不复用"""
+    documents = make_documents(10)
+    store = FAISSVectorStore(dimension=DIMENSION)
+    store.add_documents(documents)
+
+    assert store.delete_document('doc3')
+    assert store.index.ntotal == 9
+    assert store.get_document('doc3') is None
+    assert 'doc3' not in [doc.id for doc, _ in store.search('q', embedding=documents[3].embedding, top_k=10)]
+
+    store.add_documents(make_documents(1, seed=1, prefix='new'))
+    assert store._id_to_int['new0'] == 10
+    assert store._int_to_id[10] == 'new0'
+    assert store.search('q', embedding=documents[4].embedding, top_k=1)[0][0].id == 'doc4'
+
+
+def test_search_batch_matches_individual_searches():
+    """批量检索与逐个检索的结果一致"""
+    store = FAISSVectorStore(dimension=DIMENSION)
+    store.add_documents(make_documents(100))
+    queries = np.random.default_rng(3).standard_normal((6, DIMENSION)).tolist()
+
+    results = store.search_batch(['q'] * 6, queries, top_k=4)
+
+    assert len(results) == 6
+    for query, hits in zip(queries, results):
+        expected = store.search('q', embedding=query, top_k=4)
+        assert [doc.id for doc, _ in hits] == [doc.id for doc, _ in expected]
+        assert [score for _, score in hits] == pytest.approx([score for _, score in expected])
+
+
+def test_search_batch_embeds_missing_queries_in_one_call():
+    """未提供向量的查询合并为一次嵌入请求"""
+    model = CountingEmbeddingModel()
+    store = FAISSVectorStore(dimension=DIMENSION, embedding_model=model, query_cache_size=0)
+    store.add_documents(make_documents(20))
+    provided = make_documents(1, seed=5)[0].embedding
+
+    results = store.search_batch(['a', 'bb', 'ccc'], [None, provided, None], top_k=2)
+
+    assert model.calls == 1
+    assert [len(hits) for hits in results] == [2, 2, 2]
+    assert store.search_batch([], top_k=2) == []
+    with pytest.raises(ValueError):
+        store.search_batch(['a', 'b'], [provided], top_k=2)
+
+
+@pytest.mark.parametrize('index_type,threshold', [('flat', 4096), ('flat', 0), ('hnsw', 0), ('ivf_flat', 0)])
+def test_filtered_search_returns_top_k_matches(index_type, threshold):
+    """筛选条件命中的文档很少时仍返回top_k个匹配文档，与对匹配文档的精确检索一致"""
+    documents = make_documents(600)
+    for i, doc in enumerate(documents):
+        doc.metadata['rare'] = i % 50 == 0
+    store = FAISSVectorStore(dimension=DIMENSION, index_type=index_type, nlist=8, nprobe=8,
+                             filter_exact_threshold=threshold)
+    store.add_documents(documents)
+    query = np.random.default_rng(4).standard_normal(DIMENSION).tolist()
+
+    results = store.search('q', embedding=query, top_k=5, filters={'rare': True, 'tag': 't0'})
+
+    matching = [doc for doc in documents if doc.metadata['rare'] and doc.metadata['tag'] == 't0']
+    assert [doc.id for doc, _ in results] == brute_force(matching, query, 5)
+
+
+def test_filters_follow_replaced_and_deleted_documents():
+    """替换和删除文档后倒排索引同步更新，无法索引的筛选值退回到检索后筛选"""
+    documents = make_documents(30)
+    store = FAISSVectorStore(dimension=DIMENSION)
+    store.add_documents(documents)
+    query = documents[0].embedding
+
+    moved = VectorStoreDocument('doc0', 'moved', {'group': 99, 'tags': ['a', 'b']}, documents[0].embedding)
+    store.add_documents([moved])
+    store.delete_document('doc3')
+
+    assert 'doc0' not in [doc.id for doc, _ in store.search('q', embedding=query, top_k=30, filters={'group': 0})]
+    assert 'doc3' not in [doc.id for doc, _ in store.search('q', embedding=query, top_k=30, filters={'group': 0})]
+    assert [doc.id for doc, _ in store.search('q', embedding=query, top_k=5, filters={'group': 99})] == ['doc0']
+    assert [doc.id for doc, _ in store.search('q', embedding=query, top_k=5, filters={'tags': ['a', 'b']})] == ['doc0']
+    assert store.search('q', embedding=query, top_k=5, filters={'group': 'missing'}) == []
+
+
+@pytest.mark.parametrize('index_type', ['flat', 'hnsw', 'ivf_flat'])
+def test_cosine_scores_are_similarities(index_type):
+    """余弦度量返回按相似度降序排列的余弦相似度，与向量长度无关"""
+    documents = make_documents(200)
+    store = FAISSVectorStore(dimension=DIMENSION, metric='cosine', index_type=index_type, nlist=4, nprobe=4)
+    store.add_documents(documents)
+    query = np.random.default_rng(6).standard_normal(DIMENSION)
+
+    results = store.search('q', embedding=(query * 10).tolist(), top_k=5)
+
+    vectors = {doc.id: np.array(doc.embedding) for doc in documents}
+    scores = [score for _, score in results]
+    assert scores == sorted(scores, reverse=True)
+    for doc, score in results:
+        vector = vectors[doc.id]
+        assert score == pytest.approx(vector @ query / np.linalg.norm(vector) / np.linalg.norm(query), abs=1e-5)
+    assert store.search('q', embedding=documents[7].embedding, top_k=1)[0][0].id == 'doc7'
+
+
+def test_inner_product_metric_and_persistence(tmp_path):
+    """内积度量返回内积分数；加载时以保存的度量为准"""
+    documents = make_documents(50)
+    store = FAISSVectorStore(dimension=DIMENSION, similarity_metric='ip')
+    store.add_documents(documents)
+    query = np.random.default_rng(8).standard_normal(DIMENSION)
+
+    doc, score = store.search('q', embedding=query.tolist(), top_k=1)[0]
+    products = {d.id: float(np.array(d.embedding) @ query) for d in documents}
+    assert doc.id == max(products, key=products.get)
+    assert score == pytest.approx(products[doc.id], abs=1e-5)
+
+    store.save(str(tmp_path / 'store'))
+    loaded = FAISSVectorStore(dimension=DIMENSION, metric='l2')
+    loaded.load(str(tmp_path / 'store'))
+    assert loaded.metric == 'ip'
+    assert loaded.higher_is_better
+
+    with pytest.raises(ValueError):
+        FAISSVectorStore(dimension=DIMENSION, metric='manhattan')
+
+
+def test_paging_visits_each_document_once_while_writing():
+    """分页期间新增和删除文档不会导致已有文档重复或被跳过"""
+    documents = make_documents(25)
+    store = FAISSVectorStore(dimension=DIMENSION)
+    store.add_documents(documents)
+
+    seen = []
+    page, cursor = store.list_documents_page(limit=10)
+    seen.extend(doc.id for doc in page)
+    store.delete_document('doc15')
+    store.add_documents(make_documents(3, seed=1, prefix='late'))
+    while cursor is not None:
+        page, cursor = store.list_documents_page(cursor, limit=10)
+        seen.extend(doc.id for doc in page)
+
+    expected = [doc.id for doc in documents if doc.id != 'doc15'] + ['late0', 'late1', 'late2']
+    assert seen == expected
+    assert [doc.id for doc in store.iter_documents(batch_size=4)] == expected
+
+    with pytest.raises(ValueError):
+        store.list_documents_page('not-a-cursor')
+
+
+def test_paging_with_filters_and_embeddings():
+    """按筛选条件分页，可同时返回嵌入向量"""
+    documents = make_documents(30)
+    documents[4].metadata['tags'] = ['x']
+    store = FAISSVectorStore(dimension=DIMENSION)
+    store.add_documents(documents)
+
+    pages = []
+    cursor = None
+    while True:
+        page, cursor = store.list_documents_page(cursor, limit=4, include_embeddings=True, filters={'group': 1})
+        pages.append(page)
+        if cursor is None:
+            break
+
+    assert [len(page) for page in pages] == [4, 4, 2]
+    assert [doc.id for page in pages for doc in page] == [doc.id for doc in documents if doc.metadata['group'] == 1]
+    np.testing.assert_allclose(pages[0][0].embedding, documents[1].embedding, rtol=1e-6)
+
+    page, cursor = store.list_documents_page(filters={'tags': ['x']})
+    assert [doc.id for doc in page] == ['doc4'] and cursor is None
+
+
+@pytest.mark.parametrize('index_type', ['flat', 'ivf_flat', 'sq8'])
+def test_range_search_returns_documents_within_radius(index_type):
+    """l2范围检索返回距离小于半径的全部文档，按距离升序排列"""
+    documents = make_documents(300)
+    store = FAISSVectorStore(dimension=DIMENSION, index_type=index_type, nlist=4, nprobe=4)
+    store.add_documents(documents)
+    store.delete_document('doc0')
+    query = np.array(documents[0].embedding, dtype=np.float32)
+
+    results = store.search_range('q', 6.0, embedding=query.tolist())
+
+    distances = {doc.id: float(((np.array(doc.embedding, dtype=np.float32) - query) ** 2).sum()) for doc in documents[1:]}
+    expected = {document_id for document_id, distance in distances.items() if distance < 6.0}
+    assert len(expected) > 5
+    assert {doc.id for doc, _ in results} == expected
+    scores = [score for _, score in results]
+    assert scores == sorted(scores)
+    assert all(score < 6.0 for score in scores)
+    assert len(store.search_range('q', 6.0, embedding=query.tolist(), max_results=3)) == 3
+
+
+def test_range_search_with_similarity_threshold_and_filters():
+    """余弦度量下返回相似度大于阈值的文档，可同时按元数据筛选"""
+    documents = make_documents(200)
+    store = FAISSVectorStore(dimension=DIMENSION, metric='cosine')
+    store.add_documents(documents)
+    query = np.array(documents[10].embedding)
+
+    results = store.search_range('q', 0.3, embedding=query.tolist(), filters={'group': 1})
+
+    def cosine(doc):
+        vector = np.array(doc.embedding)
+        return vector @ query / np.linalg.norm(vector) / np.linalg.norm(query)
+
+    expected = {doc.id for doc in documents if doc.metadata['group'] == 1 and cosine(doc) > 0.3}
+    assert len(expected) > 5
+    assert {doc.id for doc, _ in results} == expected
+    assert results[0][0].id == 'doc10'
+    assert [score for _, score in results] == sorted((score for _, score in results), reverse=True)
+
+
+def test_search_batch_where_limits_to_matching_field_values():
+    """只在字段取值满足条件的文档中检索，可同时按元数据筛选"""
+    documents = make_documents(90)
+    store = FAISSVectorStore(dimension=DIMENSION)
+    store.add_documents(documents)
+    query = documents[0].embedding
+
+    results = store.search_batch_where(['q'], [query], 30, 'group', lambda group: group > 0, filters={'tag': 't1'})[0]
+
+    matching = [doc for doc in documents if doc.metadata['group'] > 0 and doc.metadata['tag'] == 't1']
+    assert [doc.id for doc, _ in results] == brute_force(matching, query, 30)
+    assert 'doc0' in store and 'missing' not in store
+    assert store.list_document_ids() == [doc.id for doc in documents]
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""混合检索向量存储测试"""
+
+import pytest
+
+from ai_services.vector_store.base_vector_store import VectorStoreDocument
+from ai_services.vector_store.faiss_vector_store import FAISSVectorStore
+from ai_services.vector_store.hybrid_vector_store import HybridVectorStore
+
+
+def make_store(**config):
+    """创建基于平面FAISS索引的混合检索存储"""
+    return HybridVectorStore(vector_store=FAISSVectorStore(dimension=2, **config), rrf_k=60)
+
+
+def test_hybrid_search_fuses_ranks_with_rrf():
+    """两个检索器都排第一的文档融合分数为2/(rrf_k+1)"""
+    store = make_store()
+    store.add_documents([
+        VectorStoreDocument('a', '贵州茅台 600519 年报', embedding=[1.0, 0.0]),
+        VectorStoreDocument('b', '宁德时代 300750 年报', embedding=[0.0, 1.0]),
+        VectorStoreDocument('c', '其他 公司 公告', embedding=[0.7, 0.7]),
+    ])
+
+    results = store.search('600519', embedding=[1.0, 0.0], top_k=3)
+
+    assert results[0][0].id == 'a'
+    assert results[0][1] == pytest.approx(2 / 61)
+    assert [score for _, score in results] == sorted((score for _, score in results), reverse=True)
+
+
+def test_sparse_mode_applies_filters():
+    """BM25检索在取回文档后按元数据筛选"""
+    store = make_store()
+    store.add_documents([
+        VectorStoreDocument('a', '年报 披露', {'market': 'sh'}, embedding=[1.0, 0.0]),
+        VectorStoreDocument('b', '年报 发布', {'market': 'sz'}, embedding=[0.0, 1.0]),
+    ])
+
+    results = store.search('年报', top_k=5, filters={'market': 'sz'}, mode='sparse')
+
+    assert [doc.id for doc, _ in results] == ['b']
+
+
+def test_near_duplicates_are_not_indexed_in_bm25():
+    """近重复文档被合并到已有文档时，只有向量存储中实际保存的文档进入BM25索引"""
+    store = make_store(dedup='merge')
+    text = '公司 发布 年度 报告 营业 收入 同比 增长 百分之 二十 净利润 同比 增长'
+    document_ids = store.add_documents([
+        VectorStoreDocument('original', text, embedding=[1.0, 0.0]),
+        VectorStoreDocument('copy', text, embedding=[1.0, 0.0]),
+    ])
+
+    assert document_ids == ['original', 'original']
+    assert len(store.bm25) == 1
+    assert [doc.id for doc, _ in store.search('年度 报告', top_k=5, mode='sparse')] == ['original']
+
+
+def test_delete_removes_from_both_indexes():
+    """删除文档同时从向量存储和BM25索引中删除"""
+    store = make_store()
+    store.add_documents([
+        VectorStoreDocument('a', '指标 MACD', embedding=[1.0, 0.0]),
+        VectorStoreDocument('b', '指标 KDJ', embedding=[0.0, 1.0]),
+    ])
+
+    assert store.delete_document('a')
+
+    assert store.get_document('a') is None
+    assert [doc.id for doc, _ in store.search('macd 指标', embedding=[1.0, 0.0], top_k=5)] == ['b']
+
+
+@pytest.mark.parametrize('options', [{}, {'mmr': True}, {'collapse_by_parent': True}])
+def test_candidate_factor_applied_once(monkeypatch, options):
+    """两路检索各取top_k * hybrid_candidate_factor个候选，折叠或MMR时不再重复放大"""
+    store = make_store()
+    store.add_documents([
+        VectorStoreDocument(f"d{i}", f"年报 公告 {i}", embedding=[float(i), 1.0]) for i in range(30)
+    ])
+    requested = {}
+    vector_search_batch = store.vector_store.search_batch
+    bm25_search = store.bm25.search
+
+    def spy_search_batch(queries, embeddings=None, top_k=5, *args, **kwargs):
+        requested['vector'] = top_k
+        return vector_search_batch(queries, embeddings, top_k, *args, **kwargs)
+
+    def spy_bm25_search(query, top_k):
+        requested['sparse'] = top_k
+        return bm25_search(query, top_k)
+
+    monkeypatch.setattr(store.vector_store, 'search_batch', spy_search_batch)
+    monkeypatch.setattr(store.bm25, 'search', spy_bm25_search)
+
+    results = store.search('年报', embedding=[1.0, 1.0], top_k=2, **options)
+
+    assert requested == {'vector': 8, 'sparse': 8}
+    assert len(results) == 2
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Markdown分块和父文档折叠测试"""
+
+import numpy as np
+
+from ai_services.nlp.markdown_chunker import MarkdownChunker
+from ai_services.vector_store.base_vector_store import VectorStoreDocument
+from ai_services.vector_store.faiss_vector_store import FAISSVectorStore
+
+MARKDOWN = """# 年报
+
+## 营收
+
+公司营收增长了百分之十。净利润保持稳定。
+
+```python
+# 这一行不是标题
+print('revenue')
+```
+
+## 风险
+
+汇率波动带来不确定性。原材料价格上涨。
+"""
+
+
+def test_chunks_follow_headings_and_keep_code_blocks():
+    """按标题切分章节，分块以标题路径开头，代码块中的#行不作为标题"""
+    chunks = MarkdownChunker(max_tokens=200, overlap_tokens=0).split(MARKDOWN)
+
+    assert [chunk.section for chunk in chunks] == ['年报 > 营收', '年报 > 风险']
+    assert chunks[0].content.startswith('# 年报\n## 营收\n')
+    assert "# 这一行不是标题\nprint('revenue')" in chunks[0].content
+    assert chunks[1].content.endswith('原材料价格上涨。')
+
+
+def test_chunks_respect_budget_with_overlap():
+    """分块不超过max_tokens，相邻分块之间重叠句子"""
+    sentences = [f"第{i}句话内容。" for i in range(40)]
+    chunker = MarkdownChunker(max_tokens=40, overlap_tokens=8)
+
+    chunks = chunker.split(''.join(sentences))
+
+    assert len(chunks) > 1
+    assert all(len(chunk.content) <= 40 for chunk in chunks)
+    for previous, current in zip(chunks, chunks[1:]):
+        assert previous.content.split('。')[-2] + '。' in current.content
+    assert all(sentence in ''.join(chunk.content for chunk in chunks) for sentence in sentences)
+
+
+def test_long_sentence_is_hard_split():
+    """超过预算的单个句子按长度硬切分"""
+    chunks = MarkdownChunker(max_tokens=10, overlap_tokens=0).split('甲' * 35)
+
+    assert [len(chunk.content) for chunk in chunks] == [10, 10, 10, 5]
+
+
+def test_chunk_document_metadata_and_parent_collapse():
+    """分块记录父文档ID，检索时按父文档折叠只保留最相关的分块"""
+    chunker = MarkdownChunker(max_tokens=200, overlap_tokens=0)
+    chunks = chunker.chunk_document('report', MARKDOWN, {'year': 2024})
+
+    assert [chunk['id'] for chunk in chunks] == ['report#0', 'report#1']
+    assert chunks[1]['metadata'] == {'year': 2024, 'parent_id': 'report', 'chunk_index': 1, 'section': '年报 > 风险'}
+
+    rng = np.random.default_rng(0)
+    store = FAISSVectorStore(dimension=4)
+    store.add_documents([
+        VectorStoreDocument(chunk['id'], chunk['content'], chunk['metadata'], rng.standard_normal(4).tolist())
+        for chunk in chunks
+    ] + [VectorStoreDocument('other', 'other', {}, rng.standard_normal(4).tolist())])
+
+    results = store.search('q', embedding=[0.0] * 4, top_k=5, collapse_by_parent=True)
+
+    assert len(results) == 2
+    assert {doc.metadata.get('parent_id', doc.id) for doc, _ in results} == {'report', 'other'}
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""最大边际相关性（MMR）重排测试"""
+
+import numpy as np
+
+from ai_services.vector_store.base_vector_store import VectorStoreDocument, mmr_select
+from ai_services.vector_store.faiss_vector_store import FAISSVectorStore
+from ai_services.vector_store.sharded_vector_store import ShardedVectorStore
+
+
+def reference_mmr(query, vectors, top_k, lambda_mult):
+    """逐个候选计算的MMR参考实现"""
+    def cosine(a, b):
+        return float(a @ b / np.linalg.norm(a) / np.linalg.norm(b))
+
+    selected = []
+    while len(selected) < min(top_k, len(vectors)):
+        best, best_score = None, -np.inf
+        for i, vector in enumerate(vectors):
+            if i in selected:
+                continue
+            redundancy = max((cosine(vector, vectors[j]) for j in selected), default=0.0)
+            score = lambda_mult * cosine(vector, query) - (1 - lambda_mult) * redundancy
+            if score > best_score:
+                best, best_score = i, score
+        selected.append(best)
+    return selected
+
+
+def test_mmr_select_matches_reference():
+    """向量化实现与逐个计算的参考实现选择相同的候选"""
+    rng = np.random.default_rng(0)
+    query = rng.standard_normal(16)
+    vectors = rng.standard_normal((40, 16))
+
+    for lambda_mult in (0.0, 0.3, 0.7, 1.0):
+        assert mmr_select(query, vectors, 10, lambda_mult) == reference_mmr(query, vectors, 10, lambda_mult)
+    assert mmr_select(query, vectors[:0], 5) == []
+
+
+def clustered_documents():
+    """三组几乎相同的文档，第一组与查询最相关"""
+    rng = np.random.default_rng(1)
+    centers = np.eye(8)[:3]
+    return [
+        VectorStoreDocument(f"c{c}_{i}", f"cluster {c} item {i}", {},
+                            (centers[c] + rng.normal(scale=0.01, size=8)).tolist())
+        for c in range(3) for i in range(5)
+    ]
+
+
+def test_mmr_search_diversifies_results():
+    """开启MMR后优先返回不同组的文档，分数仍为原始相似度"""
+    query = [1.0, 0.9, 0.8, 0, 0, 0, 0, 0]
+    for store in (FAISSVectorStore(dimension=8, metric='cosine'),
+                  ShardedVectorStore(dimension=8, metric='cosine', num_shards=2)):
+        store.add_documents(clustered_documents())
+
+        plain = store.search('q', embedding=query, top_k=3)
+        diverse = store.search('q', embedding=query, top_k=3, mmr=True, mmr_lambda=0.5)
+
+        assert {doc.id.split('_')[0] for doc, _ in plain} == {'c0'}
+        assert {doc.id.split('_')[0] for doc, _ in diverse} == {'c0', 'c1', 'c2'}
+        scores = {doc.id: score for doc, score in store.search('q', embedding=query, top_k=15)}
+        assert all(abs(score - scores[doc.id]) < 1e-5 for doc, score in diverse)
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""命名空间向量存储测试"""
+
+import pytest
+
+from ai_services.conftest import DIMENSION, make_documents
+from ai_services.main import AIService
+from ai_services.vector_store.faiss_vector_store import FAISSVectorStore
+from ai_services.vector_store.namespaced_vector_store import NamespacedVectorStore
+
+
+def test_namespaces_are_isolated():
+    """不同命名空间可以使用相同的文档ID，检索和清空只作用于本命名空间"""
+    shared = FAISSVectorStore(dimension=DIMENSION)
+    team_a = NamespacedVectorStore(vector_store=shared, namespace='a')
+    team_b = NamespacedVectorStore(vector_store=shared, namespace='b')
+    team_a.add_documents(make_documents(5))
+    team_b.add_documents(make_documents(3, seed=1))
+
+    assert team_a.count() == 5 and team_b.count() == 3
+    assert shared.list_namespaces() == {'a': 5, 'b': 3}
+    results = team_b.search('q', embedding=make_documents(1)[0].embedding, top_k=10)
+    assert sorted(doc.id for doc, _ in results) == ['doc0', 'doc1', 'doc2']
+    assert all('namespace' not in doc.metadata for doc, _ in results)
+
+    team_a.clear()
+    assert team_a.count() == 0
+    assert team_b.get_document('doc0') is not None
+
+
+def test_list_documents_page_filters_by_namespace():
+    """命名空间分页只返回本命名空间的文档，并且可以翻到最后一页"""
+    shared = FAISSVectorStore(dimension=DIMENSION)
+    team_a = NamespacedVectorStore(vector_store=shared, namespace='a')
+    team_b = NamespacedVectorStore(vector_store=shared, namespace='b')
+    for i, doc in enumerate(make_documents(7)):
+        (team_a if i % 2 == 0 else team_b).add_document(doc)
+
+    listed, cursor = [], None
+    while True:
+        documents, cursor = team_a.list_documents_page(cursor, limit=2)
+        listed.extend(doc.id for doc in documents)
+        if cursor is None:
+            break
+
+    assert listed == ['doc0', 'doc2', 'doc4', 'doc6']
+
+
+def test_faiss_list_documents_page_with_unindexable_filter():
+    """筛选值无法索引时逐个检查元数据"""
+    store = FAISSVectorStore(dimension=DIMENSION)
+    documents = make_documents(6)
+    for doc in documents[:3]:
+        doc.metadata['tags'] = ['x']
+    store.add_documents(documents)
+
+    page, cursor = store.list_documents_page(limit=10, filters={'tags': ['x']})
+
+    assert [doc.id for doc in page] == ['doc0', 'doc1', 'doc2']
+    assert cursor is None
+
+
+def test_save_all_and_load_all_persist_namespaces(tmp_path):
+    """AIService.save_all/load_all通过共享存储保存和加载命名空间"""
+    service = AIService()
+    shared = service.get_vector_store('default', dimension=DIMENSION, index_path=str(tmp_path / 'shared'))
+    team = service.get_vector_store('team', provider='faiss_namespace')
+    team.add_documents(make_documents(4))
+    service.save_all()
+
+    team.clear()
+    assert team.count() == 0
+    service.load_all()
+
+    assert team.count() == 4
+    assert shared.count() == 4
+    assert team.get_document('doc3').content == 'content doc3'
+
+
+def test_save_and_load_single_namespace(tmp_path):
+    """提供路径时单独保存和加载一个命名空间"""
+    shared = FAISSVectorStore(dimension=DIMENSION)
+    team_a = NamespacedVectorStore(vector_store=shared, namespace='a')
+    team_b = NamespacedVectorStore(vector_store=shared, namespace='b')
+    team_a.add_documents(make_documents(3))
+    team_b.add_documents(make_documents(2, seed=1))
+    team_a.save(str(tmp_path / 'a'))
+
+    team_a.clear()
+    team_a.load(str(tmp_path / 'a'))
+
+    assert team_a.count() == 3
+    assert team_b.count() == 2
+
+
+def test_loading_another_namespace_file_keeps_documents(tmp_path):
+    """加载其他命名空间保存的文件时报错，不清空当前命名空间"""
+    shared = FAISSVectorStore(dimension=DIMENSION)
+    team_a = NamespacedVectorStore(vector_store=shared, namespace='a')
+    team_b = NamespacedVectorStore(vector_store=shared, namespace='b')
+    team_a.add_documents(make_documents(3))
+    team_b.add_documents(make_documents(2, seed=1))
+    team_b.save(str(tmp_path / 'b'))
+
+    with pytest.raises(ValueError):
+        team_a.load(str(tmp_path / 'b'))
+
+    assert team_a.count() == 3
+    assert team_a.get_document('doc0').content == 'content doc0'
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""SimHash近重复检测测试"""
+
+from ai_services.nlp.near_duplicate import NearDuplicateIndex, SimHasher
+from ai_services.vector_store.base_vector_store import VectorStoreDocument
+from ai_services.vector_store.faiss_vector_store import FAISSVectorStore
+
+TEXT = '公司 发布 年度 报告 营业 收入 同比 增长 百分之 二十 净利润 同比 增长 董事会 建议 派发 现金 红利'
+
+
+def test_simhash_distance_of_near_duplicates():
+    """相同文本的指纹相同，轻微改动的文本汉明距离远小于无关文本"""
+    hasher = SimHasher()
+    original = hasher.fingerprint(TEXT)
+
+    assert hasher.fingerprint(TEXT) == original
+    near = SimHasher.distance(original, hasher.fingerprint(TEXT + ' 公告'))
+    unrelated = SimHasher.distance(original, hasher.fingerprint('央行 宣布 下调 存款 准备金率 释放 长期 流动性'))
+    assert near < unrelated
+
+
+def test_index_find_respects_exclude_and_remove():
+    """LSH索引查找近重复指纹，排除集合和删除的键不会被返回"""
+    index = NearDuplicateIndex(max_distance=3)
+    index.add('a', 0b1011)
+    index.add('b', (1 << 64) - 1)
+
+    assert index.find(0b1010) == ('a', 1)
+    assert index.find(0b1010, exclude={'a'}) is None
+    index.remove('a')
+    assert index.find(0b1011) is None
+    assert len(index) == 1
+
+
+def test_store_skips_near_duplicates():
+    """skip模式丢弃近重复文档，返回已有文档的ID"""
+    store = FAISSVectorStore(dimension=2, dedup='skip')
+    assert store.add_documents([VectorStoreDocument('a', TEXT, embedding=[1.0, 0.0])]) == ['a']
+
+    assert store.add_documents([VectorStoreDocument('b', TEXT, embedding=[0.0, 1.0])]) == ['a']
+    assert store.count() == 1
+
+
+def test_store_merges_duplicate_ids_within_batch():
+    """merge模式把同批中的近重复文档ID合并到元数据中"""
+    store = FAISSVectorStore(dimension=2, dedup='merge')
+
+    ids = store.add_documents([
+        VectorStoreDocument('a', TEXT, embedding=[1.0, 0.0]),
+        VectorStoreDocument('b', TEXT, embedding=[1.0, 0.0]),
+    ])
+
+    assert ids == ['a', 'a']
+    assert store.get_document('a').metadata['duplicate_ids'] == ['b']
+
+
+def test_replacing_document_is_not_its_own_duplicate():
+    """替换已有文档时旧版本不参与检测"""
+    store = FAISSVectorStore(dimension=2, dedup='skip')
+    store.add_documents([VectorStoreDocument('a', TEXT, embedding=[1.0, 0.0])])
+
+    assert store.add_documents([VectorStoreDocument('a', TEXT + ' 更新', embedding=[0.0, 1.0])]) == ['a']
+    assert store.get_document('a').content.endswith('更新')
+
+
+def test_fingerprints_are_computed_outside_the_write_lock(monkeypatch):
+    """计算指纹（分词）时不持有写锁"""
+    store = FAISSVectorStore(dimension=2, dedup='skip')
+    fingerprint = store._simhasher.fingerprint
+    held = []
+
+    def tracking_fingerprint(text):
+        held.append(store._lock._writer is not None)
+        return fingerprint(text)
+
+    monkeypatch.setattr(store._simhasher, 'fingerprint', tracking_fingerprint)
+    store.add_documents([VectorStoreDocument(f"d{i}", f"{TEXT} {i}", embedding=[1.0, 0.0]) for i in range(3)])
+
+    assert held and not any(held)
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""查询向量缓存测试"""
+
+import asyncio
+
+import numpy as np
+
+from ai_services.vector_store.query_embedding_cache import QueryEmbeddingCache
+
+
+class Embedder:
+    """记录生成请求的测试嵌入函数"""
+
+    def __init__(self):
+        self.requests = []
+
+    def __call__(self, texts):
+        self.requests.append(list(texts))
+        return [[float(len(text)), 1.0] for text in texts]
+
+
+def test_normalized_queries_share_cache_entry():
+    """规范化后相同的查询只生成一次，同一批中的重复查询也只生成一次"""
+    embedder = Embedder()
+    cache = QueryEmbeddingCache(model_name='m')
+
+    first = cache.embed(['Hello  World', 'hello world ', 'other'], embedder)
+    second = cache.embed(['ＨＥＬＬＯ world'], embedder)
+
+    assert embedder.requests == [['Hello  World', 'other']]
+    assert first[0].dtype == np.float32
+    np.testing.assert_array_equal(first[0], first[1])
+    np.testing.assert_array_equal(second[0], first[0])
+    assert cache.stats()['hits'] == 2
+    assert cache.stats()['misses'] == 2
+
+
+def test_file_cache_survives_restart_and_model_change_misses(tmp_path):
+    """文件缓存在新的缓存对象中仍可命中，更换模型名称后不命中"""
+    embedder = Embedder()
+    QueryEmbeddingCache(cache_dir=str(tmp_path), model_name='m').embed(['query'], embedder)
+
+    QueryEmbeddingCache(cache_dir=str(tmp_path), model_name='m').embed(['query'], embedder)
+    assert len(embedder.requests) == 1
+
+    QueryEmbeddingCache(cache_dir=str(tmp_path), model_name='other').embed(['query'], embedder)
+    assert len(embedder.requests) == 2
+
+
+def test_async_embed_uses_cache():
+    """异步接口同样使用缓存"""
+    embedder = Embedder()
+    cache = QueryEmbeddingCache(model_name='m')
+
+    async def aembed(texts):
+        return embedder(texts)
+
+    async def run():
+        await cache.aembed(['a', 'b'], aembed)
+        return await cache.aembed(['A', 'c'], aembed)
+
+    result = asyncio.run(run())
+
+    assert embedder.requests == [['a', 'b'], ['c']]
+    np.testing.assert_array_equal(result[0], [1.0, 1.0])
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""读写锁和FAISS向量存储并发读写测试"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from ai_services.utils.rw_lock import ReadWriteLock
+from ai_services.vector_store.base_vector_store import VectorStoreDocument
+from ai_services.vector_store.faiss_vector_store import FAISSVectorStore
+
+
+def test_readers_share_lock():
+    """多个读者可以同时持有读锁"""
+    lock = ReadWriteLock()
+    barrier = threading.Barrier(3, timeout=5)
+
+    def read():
+        with lock.read_locked():
+            barrier.wait()
+
+    threads = [threading.Thread(target=read) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+
+    assert not barrier.broken
+
+
+def test_waiting_writer_blocks_new_readers():
+    """有写者等待时新的读者排队，写者先于新读者获得锁"""
+    lock = ReadWriteLock()
+    order = []
+    lock.acquire_read()
+
+    def write():
+        with lock.write_locked():
+            order.append('writer')
+
+    def read():
+        with lock.read_locked():
+            order.append('reader')
+
+    writer = threading.Thread(target=write)
+    writer.start()
+    while not lock._writers_waiting:
+        time.sleep(0.001)
+    reader = threading.Thread(target=read)
+    reader.start()
+    time.sleep(0.05)
+    assert order == []
+
+    # 持有读锁的线程重入时不排队，避免与等待中的写者死锁
+    with lock.read_locked():
+        pass
+    lock.release_read()
+    writer.join(5)
+    reader.join(5)
+
+    assert order == ['writer', 'reader']
+
+
+def test_reentrancy_and_misuse():
+    """写锁可重入且可在写锁内获取读锁；读锁不能升级，未持有时不能释放"""
+    lock = ReadWriteLock()
+    with lock.write_locked():
+        with lock.write_locked():
+            with lock.read_locked():
+                pass
+    assert lock._writer is None
+
+    with lock.read_locked():
+        with pytest.raises(RuntimeError):
+            lock.acquire_write()
+    with pytest.raises(RuntimeError):
+        lock.release_read()
+    with pytest.raises(RuntimeError):
+        lock.release_write()
+
+
+def test_concurrent_searches_and_writes():
+    """并发检索和写入不报错，检索总能找到写入前已存在的文档"""
+    dimension = 8
+    rng = np.random.default_rng(0)
+    base = [VectorStoreDocument(f"base{i}", 'base', {}, rng.standard_normal(dimension).tolist()) for i in range(200)]
+    store = FAISSVectorStore(dimension=dimension)
+    store.add_documents(base)
+
+    def write(batch):
+        vectors = np.random.default_rng(batch + 1).standard_normal((20, dimension))
+        documents = [VectorStoreDocument(f"w{batch}_{i}", 'new', {}, vectors[i].tolist()) for i in range(20)]
+        store.add_documents(documents)
+        store.delete_document(f"w{batch}_0")
+
+    def search(i):
+        doc = base[i % len(base)]
+        return store.search('q', embedding=doc.embedding, top_k=1)[0][0].id == doc.id
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        writes = [executor.submit(write, batch) for batch in range(10)]
+        searches = [executor.submit(search, i) for i in range(300)]
+        assert all(future.result() for future in searches)
+        for future in writes:
+            future.result()
+
+    assert store.count() == 200 + 10 * 19
+    assert store.index.ntotal == store.count()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""分片向量存储测试"""
+
+import numpy as np
+import pytest
+
+from ai_services.conftest import DIMENSION, CountingEmbeddingModel, make_documents
+from ai_services.vector_store.base_vector_store import VectorStoreDocument
+from ai_services.vector_store.faiss_vector_store import FAISSVectorStore
+from ai_services.vector_store.sharded_vector_store import ShardedVectorStore
+
+
+def test_search_matches_single_store():
+    """合并各分片的结果与单个存储的检索结果一致"""
+    documents = make_documents(200)
+    sharded = ShardedVectorStore(dimension=DIMENSION, num_shards=3)
+    single = FAISSVectorStore(dimension=DIMENSION)
+    sharded.add_documents(documents)
+    single.add_documents(documents)
+    query = np.random.default_rng(1).standard_normal(DIMENSION).tolist()
+
+    expected = single.search('q', embedding=query, top_k=10, filters={'group': 1})
+    results = sharded.search('q', embedding=query, top_k=10, filters={'group': 1})
+
+    assert sharded.count() == 200
+    assert {shard.count() > 0 for shard in sharded.shards} == {True}
+    assert [doc.id for doc, _ in results] == [doc.id for doc, _ in expected]
+    assert [score for _, score in results] == pytest.approx([score for _, score in expected])
+
+
+def test_embeddings_generated_once_at_sharded_layer():
+    """文档和查询向量只在分片存储中生成，分片不持有嵌入模型和查询缓存"""
+    model = CountingEmbeddingModel()
+    store = ShardedVectorStore(dimension=DIMENSION, num_shards=2, embedding_model=model)
+    documents = [VectorStoreDocument(f"d{i}", f"text {i}") for i in range(6)]
+
+    assert store.add_documents(documents) == [doc.id for doc in documents]
+    assert model.count == 6
+    assert all(doc.embedding is not None for doc in documents)
+    for shard in store.shards:
+        assert shard.embedding_model is None
+        assert shard._query_cache is None
+
+    store.search('text 3', top_k=1)
+    store.search('text 3', top_k=1)
+    assert model.count == 7
+    assert store.query_cache_stats()['hits'] == 1
+
+
+def test_add_documents_returns_ids_in_input_order():
+    """返回的文档ID与传入顺序一致"""
+    store = ShardedVectorStore(dimension=DIMENSION, num_shards=4)
+    documents = make_documents(20)
+
+    assert store.add_documents(documents) == [doc.id for doc in documents]
+    assert store.add_document(make_documents(1, seed=2, prefix='single')[0]) == 'single0'
+    assert store.count() == 21
+
+
+def test_dedup_is_rejected():
+    """近重复检测只能在分片内进行，分片存储拒绝该配置"""
+    with pytest.raises(ValueError):
+        ShardedVectorStore(dimension=DIMENSION, num_shards=2, dedup='skip')
+
+
+def test_save_and_load(tmp_path):
+    """保存后加载得到相同的文档，分片数量不同时拒绝加载"""
+    path = str(tmp_path / 'sharded')
+    store = ShardedVectorStore(dimension=DIMENSION, num_shards=3)
+    store.add_documents(make_documents(30))
+    store.save(path)
+
+    loaded = ShardedVectorStore(dimension=DIMENSION, num_shards=3)
+    loaded.load(path)
+    assert loaded.count() == 30
+    assert loaded.get_document('doc7').content == 'content doc7'
+
+    with pytest.raises(ValueError):
+        ShardedVectorStore(dimension=DIMENSION, num_shards=2).load(path)
+
+
+def test_paging_walks_all_shards():
+    """分页依次遍历各分片，每个文档只返回一次"""
+    store = ShardedVectorStore(dimension=DIMENSION, num_shards=3)
+    store.add_documents(make_documents(25))
+
+    ids = []
+    cursor = None
+    while True:
+        page, cursor = store.list_documents_page(cursor, limit=7)
+        assert len(page) <= 7
+        ids.extend(doc.id for doc in page)
+        if cursor is None:
+            break
+
+    assert sorted(ids) == sorted(f"doc{i}" for i in range(25))
+    assert len(list(store.iter_documents(batch_size=4))) == 25
+
+
+def test_range_search_merges_shards():
+    """范围检索合并各分片的结果，与单个存储一致"""
+    documents = make_documents(150)
+    sharded = ShardedVectorStore(dimension=DIMENSION, num_shards=3)
+    single = FAISSVectorStore(dimension=DIMENSION)
+    sharded.add_documents(documents)
+    single.add_documents(documents)
+
+    results = sharded.search_range('q', 8.0, embedding=documents[0].embedding)
+
+    assert [doc.id for doc, _ in results] == [doc.id for doc, _ in single.search_range('q', 8.0, embedding=documents[0].embedding)]
+    assert len(sharded.search_range('q', 8.0, embedding=documents[0].embedding, max_results=2)) == 2
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""按日期分区的向量存储测试"""
+
+import time
+from datetime import date
+
+import numpy as np
+
+from ai_services.vector_store.base_vector_store import VectorStoreDocument
+from ai_services.vector_store.time_partitioned_vector_store import TimePartitionedVectorStore
+
+DIMENSION = 4
+
+
+def make_document(document_id, day, seed=0):
+    """生成指定日期的测试文档"""
+    embedding = np.random.default_rng(seed).standard_normal(DIMENSION).tolist()
+    return VectorStoreDocument(document_id, f"content {document_id}", {'date': day}, embedding)
+
+
+def test_documents_are_routed_by_granularity():
+    """按周分区时同一ISO周的文档写入同一个分区"""
+    store = TimePartitionedVectorStore(dimension=DIMENSION, partition_granularity='week')
+    store.add_documents([
+        make_document('a', '2024-03-11'),
+        make_document('b', '2024-03-17', seed=1),
+        make_document('c', '2024-03-18', seed=2),
+    ])
+
+    assert store.list_partitions() == ['2024-W11', '2024-W12']
+    assert store.count() == 3
+
+
+def test_search_limits_to_date_range():
+    """只返回日期范围内的文档，部分重叠的分区在分区内按日期筛选"""
+    store = TimePartitionedVectorStore(dimension=DIMENSION, partition_granularity='month')
+    store.add_documents([make_document(f"d{day}", f"2024-03-{day:02d}", seed=day) for day in range(1, 31)])
+
+    results = store.search('q', embedding=[0.0] * DIMENSION, top_k=50, start_date='2024-03-10', end_date='2024-03-12')
+
+    assert sorted(doc.id for doc, _ in results) == ['d10', 'd11', 'd12']
+
+
+def test_date_objects_are_not_mutated_and_stored_as_strings():
+    """date类型的日期值以ISO字符串保存，调用方传入的元数据保持不变"""
+    store = TimePartitionedVectorStore(dimension=DIMENSION)
+    document = make_document('a', date(2024, 5, 1))
+
+    store.add_documents([document])
+
+    assert document.metadata['date'] == date(2024, 5, 1)
+    assert store.get_document('a').metadata['date'] == '2024-05-01'
+
+
+def test_moving_document_to_another_partition():
+    """日期变化的文档从原分区删除并写入新分区，文档所在分区的映射随之更新"""
+    store = TimePartitionedVectorStore(dimension=DIMENSION)
+    store.add_documents([make_document('a', '2024-01-01')])
+
+    store.add_documents([make_document('a', '2024-01-02', seed=1)])
+
+    assert store.count() == 1
+    assert store.get_document('a').metadata['date'] == '2024-01-02'
+    assert store._find_partition('a')[0] == '2024-01-02'
+    assert store.delete_document('a')
+    assert store.get_document('a') is None
+    assert not store.delete_document('a')
+
+
+def test_drop_partitions_before(tmp_path):
+    """整体删除过期分区，保存后加载得到剩余分区的文档"""
+    path = str(tmp_path / 'store')
+    store = TimePartitionedVectorStore(dimension=DIMENSION, index_path=path)
+    store.add_documents([make_document(f"d{day}", f"2024-02-{day:02d}", seed=day) for day in range(1, 6)])
+    store.save()
+
+    assert store.drop_partitions_before('2024-02-03') == ['2024-02-01', '2024-02-02']
+    assert store.get_document('d1') is None
+
+    loaded = TimePartitionedVectorStore(dimension=DIMENSION)
+    loaded.load(path)
+    assert loaded.list_partitions() == ['2024-02-03', '2024-02-04', '2024-02-05']
+    assert loaded.get_document('d4').content == 'content d4'
+
+
+def test_embeddings_generated_once_at_partitioned_layer():
+    """文档向量在分区存储中统一生成，分区不持有嵌入模型"""
+    class Model:
+        calls = 0
+
+        def generate_embeddings(self, texts):
+            Model.calls += 1
+            return [[float(len(text))] * DIMENSION for text in texts]
+
+    store = TimePartitionedVectorStore(dimension=DIMENSION, embedding_model=Model())
+    documents = [VectorStoreDocument(f"d{day}", f"text {day}", {'date': date(2024, 3, day)}) for day in range(1, 5)]
+
+    store.add_documents(documents)
+
+    assert Model.calls == 1
+    assert all(doc.embedding == [6.0] * DIMENSION for doc in documents)
+    assert all(partition.embedding_model is None for partition in store.partitions.values())
+
+
+def test_dropped_partition_mappings_are_cleaned_up_lazily():
+    """删除分区后立即查不到其中的文档，同名分区重新创建后只能查到新写入的文档，映射在后台清理"""
+    store = TimePartitionedVectorStore(dimension=DIMENSION)
+    store.add_documents([make_document(f"d{i}", '2024-04-01', seed=i) for i in range(5)])
+    store.add_documents([make_document('other', '2024-04-02')])
+
+    assert store.drop_partition('2024-04-01')
+    store.add_documents([make_document('d0', '2024-04-01')])
+
+    assert store.get_document('d0') is not None
+    assert store.get_document('d1') is None
+    assert not store.delete_document('d2')
+    assert store.count() == 2
+
+    deadline = time.monotonic() + 5
+    while set(store._document_partitions) != {'d0', 'other'} and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert store._document_partitions == {'d0': '2024-04-01', 'other': '2024-04-02'}
+
+
+def test_clear_resets_document_mappings():
+    """删除所有分区时直接清空文档映射"""
+    store = TimePartitionedVectorStore(dimension=DIMENSION)
+    store.add_documents([make_document(f"d{i}", f"2024-04-0{i + 1}", seed=i) for i in range(3)])
+
+    store.clear()
+
+    assert store._document_partitions == {}
+    assert store.get_document('d0') is None
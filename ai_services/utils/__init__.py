@@ -20,6 +20,7 @@ default_cache_manager = None
 
 from .cache_manager import (
     MemoryCache,
+    LRUCache,
     FileCache,
     CacheManager,
     global_cache_manager,
@@ -127,11 +128,14 @@ from .time_utils import (
     format_duration
 )
 
+# 导出并发工具
+from .rw_lock import ReadWriteLock
+
 # 包版本信息
 __version__ = '0.1.0'
 
 # 包描述
-__description__ = 'AI服务工具包，提供配置加载、缓存管理、错误处理、日志记录和时间工具等功能'
+__description__ = 'AI服务工具包，提供配置加载、缓存管理、错误处理、日志记录、时间工具和读写锁等功能'
 
 # 导出所有公共API
 __all__ = [
@@ -145,6 +149,7 @@ __all__ = [
     
     # 缓存管理工具
     'MemoryCache',
+    'LRUCache',
     'FileCache',
     'CacheManager',
     'global_cache_manager',
@@ -228,6 +233,9 @@ __all__ = [
     'get_age',
     'format_duration',
     
+    # 并发工具
+    'ReadWriteLock',
+    
     # 包信息
     '__version__',
     '__description__'
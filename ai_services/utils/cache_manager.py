@@ -7,6 +7,7 @@ import os
 import json
 import time
 import pickle
+from collections import OrderedDict
 from typing import Dict, Any, Optional, Union, Callable, TypeVar
 from threading import RLock
 
@@ -129,6 +130,114 @@ class MemoryCache:
             return len(expired_keys)
 
 
+class LRUCache:
+    """容量有限的LRU内存缓存类，支持可选的过期时间和命中率统计"""
+    
+    def __init__(self, max_size: int = 10000, default_ttl: Optional[int] = None):
+        """初始化LRU缓存
+        
+        Args:
+            max_size: 最大缓存项数量，超出时淘汰最久未使用的项
+            default_ttl: 默认缓存过期时间（秒），None表示永不过期
+        """
+        self._cache: OrderedDict = OrderedDict()
+        self._max_size = max_size
+        self._default_ttl = default_ttl
+        self._lock = RLock()
+        self.hits = 0
+        self.misses = 0
+    
+    def set(
+        self, 
+        key: str, 
+        value: Any, 
+        ttl: Optional[int] = None
+    ) -> None:
+        """设置缓存
+        
+        Args:
+            key: 缓存键
+            value: 缓存值
+            ttl: 缓存过期时间（秒），None表示使用默认值
+        """
+        ttl = ttl if ttl is not None else self._default_ttl
+        expire_at = time.time() + ttl if ttl is not None else None
+        
+        with self._lock:
+            self._cache[key] = (value, expire_at)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self._max_size:
+                self._cache.popitem(last=False)
+    
+    def get(
+        self, 
+        key: str, 
+        default: Any = None
+    ) -> Any:
+        """获取缓存（命中时将缓存项标记为最近使用）
+        
+        Args:
+            key: 缓存键
+            default: 默认值
+            
+        Returns:
+            Any: 缓存值或默认值
+        """
+        with self._lock:
+            item = self._cache.get(key)
+            if item is not None and item[1] is not None and time.time() > item[1]:
+                # 惰性删除过期项
+                del self._cache[key]
+                item = None
+            
+            if item is None:
+                self.misses += 1
+                return default
+            
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return item[0]
+    
+    def delete(self, key: str) -> None:
+        """删除缓存项
+        
+        Args:
+            key: 缓存键
+        """
+        with self._lock:
+            self._cache.pop(key, None)
+    
+    def clear(self) -> None:
+        """清空缓存（保留命中率统计）"""
+        with self._lock:
+            self._cache.clear()
+    
+    def size(self) -> int:
+        """获取缓存项数量（包含过期项）
+        
+        Returns:
+            int: 缓存项数量
+        """
+        with self._lock:
+            return len(self._cache)
+    
+    def stats(self) -> Dict[str, Any]:
+        """获取缓存统计信息
+        
+        Returns:
+            Dict[str, Any]: 命中次数、未命中次数、命中率、当前大小和容量
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0,
+                'size': len(self._cache),
+                'max_size': self._max_size
+            }
+
+
 class FileCache:
     """文件缓存类"""
     
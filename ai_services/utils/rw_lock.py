@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""读写锁工具"""
+
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+
+class ReadWriteLock:
+    """可重入的读写锁（写者优先）
+
+    多个线程可以同时持有读锁，写锁独占。有写者等待时新的读者排队，避免持续的读请求让写者饥饿；
+    已持有读锁或写锁的线程再次获取读锁时不排队，持有写锁的线程可以重复获取写锁。
+    持有读锁的线程不能升级为写锁。
+    """
+
+    def __init__(self):
+        """初始化读写锁"""
+        self._cond = threading.Condition(threading.Lock())
+
+        # 持有读锁的线程 -> 重入次数
+        self._readers: Dict[int, int] = {}
+
+        # 持有写锁的线程及其重入次数
+        self._writer: Optional[int] = None
+        self._write_depth = 0
+
+        # 正在等待写锁的线程数
+        self._writers_waiting = 0
+
+    def acquire_read(self) -> None:
+        """获取读锁"""
+        me = threading.get_ident()
+        with self._cond:
+            if self._writer != me and me not in self._readers:
+                while self._writer is not None or self._writers_waiting:
+                    self._cond.wait()
+            self._readers[me] = self._readers.get(me, 0) + 1
+
+    def release_read(self) -> None:
+        """释放读锁"""
+        me = threading.get_ident()
+        with self._cond:
+            depth = self._readers.get(me, 0)
+            if depth == 0:
+                raise RuntimeError("Cannot release a read lock that is not held")
+
+            if depth > 1:
+                self._readers[me] = depth - 1
+            else:
+                del self._readers[me]
+                if not self._readers:
+                    self._cond.notify_all()
+
+    def acquire_write(self) -> None:
+        """获取写锁"""
+        me = threading.get_ident()
+        with self._cond:
+            if self._writer == me:
+                self._write_depth += 1
+                return
+            if me in self._readers:
+                raise RuntimeError("Cannot upgrade a read lock to a write lock")
+
+            self._writers_waiting += 1
+            try:
+                while self._writer is not None or self._readers:
+                    self._cond.wait()
+            finally:
+                self._writers_waiting -= 1
+
+            self._writer = me
+            self._write_depth = 1
+
+    def release_write(self) -> None:
+        """释放写锁"""
+        with self._cond:
+            if self._writer != threading.get_ident():
+                raise RuntimeError("Cannot release a write lock that is not held")
+
+            self._write_depth -= 1
+            if self._write_depth == 0:
+                self._writer = None
+                self._cond.notify_all()
+
+    @contextmanager
+    def read_locked(self) -> Iterator[None]:
+        """在with语句中持有读锁"""
+        self.acquire_read()
+        try:
+            yield
+        finally:
+            self.release_read()
+
+    @contextmanager
+    def write_locked(self) -> Iterator[None]:
+        """在with语句中持有写锁"""
+        self.acquire_write()
+        try:
+            yield
+        finally:
+            self.release_write()
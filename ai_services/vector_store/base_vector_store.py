@@ -3,8 +3,20 @@
 
 """向量存储客户端基础接口"""
 
+import asyncio
+import functools
+import heapq
+import os
+import threading
 from abc import ABC, abstractmethod
-from typing import Dict, List, Optional, Tuple, Union
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+
+from ai_services.vector_store.embedding_batcher import EmbeddingBatcher
+from ai_services.vector_store.query_embedding_cache import QueryEmbeddingCache
 
 
 class VectorStoreDocument:
@@ -17,9 +29,113 @@ class VectorStoreDocument:
         self.embedding = embedding
 
 
+def merge_search_results(
+    result_lists: List[List[Tuple[VectorStoreDocument, float]]],
+    top_k: int,
+    higher_is_better: bool = False
+) -> List[Tuple[VectorStoreDocument, float]]:
+    """合并多个已排序的检索结果列表，取全局前top_k个
+    
+    Args:
+        result_lists: 各自按分数排序的检索结果列表
+        top_k: 返回的最大结果数
+        higher_is_better: 分数是否越大越相似（默认分数为距离，越小越相似）
+        
+    Returns:
+        List[Tuple[VectorStoreDocument, float]]: 合并后的文档和相似度分数列表
+    """
+    merged = heapq.merge(*result_lists, key=lambda item: item[1], reverse=higher_is_better)
+    return list(islice(merged, top_k))
+
+
+def collapse_search_results(
+    results: List[Tuple[VectorStoreDocument, float]],
+    top_k: int
+) -> List[Tuple[VectorStoreDocument, float]]:
+    """按父文档折叠检索结果，每个父文档只保留排名最靠前的分块
+    
+    分块通过元数据中的parent_id关联父文档，没有parent_id的文档自成一组。
+    
+    Args:
+        results: 按分数排序的检索结果列表
+        top_k: 返回的最大结果数
+        
+    Returns:
+        List[Tuple[VectorStoreDocument, float]]: 折叠后的文档和相似度分数列表
+    """
+    collapsed = []
+    seen = set()
+    for document, score in results:
+        parent_id = document.metadata.get('parent_id', document.id)
+        if parent_id in seen:
+            continue
+        
+        seen.add(parent_id)
+        collapsed.append((document, score))
+        if len(collapsed) >= top_k:
+            break
+    return collapsed
+
+
+def mmr_select(
+    query_vector: np.ndarray,
+    candidate_vectors: np.ndarray,
+    top_k: int,
+    lambda_mult: float = 0.5
+) -> List[int]:
+    """最大边际相关性（MMR）选择
+    
+    每一步选择 ``lambda_mult * 与查询的相似度 - (1 - lambda_mult) * 与已选结果的最大相似度`` 最大的候选，
+    相似度为余弦相似度。候选之间的相似度矩阵一次计算，每步只做向量运算。
+    
+    Args:
+        query_vector: 查询向量
+        candidate_vectors: 候选向量矩阵
+        top_k: 选择的结果数
+        lambda_mult: 相关性权重（1只看相关性，0只看多样性）
+        
+    Returns:
+        List[int]: 按选择顺序排列的候选行号
+    """
+    if len(candidate_vectors) == 0:
+        return []
+    
+    vectors = np.asarray(candidate_vectors, dtype=np.float32)
+    vectors = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+    query = np.asarray(query_vector, dtype=np.float32).ravel()
+    query = query / max(float(np.linalg.norm(query)), 1e-12)
+    
+    relevance = vectors @ query
+    similarity = vectors @ vectors.T
+    
+    selected = []
+    # 与已选结果的最大相似度（可能为负数），尚未选择时不扣减
+    max_similarity = None
+    available = np.ones(len(vectors), dtype=bool)
+    for _ in range(min(top_k, len(vectors))):
+        scores = lambda_mult * relevance
+        if max_similarity is not None:
+            scores = scores - (1 - lambda_mult) * max_similarity
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        available[best] = False
+        if max_similarity is None:
+            max_similarity = similarity[best].copy()
+        else:
+            np.maximum(max_similarity, similarity[best], out=max_similarity)
+    return selected
+
+
 class BaseVectorStore(ABC):
     """向量存储的抽象基类，定义统一接口"""
 
+    # 嵌入模型和查询向量缓存的配置项，组合存储（分片、分区）只在外层使用，不传给内部存储
+    EMBEDDING_CONFIG_KEYS = (
+        'embedding_model', 'embedding_batch_size', 'embedding_batch_tokens', 'embedding_workers',
+        'query_cache_size', 'query_cache_ttl', 'query_cache_dir'
+    )
+
     def __init__(self, **kwargs):
         """初始化向量存储
         
@@ -27,6 +143,18 @@ class BaseVectorStore(ABC):
             **kwargs: 向量存储配置参数
         """
         self.config = kwargs
+        
+        # 嵌入模型的批处理器和查询向量缓存（需要嵌入模型的实现调用_init_embedding创建）
+        self._embedding_batcher: Optional[EmbeddingBatcher] = None
+        self._query_cache: Optional[QueryEmbeddingCache] = None
+        
+        # 当前绑定的保存路径（首次保存或加载后绑定）
+        self._persist_path: Optional[str] = None
+        
+        # 异步接口使用的线程池（首次调用时创建）
+        self._async_executor: Optional[ThreadPoolExecutor] = None
+        self._async_executor_lock = threading.Lock()
+        
         self._initialize()
 
     @abstractmethod
@@ -64,6 +192,26 @@ class BaseVectorStore(ABC):
         """
         pass
 
+    def upsert_documents(
+        self,
+        documents: List[VectorStoreDocument]
+    ) -> List[str]:
+        """批量写入文档：新文档添加，已存在的文档替换旧版本
+        
+        内容和元数据都没有变化的文档直接跳过，不重新生成嵌入向量，
+        重复导入一批只有少量修改的文档时只需处理变化的部分。同时提供了嵌入向量的文档总是重新写入。
+        
+        Args:
+            documents: 要写入的文档列表
+            
+        Returns:
+            List[str]: 文档ID列表
+        """
+        changed = self._changed_documents(documents)
+        if changed:
+            self.add_documents(changed)
+        return [doc.id for doc in documents]
+
     @abstractmethod
     def search(
         self,
@@ -85,6 +233,382 @@ class BaseVectorStore(ABC):
         """
         pass
 
+    def search_batch(
+        self,
+        queries: List[str],
+        embeddings: Optional[List[Optional[List[float]]]] = None,
+        top_k: int = 5,
+        filters: Optional[Dict] = None
+    ) -> List[List[Tuple[VectorStoreDocument, float]]]:
+        """批量搜索相似文档
+        
+        Args:
+            queries: 搜索查询列表
+            embeddings: 与查询一一对应的查询向量列表（可选，如不提供则自动生成）
+            top_k: 每个查询返回的最大结果数
+            filters: 筛选条件（可选，对所有查询生效）
+            
+        Returns:
+            List[List[Tuple[VectorStoreDocument, float]]]: 每个查询的文档和相似度分数列表
+        """
+        # 默认逐个查询，具体实现中应当重写为一次批量检索
+        if embeddings is None:
+            embeddings = [None] * len(queries)
+        elif len(embeddings) != len(queries):
+            raise ValueError("The number of embeddings must match the number of queries")
+        
+        return [
+            self.search(query, embedding=embedding, top_k=top_k, filters=filters)
+            for query, embedding in zip(queries, embeddings)
+        ]
+
+    def search_range(
+        self,
+        query: str,
+        radius: float,
+        embedding: Optional[List[float]] = None,
+        max_results: Optional[int] = None,
+        filters: Optional[Dict] = None
+    ) -> List[Tuple[VectorStoreDocument, float]]:
+        """搜索分数在半径范围内的所有文档（不限定top_k）
+        
+        Args:
+            query: 搜索查询
+            radius: 距离上限（分数为距离时）或相似度下限（分数为相似度时）
+            embedding: 查询向量（可选，如不提供则自动生成）
+            max_results: 返回的最大结果数（可选，默认不限制）
+            filters: 筛选条件（可选）
+            
+        Returns:
+            List[Tuple[VectorStoreDocument, float]]: 按相似度排序的文档和分数列表
+        """
+        raise NotImplementedError("search_range() is not implemented")
+
+    async def aadd_documents(
+        self,
+        documents: List[VectorStoreDocument]
+    ) -> List[str]:
+        """异步批量添加文档
+        
+        先在事件循环中等待嵌入向量生成，再在线程池中写入索引，不阻塞事件循环。
+        
+        Args:
+            documents: 要添加的文档列表
+            
+        Returns:
+            List[str]: 文档ID列表
+        """
+        documents = await self._aembed_documents(documents)
+        return await self._run_async(self.add_documents, documents)
+
+    async def aupsert_documents(
+        self,
+        documents: List[VectorStoreDocument]
+    ) -> List[str]:
+        """异步批量写入文档（新增或替换），只为内容或元数据变化的文档生成嵌入向量
+        
+        Args:
+            documents: 要写入的文档列表
+            
+        Returns:
+            List[str]: 文档ID列表
+        """
+        changed = await self._run_async(self._changed_documents, documents)
+        if changed:
+            await self.aadd_documents(changed)
+        return [doc.id for doc in documents]
+
+    async def asearch(
+        self,
+        query: str,
+        embedding: Optional[List[float]] = None,
+        top_k: int = 5,
+        filters: Optional[Dict] = None,
+        **kwargs
+    ) -> List[Tuple[VectorStoreDocument, float]]:
+        """异步搜索相似文档
+        
+        Args:
+            query: 搜索查询
+            embedding: 查询向量（可选，如不提供则自动生成）
+            top_k: 返回的最大结果数
+            filters: 筛选条件（可选）
+            **kwargs: 具体实现支持的其他检索参数
+            
+        Returns:
+            List[Tuple[VectorStoreDocument, float]]: 文档和相似度分数的列表
+        """
+        results = await self.asearch_batch([query], embeddings=[embedding], top_k=top_k, filters=filters, **kwargs)
+        return results[0]
+
+    async def asearch_batch(
+        self,
+        queries: List[str],
+        embeddings: Optional[List[Optional[List[float]]]] = None,
+        top_k: int = 5,
+        filters: Optional[Dict] = None,
+        **kwargs
+    ) -> List[List[Tuple[VectorStoreDocument, float]]]:
+        """异步批量搜索相似文档
+        
+        先在事件循环中等待查询向量生成，再在线程池中执行检索（FAISS检索期间释放GIL，
+        多个并发查询可以同时利用多个CPU核心）。
+        
+        Args:
+            queries: 搜索查询列表
+            embeddings: 与查询一一对应的查询向量列表（可选，如不提供则自动生成）
+            top_k: 每个查询返回的最大结果数
+            filters: 筛选条件（可选，对所有查询生效）
+            **kwargs: 具体实现支持的其他检索参数
+            
+        Returns:
+            List[List[Tuple[VectorStoreDocument, float]]]: 每个查询的文档和相似度分数列表
+        """
+        if not queries:
+            return []
+        
+        embeddings = await self._aembed_queries(queries, embeddings)
+        return await self._run_async(self.search_batch, queries, embeddings, top_k, filters, **kwargs)
+
+    async def asearch_range(
+        self,
+        query: str,
+        radius: float,
+        embedding: Optional[List[float]] = None,
+        max_results: Optional[int] = None,
+        filters: Optional[Dict] = None,
+        **kwargs
+    ) -> List[Tuple[VectorStoreDocument, float]]:
+        """异步搜索分数在半径范围内的所有文档
+        
+        Args:
+            query: 搜索查询
+            radius: 距离上限（分数为距离时）或相似度下限（分数为相似度时）
+            embedding: 查询向量（可选，如不提供则自动生成）
+            max_results: 返回的最大结果数（可选，默认不限制）
+            filters: 筛选条件（可选）
+            **kwargs: 具体实现支持的其他检索参数
+            
+        Returns:
+            List[Tuple[VectorStoreDocument, float]]: 按相似度排序的文档和分数列表
+        """
+        embedding = (await self._aembed_queries([query], [embedding]))[0]
+        return await self._run_async(self.search_range, query, radius, embedding, max_results, filters, **kwargs)
+
+    def _changed_documents(self, documents: List[VectorStoreDocument]) -> List[VectorStoreDocument]:
+        """筛选需要写入的文档（同一ID多次出现时以最后一个为准）
+        
+        Args:
+            documents: 文档列表
+            
+        Returns:
+            List[VectorStoreDocument]: 新增、内容或元数据变化、或提供了嵌入向量的文档
+        """
+        changed = []
+        for doc in {doc.id: doc for doc in documents}.values():
+            if doc.embedding is None:
+                existing = self.get_document(doc.id)
+                if existing is not None and existing.content == doc.content and existing.metadata == (doc.metadata or {}):
+                    continue
+            changed.append(doc)
+        return changed
+
+    def _document_vectors(self, document_ids: List[str]) -> np.ndarray:
+        """获取文档的已保存向量（用于MMR等重排）
+        
+        Args:
+            document_ids: 文档ID列表
+            
+        Returns:
+            np.ndarray: 与文档ID一一对应的向量矩阵
+        """
+        raise NotImplementedError("_document_vectors() is not implemented")
+
+    def _mmr_rerank(
+        self,
+        query_vector,
+        results: List[Tuple[VectorStoreDocument, float]],
+        top_k: int,
+        lambda_mult: float
+    ) -> List[Tuple[VectorStoreDocument, float]]:
+        """使用MMR从候选结果中选择相关且彼此不重复的结果
+        
+        Args:
+            query_vector: 查询向量
+            results: 候选结果列表
+            top_k: 返回的最大结果数
+            lambda_mult: 相关性权重
+            
+        Returns:
+            List[Tuple[VectorStoreDocument, float]]: 按MMR选择顺序排列的文档和原始分数列表
+        """
+        if not results:
+            return []
+        
+        vectors = self._document_vectors([document.id for document, _ in results])
+        return [results[i] for i in mmr_select(query_vector, vectors, top_k, lambda_mult)]
+
+    def _init_embedding(self) -> None:
+        """根据配置创建嵌入模型（可选）的批处理器和查询向量缓存
+        
+        缺少嵌入向量的文档按批并发生成，重复的查询通过缓存不再调用嵌入模型。
+        """
+        self.embedding_model = self.config.get('embedding_model')
+        
+        self._embedding_batcher = EmbeddingBatcher(
+            self.embedding_model,
+            batch_size=self.config.get('embedding_batch_size', 64),
+            max_batch_tokens=self.config.get('embedding_batch_tokens', 8000),
+            max_workers=self.config.get('embedding_workers', 4)
+        ) if self.embedding_model else None
+        
+        self._query_cache = QueryEmbeddingCache(
+            max_size=self.config.get('query_cache_size', 10000),
+            ttl=self.config.get('query_cache_ttl'),
+            cache_dir=self.config.get('query_cache_dir'),
+            model_name=str(getattr(self.embedding_model, 'embedding_model', type(self.embedding_model).__name__))
+        ) if self.embedding_model and self.config.get('query_cache_size', 10000) > 0 else None
+
+    def _embed_documents(
+        self,
+        documents: List[VectorStoreDocument]
+    ) -> List[VectorStoreDocument]:
+        """为缺少嵌入向量的文档批量生成向量，写回文档对象
+        
+        Args:
+            documents: 文档列表
+            
+        Returns:
+            List[VectorStoreDocument]: 文档列表
+        """
+        missing = [doc for doc in documents if doc.embedding is None]
+        if missing and self._embedding_batcher:
+            embeddings = self._embedding_batcher.embed([doc.content for doc in missing])
+            for doc, embedding in zip(missing, embeddings):
+                doc.embedding = embedding
+        return documents
+
+    def _embed_queries(
+        self,
+        queries: List[str],
+        embeddings: Optional[List[Optional[List[float]]]] = None
+    ) -> List[Optional[List[float]]]:
+        """为未提供查询向量的查询生成向量
+        
+        Args:
+            queries: 搜索查询列表
+            embeddings: 与查询一一对应的查询向量列表（可选）
+            
+        Returns:
+            List[Optional[List[float]]]: 查询向量列表（没有嵌入模型时未提供的查询向量仍为None）
+        """
+        if embeddings is None:
+            embeddings = [None] * len(queries)
+        elif len(embeddings) != len(queries):
+            raise ValueError("The number of embeddings must match the number of queries")
+        
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        if missing and self._embedding_batcher:
+            embeddings = list(embeddings)
+            texts = [queries[i] for i in missing]
+            if self._query_cache:
+                generated = self._query_cache.embed(texts, self._embedding_batcher.embed)
+            else:
+                generated = self._embedding_batcher.embed(texts)
+            for i, embedding in zip(missing, generated):
+                embeddings[i] = embedding
+        
+        return embeddings
+
+    async def _aembed_documents(
+        self,
+        documents: List[VectorStoreDocument]
+    ) -> List[VectorStoreDocument]:
+        """异步为缺少嵌入向量的文档生成向量
+        
+        Args:
+            documents: 要添加的文档列表
+            
+        Returns:
+            List[VectorStoreDocument]: 文档列表
+        """
+        missing = [doc for doc in documents if doc.embedding is None]
+        if missing and self._embedding_batcher:
+            embeddings = await self._embedding_batcher.aembed([doc.content for doc in missing])
+            for doc, embedding in zip(missing, embeddings):
+                doc.embedding = embedding
+        return documents
+
+    async def _aembed_queries(
+        self,
+        queries: List[str],
+        embeddings: Optional[List[Optional[List[float]]]] = None
+    ) -> List[Optional[List[float]]]:
+        """异步为未提供查询向量的查询生成向量
+        
+        Args:
+            queries: 搜索查询列表
+            embeddings: 与查询一一对应的查询向量列表（可选）
+            
+        Returns:
+            List[Optional[List[float]]]: 查询向量列表
+        """
+        if embeddings is None:
+            embeddings = [None] * len(queries)
+        elif len(embeddings) != len(queries):
+            raise ValueError("The number of embeddings must match the number of queries")
+        
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        if missing and self._embedding_batcher:
+            embeddings = list(embeddings)
+            texts = [queries[i] for i in missing]
+            if self._query_cache:
+                generated = await self._query_cache.aembed(texts, self._embedding_batcher.aembed)
+            else:
+                generated = await self._embedding_batcher.aembed(texts)
+            for i, embedding in zip(missing, generated):
+                embeddings[i] = embedding
+        
+        return embeddings
+
+    def _resolve_path(self, path: Optional[str]) -> str:
+        """确定保存/加载路径
+        
+        Args:
+            path: 调用方指定的路径（可选）
+            
+        Returns:
+            str: 保存/加载路径
+        """
+        path = path or self._persist_path or self.config.get('index_path')
+        if not path:
+            raise ValueError("A path is required to save or load the vector store")
+        return path
+
+    async def _run_async(self, func, *args, **kwargs):
+        """在异步线程池中执行同步方法
+        
+        线程池大小由配置项async_workers决定，默认为CPU核心数。
+        
+        Args:
+            func: 同步方法
+            *args: 位置参数
+            **kwargs: 关键字参数
+            
+        Returns:
+            Any: 方法的返回值
+        """
+        if self._async_executor is None:
+            with self._async_executor_lock:
+                if self._async_executor is None:
+                    self._async_executor = ThreadPoolExecutor(
+                        max_workers=self.config.get('async_workers') or os.cpu_count() or 1,
+                        thread_name_prefix='vector-store-async'
+                    )
+        
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._async_executor, functools.partial(func, *args, **kwargs))
+
     @abstractmethod
     def get_document(
         self,
@@ -115,6 +639,22 @@ class BaseVectorStore(ABC):
         """
         pass
 
+    def delete_documents(
+        self,
+        document_ids: List[str]
+    ) -> int:
+        """批量删除文档
+        
+        默认逐个调用delete_document，支持批量删除的实现应重写此方法。
+        
+        Args:
+            document_ids: 文档ID列表
+            
+        Returns:
+            int: 实际删除的文档数量
+        """
+        return sum(self.delete_document(document_id) for document_id in dict.fromkeys(document_ids))
+
     @abstractmethod
     def clear(self) -> None:
         """清空向量存储"""
@@ -148,11 +688,60 @@ class BaseVectorStore(ABC):
         documents = self.list_documents()
         return len(documents)
 
+    def query_cache_stats(self) -> Dict[str, Any]:
+        """获取查询向量缓存的统计信息
+        
+        Returns:
+            Dict[str, Any]: 命中次数、未命中次数、命中率等，未启用缓存时返回空字典
+        """
+        return self._query_cache.stats() if self._query_cache else {}
+
     def list_documents(self) -> List[VectorStoreDocument]:
         """列出所有文档
         
         Returns:
             List[VectorStoreDocument]: 文档列表
         """
-        # 注意：这个方法在大型向量存储中可能会很耗时，具体实现中应当谨慎使用
-        raise NotImplementedError("list_documents() is not implemented")
\ No newline at end of file
+        # 注意：这个方法会一次性读入全部文档，大型向量存储应当使用iter_documents
+        return list(self.iter_documents())
+
+    def iter_documents(
+        self,
+        batch_size: int = 1000,
+        include_embeddings: bool = False
+    ) -> Iterator[VectorStoreDocument]:
+        """逐个遍历所有文档，每次只读取一页
+        
+        内存占用只与batch_size有关，适合导出、重建索引等需要遍历整个存储的任务。
+        
+        Args:
+            batch_size: 每次读取的文档数量
+            include_embeddings: 是否同时返回嵌入向量
+            
+        Yields:
+            VectorStoreDocument: 文档
+        """
+        cursor = None
+        while True:
+            documents, cursor = self.list_documents_page(cursor, batch_size, include_embeddings)
+            yield from documents
+            if cursor is None:
+                return
+
+    def list_documents_page(
+        self,
+        cursor: Optional[str] = None,
+        limit: int = 1000,
+        include_embeddings: bool = False
+    ) -> Tuple[List[VectorStoreDocument], Optional[str]]:
+        """按游标分页列出文档
+        
+        Args:
+            cursor: 上一页返回的游标（可选，不提供时从头开始）
+            limit: 本页最多返回的文档数量
+            include_embeddings: 是否同时返回嵌入向量
+            
+        Returns:
+            Tuple[List[VectorStoreDocument], Optional[str]]: 本页文档和下一页的游标，没有更多文档时游标为None
+        """
+        raise NotImplementedError("list_documents_page() is not implemented")
\ No newline at end of file
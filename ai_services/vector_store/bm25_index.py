@@ -0,0 +1,398 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""BM25稀疏检索索引"""
+
+import math
+import os
+import re
+import threading
+from array import array
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ai_services.nlp.text_processor import TextProcessor
+
+
+class BM25Index:
+    """基于BM25的关键词检索索引
+
+    使用TextProcessor.tokenize（jieba）分词，词项统一转为小写，只保留包含字母、数字或汉字的词项，
+    因此股票代码、文号和MACD、KDJ等指标名称都能精确命中。
+
+    倒排表以CSR形式保存为紧凑的numpy数组：``_offsets[t]:_offsets[t+1]`` 是词项t的倒排区间，
+    ``_postings`` 保存文档槽位（uint32），``_tfs`` 保存词频（uint16）。
+    新增文档的倒排项先按词项追加到内存中的array缓冲段，检索时与CSR数组一起计分；
+    缓冲段的倒排项数超过CSR数组的 ``MERGE_RATIO`` （至少 ``MIN_MERGE_POSTINGS``）时才合并，
+    合并开销按写入量摊销。删除只标记槽位失效，失效槽位的占比超过 ``COMPACT_RATIO`` 时合并并回收槽位。
+    """
+
+    # 包含字母、数字或汉字的词项才建立索引
+    _TOKEN_PATTERN = re.compile(r'\w')
+
+    # 缓冲段的倒排项数超过 max(MIN_MERGE_POSTINGS, MERGE_RATIO * CSR倒排项数) 时合并
+    MERGE_RATIO = 0.1
+    MIN_MERGE_POSTINGS = 65536
+
+    # 失效槽位的占比超过该值时合并，清除已删除文档的倒排项并回收槽位
+    COMPACT_RATIO = 0.2
+
+    # 保存词表和文档ID时使用的分隔符
+    _SEPARATOR = '\x00'
+
+    def __init__(self, text_processor: Optional[TextProcessor] = None, k1: float = 1.5, b: float = 0.75):
+        """初始化BM25索引
+
+        Args:
+            text_processor: 文本处理器（可选，默认新建）
+            k1: 词频饱和参数
+            b: 文档长度归一化参数
+        """
+        self.text_processor = text_processor or TextProcessor()
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.Lock()
+        self.clear()
+
+    def __len__(self) -> int:
+        """获取文档数量
+
+        Returns:
+            int: 文档数量
+        """
+        return len(self._slots)
+
+    def tokenize(self, text: str) -> List[str]:
+        """分词并规范化词项
+
+        Args:
+            text: 输入文本
+
+        Returns:
+            List[str]: 词项列表
+        """
+        tokens = self.text_processor.tokenize(text)
+        return [
+            token.lower() for token in self.text_processor.remove_stopwords(tokens)
+            if self._TOKEN_PATTERN.search(token)
+        ]
+
+    def add(self, document_id: str, text: str) -> None:
+        """添加文档（已存在时替换）
+
+        Args:
+            document_id: 文档ID
+            text: 文档内容
+        """
+        self.add_many([(document_id, text)])
+
+    def add_many(self, documents: List[Tuple[str, str]]) -> None:
+        """批量添加文档（已存在时替换）
+
+        Args:
+            documents: (文档ID, 文档内容)列表
+        """
+        tokenized = [(document_id, Counter(self.tokenize(text))) for document_id, text in documents]
+
+        with self._lock:
+            for document_id, term_counts in tokenized:
+                self._remove(document_id)
+
+                length = sum(term_counts.values())
+                slot = self._append_slot(document_id, length)
+                self._total_len += length
+
+                for term, tf in term_counts.items():
+                    term_id = self._vocab.setdefault(term, len(self._vocab))
+                    pending = self._pending.get(term_id)
+                    if pending is None:
+                        pending = self._pending[term_id] = (array('I'), array('H'))
+                    pending[0].append(slot)
+                    pending[1].append(min(tf, 0xFFFF))
+                self._pending_count += len(term_counts)
+
+            self._maybe_merge()
+
+    def remove(self, document_id: str) -> bool:
+        """删除文档
+
+        Args:
+            document_id: 文档ID
+
+        Returns:
+            bool: 是否删除成功
+        """
+        with self._lock:
+            removed = self._remove(document_id)
+            self._maybe_merge()
+            return removed
+
+    def search(self, query: str, top_k: int = 10) -> List[Tuple[str, float]]:
+        """检索与查询最相关的文档
+
+        Args:
+            query: 查询文本
+            top_k: 返回的最大结果数
+
+        Returns:
+            List[Tuple[str, float]]: 文档ID和BM25分数列表，按分数降序排列
+        """
+        terms = set(self.tokenize(query))
+        if not terms or top_k <= 0:
+            return []
+
+        with self._lock:
+            n_docs = len(self._slots)
+            if not n_docs:
+                return []
+            avgdl = self._total_len / n_docs or 1.0
+
+            # 合并会替换而不是修改CSR数组、槽位数组和文档ID列表，释放锁后可以继续读取这里取到的引用
+            offsets, postings, tfs = self._offsets, self._postings, self._tfs
+            doc_lens, alive, doc_ids = self._doc_lens, self._alive, self._doc_ids
+            term_postings = []
+            for term in terms:
+                term_id = self._vocab.get(term)
+                if term_id is None:
+                    continue
+                slot_parts, tf_parts = [], []
+                if term_id < len(offsets) - 1:
+                    start, end = int(offsets[term_id]), int(offsets[term_id + 1])
+                    slot_parts.append(postings[start:end])
+                    tf_parts.append(tfs[start:end])
+                pending = self._pending.get(term_id)
+                if pending is not None:
+                    slot_parts.append(np.array(pending[0], dtype=np.uint32))
+                    tf_parts.append(np.array(pending[1], dtype=np.uint16))
+                if slot_parts:
+                    term_postings.append((slot_parts, tf_parts))
+
+        slot_blocks, score_blocks = [], []
+        for slot_parts, tf_parts in term_postings:
+            slots = np.concatenate(slot_parts) if len(slot_parts) > 1 else slot_parts[0]
+            if not len(slots):
+                continue
+
+            tf = (np.concatenate(tf_parts) if len(tf_parts) > 1 else tf_parts[0]).astype(np.float32)
+            idf = math.log(1 + (n_docs - len(slots) + 0.5) / (len(slots) + 0.5))
+            norm = self.k1 * (1 - self.b + self.b * doc_lens[slots] / avgdl)
+            slot_blocks.append(slots)
+            score_blocks.append(idf * tf * (self.k1 + 1) / (tf + norm))
+
+        if not slot_blocks:
+            return []
+
+        # 按文档槽位累加各词项的分数，去掉已删除的文档
+        slots, inverse = np.unique(np.concatenate(slot_blocks), return_inverse=True)
+        scores = np.bincount(inverse, weights=np.concatenate(score_blocks))
+        live = alive[slots].astype(bool)
+        slots, scores = slots[live], scores[live]
+
+        if len(slots) > top_k:
+            top = np.argpartition(-scores, top_k - 1)[:top_k]
+            slots, scores = slots[top], scores[top]
+        order = np.argsort(-scores, kind='stable')
+
+        results = []
+        for i in order:
+            document_id = doc_ids[int(slots[i])]
+            if document_id is not None:
+                results.append((document_id, float(scores[i])))
+        return results
+
+    def save(self, path: str) -> None:
+        """保存到文件
+
+        Args:
+            path: 保存路径前缀
+        """
+        with self._lock:
+            self._merge()
+            terms = [''] * len(self._vocab)
+            for term, term_id in self._vocab.items():
+                terms[term_id] = term
+
+            size = len(self._doc_ids)
+            tmp_path = f"{path}_bm25.tmp.npz"
+            np.savez(
+                tmp_path,
+                terms=self._pack_strings(terms),
+                offsets=self._offsets,
+                postings=self._postings,
+                tfs=self._tfs,
+                doc_ids=self._pack_strings(doc_id or '' for doc_id in self._doc_ids),
+                doc_lens=self._doc_lens[:size],
+                alive=self._alive[:size]
+            )
+            os.replace(tmp_path, self.file_path(path))
+
+    def load(self, path: str) -> None:
+        """从文件加载
+
+        Args:
+            path: 加载路径前缀
+        """
+        with np.load(self.file_path(path)) as data:
+            alive = data['alive'].astype(np.uint8)
+            terms = self._unpack_strings(data['terms'], len(data['offsets']) - 1)
+            doc_ids = self._unpack_strings(data['doc_ids'], len(alive))
+            doc_lens = data['doc_lens'].astype(np.uint32)
+
+            with self._lock:
+                self.clear()
+                self._vocab = {term: term_id for term_id, term in enumerate(terms)}
+                self._offsets = data['offsets']
+                self._postings = data['postings']
+                self._tfs = data['tfs']
+                self._doc_ids = [doc_id if live else None for doc_id, live in zip(doc_ids, alive.tolist())]
+                self._slots = {doc_id: slot for slot, doc_id in enumerate(self._doc_ids) if doc_id is not None}
+                self._doc_lens = doc_lens
+                self._alive = alive
+                self._total_len = int(doc_lens[alive.astype(bool)].sum())
+
+    def clear(self) -> None:
+        """清空索引"""
+        self._vocab: Dict[str, int] = {}
+        self._doc_ids: List[Optional[str]] = []
+        self._slots: Dict[str, int] = {}
+        self._total_len = 0
+
+        # 按槽位保存的文档长度和存活标记，容量不足时按倍数扩容（换用新数组）
+        self._doc_lens = np.empty(0, dtype=np.uint32)
+        self._alive = np.empty(0, dtype=np.uint8)
+
+        # CSR倒排表
+        self._offsets = np.zeros(1, dtype=np.int64)
+        self._postings = np.empty(0, dtype=np.uint32)
+        self._tfs = np.empty(0, dtype=np.uint16)
+
+        # 尚未合并的缓冲段：词项ID -> (槽位, 词频)
+        self._pending: Dict[int, Tuple[array, array]] = {}
+        self._pending_count = 0
+
+    @staticmethod
+    def file_path(path: str) -> str:
+        """获取索引文件路径
+
+        Args:
+            path: 保存路径前缀
+
+        Returns:
+            str: 索引文件路径
+        """
+        return f"{path}_bm25.npz"
+
+    def _append_slot(self, document_id: str, length: int) -> int:
+        """为新文档分配槽位（调用方持有锁）
+
+        Args:
+            document_id: 文档ID
+            length: 文档长度（词项数）
+
+        Returns:
+            int: 槽位
+        """
+        slot = len(self._doc_ids)
+        if slot == len(self._doc_lens):
+            capacity = max(1024, 2 * slot)
+            doc_lens = np.zeros(capacity, dtype=np.uint32)
+            doc_lens[:slot] = self._doc_lens[:slot]
+            alive = np.zeros(capacity, dtype=np.uint8)
+            alive[:slot] = self._alive[:slot]
+            self._doc_lens, self._alive = doc_lens, alive
+
+        self._doc_lens[slot] = length
+        self._alive[slot] = 1
+        self._doc_ids.append(document_id)
+        self._slots[document_id] = slot
+        return slot
+
+    def _remove(self, document_id: str) -> bool:
+        """删除文档（调用方持有锁）
+
+        Args:
+            document_id: 文档ID
+
+        Returns:
+            bool: 是否删除成功
+        """
+        slot = self._slots.pop(document_id, None)
+        if slot is None:
+            return False
+
+        self._doc_ids[slot] = None
+        self._alive[slot] = 0
+        self._total_len -= int(self._doc_lens[slot])
+        return True
+
+    def _maybe_merge(self) -> None:
+        """缓冲段过大或失效槽位过多时合并（调用方持有锁）"""
+        dead_slots = len(self._doc_ids) - len(self._slots)
+        if (
+            self._pending_count > max(self.MIN_MERGE_POSTINGS, self.MERGE_RATIO * len(self._postings))
+            or dead_slots > len(self._doc_ids) * self.COMPACT_RATIO
+        ):
+            self._merge()
+
+    def _merge(self) -> None:
+        """将缓冲段合并进CSR数组，清除已删除文档的倒排项并回收其槽位（调用方持有锁）"""
+        n_terms = len(self._vocab)
+        size = len(self._doc_ids)
+        sealed_terms = np.repeat(np.arange(len(self._offsets) - 1, dtype=np.uint32), np.diff(self._offsets))
+
+        pending_terms = np.fromiter(self._pending.keys(), dtype=np.uint32, count=len(self._pending))
+        pending_counts = [len(slots) for slots, _ in self._pending.values()]
+        terms = np.concatenate([sealed_terms, np.repeat(pending_terms, pending_counts)])
+        postings = np.concatenate(
+            [self._postings] + [np.array(slots, dtype=np.uint32) for slots, _ in self._pending.values()]
+        )
+        tfs = np.concatenate([self._tfs] + [np.array(tfs, dtype=np.uint16) for _, tfs in self._pending.values()])
+
+        alive = self._alive[:size].astype(bool)
+        live = alive[postings]
+        terms, postings, tfs = terms[live], postings[live], tfs[live]
+
+        # 存活槽位按原顺序重新编号；缓冲段的槽位大于CSR中的槽位且每个词项内递增，
+        # 稳定排序后每个词项内的槽位仍然有序
+        new_slots = (np.cumsum(alive) - 1).astype(np.uint32)
+        order = np.argsort(terms, kind='stable')
+        self._postings = new_slots[postings][order]
+        self._tfs = tfs[order]
+        self._offsets = np.zeros(n_terms + 1, dtype=np.int64)
+        np.cumsum(np.bincount(terms, minlength=n_terms), out=self._offsets[1:])
+
+        self._doc_ids = [doc_id for doc_id in self._doc_ids if doc_id is not None]
+        self._slots = {doc_id: slot for slot, doc_id in enumerate(self._doc_ids)}
+        self._doc_lens = self._doc_lens[:size][alive]
+        self._alive = np.ones(len(self._doc_ids), dtype=np.uint8)
+        self._pending = {}
+        self._pending_count = 0
+
+    @classmethod
+    def _pack_strings(cls, strings) -> np.ndarray:
+        """将字符串列表编码为字节数组（以分隔符连接的UTF-8）
+
+        Args:
+            strings: 字符串序列
+
+        Returns:
+            np.ndarray: uint8字节数组
+        """
+        return np.frombuffer(cls._SEPARATOR.join(strings).encode('utf-8'), dtype=np.uint8)
+
+    @classmethod
+    def _unpack_strings(cls, data: np.ndarray, count: int) -> List[str]:
+        """从字节数组还原字符串列表
+
+        Args:
+            data: uint8字节数组
+            count: 字符串数量
+
+        Returns:
+            List[str]: 字符串列表
+        """
+        if count == 0:
+            return []
+        return data.tobytes().decode('utf-8').split(cls._SEPARATOR)
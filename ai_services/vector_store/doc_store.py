@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""二进制文档内容存储"""
+
+import heapq
+import mmap
+import os
+import struct
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+
+class BinaryDocStore:
+    """按内部ID保存文档内容的二进制存储
+
+    内容文件由长度前缀记录组成（4字节小端无符号长度 + UTF-8内容），
+    偏移表文件保存按内部ID升序排列的（内部ID, 记录偏移, 记录长度）数组。
+    加载时只读取偏移表，内容文件通过mmap映射，只有被访问的文档内容才会从磁盘读取。
+    新增的文档内容先保存在内存中，保存到同一路径时只在内容文件末尾追加新增记录。
+    偏移表和整体重写的内容文件写入按快照代数命名的新文件，旧快照引用的文件保持不变。
+    """
+
+    # 记录长度前缀格式
+    _LENGTH = struct.Struct('<I')
+
+    # 偏移表的数据类型
+    _TABLE_DTYPE = np.dtype([('id', '<i8'), ('offset', '<i8'), ('size', '<u4')])
+
+    # 已删除记录占内容文件的比例超过该值时，保存时整体重写以回收空间
+    COMPACT_RATIO = 0.5
+
+    def __init__(self):
+        """初始化文档内容存储"""
+        # 已持久化部分：偏移表、已删除的内部ID、内容文件的内存映射
+        self._ids = np.empty(0, dtype=np.int64)
+        self._offsets = np.empty(0, dtype=np.int64)
+        self._sizes = np.empty(0, dtype=np.uint32)
+        self._deleted: Set[int] = set()
+        self._file = None
+        self._mmap: Optional[mmap.mmap] = None
+        self._path: Optional[str] = None
+        self._prefix: Optional[str] = None
+        self._live_bytes = 0
+
+        # 尚未持久化的文档内容
+        self._pending: Dict[int, str] = {}
+
+    def __len__(self) -> int:
+        """获取文档数量
+
+        Returns:
+            int: 文档数量
+        """
+        return len(self._ids) - len(self._deleted) + len(self._pending)
+
+    def __contains__(self, int_id: int) -> bool:
+        """检查内部ID是否存在
+
+        Args:
+            int_id: 内部ID
+
+        Returns:
+            bool: 是否存在
+        """
+        return int_id in self._pending or self._find(int_id) is not None
+
+    @staticmethod
+    def file_paths(path: str, generation: Optional[int] = None) -> Tuple[str, str]:
+        """获取内容文件和偏移表文件路径
+
+        Args:
+            path: 向量存储的保存路径前缀
+            generation: 快照代数（可选，不提供时为旧版本不带代数的文件名）
+
+        Returns:
+            Tuple[str, str]: 内容文件路径和偏移表文件路径
+        """
+        suffix = '' if generation is None else f".{generation}"
+        return f"{path}_docs{suffix}.bin", f"{path}_docs{suffix}.idx"
+
+    def put(self, int_id: int, content: str) -> None:
+        """保存文档内容
+
+        Args:
+            int_id: 内部ID
+            content: 文档内容
+        """
+        # 覆盖已持久化的内容时，旧记录视为已删除
+        if int_id not in self._pending:
+            self.delete(int_id)
+        self._pending[int_id] = content
+
+    def get(self, int_id: int) -> Optional[str]:
+        """读取文档内容
+
+        Args:
+            int_id: 内部ID
+
+        Returns:
+            Optional[str]: 文档内容，不存在时返回None
+        """
+        if int_id in self._pending:
+            return self._pending[int_id]
+
+        position = self._find(int_id)
+        if position is None:
+            return None
+
+        return self._read(int(self._offsets[position]))
+
+    def delete(self, int_id: int) -> None:
+        """删除文档内容
+
+        Args:
+            int_id: 内部ID
+        """
+        if self._pending.pop(int_id, None) is not None:
+            return
+
+        position = self._find(int_id)
+        if position is not None:
+            self._deleted.add(int_id)
+            self._live_bytes -= int(self._sizes[position])
+
+    def ids(self) -> Iterable[int]:
+        """按升序遍历所有内部ID
+
+        Returns:
+            Iterable[int]: 内部ID
+        """
+        persisted_ids = (int_id for int_id in self._ids.tolist() if int_id not in self._deleted)
+        return heapq.merge(persisted_ids, sorted(self._pending))
+
+    def save(self, path: str, generation: Optional[int] = None) -> Tuple[str, str]:
+        """保存到文件
+
+        保存到当前绑定的保存路径前缀时只在已有内容文件末尾追加新增记录，
+        否则（或已删除记录过多时）完整写入该代的新内容文件。偏移表总是写入该代的新文件。
+
+        Args:
+            path: 保存路径前缀
+            generation: 快照代数（可选）
+
+        Returns:
+            Tuple[str, str]: 保存后使用的内容文件路径和偏移表文件路径
+        """
+        data_path, table_path = self.file_paths(path, generation)
+        file_size = os.path.getsize(self._path) if self._path and os.path.exists(self._path) else 0
+
+        appendable = (
+            self._prefix == path
+            and self._mmap is not None
+            and file_size == len(self._mmap)
+            and self._live_bytes >= file_size * (1 - self.COMPACT_RATIO)
+        )
+        if appendable:
+            data_path = self._path
+
+        live_mask = np.isin(self._ids, np.fromiter(self._deleted, dtype=np.int64), invert=True)
+        persisted_count = int(live_mask.sum())
+        pending_ids = sorted(self._pending)
+        payloads = [self._pending[int_id].encode('utf-8') for int_id in pending_ids]
+
+        table = np.empty(persisted_count + len(pending_ids), dtype=self._TABLE_DTYPE)
+        table['id'][:persisted_count] = self._ids[live_mask]
+        table['size'][:persisted_count] = self._sizes[live_mask]
+        table['id'][persisted_count:] = pending_ids
+        table['size'][persisted_count:] = [self._LENGTH.size + len(payload) for payload in payloads]
+
+        if appendable:
+            table['offset'][:persisted_count] = self._offsets[live_mask]
+            with open(data_path, 'ab') as f:
+                table['offset'][persisted_count:] = self._write_records(f, payloads, file_size)
+        else:
+            tmp_path = f"{data_path}.tmp"
+            with open(tmp_path, 'wb') as f:
+                # 复制仍然有效的已持久化记录
+                for i, (offset, size) in enumerate(zip(self._offsets[live_mask].tolist(), self._sizes[live_mask].tolist())):
+                    table['offset'][i] = f.tell()
+                    f.write(self._mmap[offset:offset + size])
+                table['offset'][persisted_count:] = self._write_records(f, payloads, f.tell())
+            self._close()
+            os.replace(tmp_path, data_path)
+
+        # 偏移表按内部ID排序以支持二分查找
+        table = table[np.argsort(table['id'], kind='stable')]
+
+        tmp_path = f"{table_path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.save(f, table)
+        os.replace(tmp_path, table_path)
+
+        self._open(data_path, table)
+        self._prefix = path
+        return data_path, table_path
+
+    def load(self, path: str, file_paths: Optional[Tuple[str, str]] = None) -> None:
+        """从文件加载（只读取偏移表，内容按需读取）
+
+        Args:
+            path: 加载路径前缀
+            file_paths: 内容文件和偏移表文件路径（可选，默认为旧版本不带代数的文件名）
+        """
+        data_path, table_path = file_paths or self.file_paths(path)
+        with open(table_path, 'rb') as f:
+            table = np.load(f)
+        self._open(data_path, table)
+        self._prefix = path
+
+    def clear(self) -> None:
+        """清空文档内容存储（不删除已有文件）"""
+        self._close()
+        self._ids = np.empty(0, dtype=np.int64)
+        self._offsets = np.empty(0, dtype=np.int64)
+        self._sizes = np.empty(0, dtype=np.uint32)
+        self._deleted = set()
+        self._path = None
+        self._prefix = None
+        self._live_bytes = 0
+        self._pending = {}
+
+    def _write_records(self, f, payloads: List[bytes], start: int) -> np.ndarray:
+        """写入长度前缀记录
+
+        Args:
+            f: 已打开的内容文件
+            payloads: 编码后的文档内容列表
+            start: 第一条记录的偏移
+
+        Returns:
+            np.ndarray: 各记录的偏移
+        """
+        offsets = []
+        offset = start
+        for payload in payloads:
+            f.write(self._LENGTH.pack(len(payload)))
+            f.write(payload)
+            offsets.append(offset)
+            offset += self._LENGTH.size + len(payload)
+        return np.array(offsets, dtype=np.int64)
+
+    def _open(self, data_path: str, table) -> None:
+        """打开内容文件的内存映射并设置偏移表，清空内存中的待写入内容
+
+        Args:
+            data_path: 内容文件路径
+            table: 偏移表
+        """
+        self._close()
+        self._ids = np.ascontiguousarray(table['id'], dtype=np.int64)
+        self._offsets = np.ascontiguousarray(table['offset'], dtype=np.int64)
+        self._sizes = np.ascontiguousarray(table['size'], dtype=np.uint32)
+        self._deleted = set()
+        self._pending = {}
+        self._path = data_path
+
+        # 空文件无法建立内存映射
+        if os.path.exists(data_path) and os.path.getsize(data_path) > 0:
+            self._file = open(data_path, 'rb')
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._live_bytes = int(self._sizes.sum())
+
+    def _close(self) -> None:
+        """关闭内容文件的内存映射"""
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _find(self, int_id: int) -> Optional[int]:
+        """在偏移表中查找内部ID
+
+        Args:
+            int_id: 内部ID
+
+        Returns:
+            Optional[int]: 在偏移表中的位置，不存在或已删除时返回None
+        """
+        if int_id in self._deleted:
+            return None
+
+        position = int(np.searchsorted(self._ids, int_id))
+        if position < len(self._ids) and self._ids[position] == int_id:
+            return position
+        return None
+
+    def _read(self, offset: int) -> str:
+        """读取记录内容
+
+        Args:
+            offset: 记录偏移
+
+        Returns:
+            str: 文档内容
+        """
+        length = self._LENGTH.unpack_from(self._mmap, offset)[0]
+        start = offset + self._LENGTH.size
+        return self._mmap[start:start + length].decode('utf-8')
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""批量并发生成嵌入向量"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional
+
+
+class EmbeddingBatcher:
+    """将文本按数量和token预算分批，每批作为一次请求发送，多批并发执行
+
+    嵌入模型提供generate_embeddings时每批调用一次，否则在批内逐条调用generate_embedding。
+    异步接口aembed优先等待嵌入模型的agenerate_embeddings，模型没有异步接口时在线程中执行同步请求。
+    返回的向量与输入文本顺序一致。
+    """
+
+    def __init__(
+        self,
+        embedding_model,
+        batch_size: int = 64,
+        max_batch_tokens: int = 8000,
+        max_workers: int = 4,
+        token_counter: Optional[Callable[[str], int]] = None
+    ):
+        """初始化批量嵌入生成器
+
+        Args:
+            embedding_model: 嵌入模型（需提供generate_embedding或generate_embeddings）
+            batch_size: 每批最多的文本数量
+            max_batch_tokens: 每批的token预算（单条文本超出预算时单独成批）
+            max_workers: 同时进行的请求数量
+            token_counter: token计数函数（可选），默认按字符数估算
+        """
+        self.embedding_model = embedding_model
+        self.batch_size = max(1, batch_size)
+        self.max_batch_tokens = max_batch_tokens
+        self.max_workers = max(1, max_workers)
+        self.token_counter = token_counter or self.estimate_tokens
+
+    @staticmethod
+    def estimate_tokens(text: str) -> int:
+        """估算文本的token数量
+
+        中文约一个字符一个token，英文通常更少，按字符数估算偏保守。
+
+        Args:
+            text: 输入文本
+
+        Returns:
+            int: 估算的token数量
+        """
+        return len(text)
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        """批量生成嵌入向量
+
+        Args:
+            texts: 输入文本列表
+
+        Returns:
+            List[List[float]]: 嵌入向量列表，与输入文本顺序一致
+        """
+        batches = self._make_batches(texts)
+        if len(batches) <= 1 or self.max_workers == 1:
+            results = [self._embed_batch(batch) for batch in batches]
+        else:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(batches))) as executor:
+                # map按提交顺序返回结果
+                results = list(executor.map(self._embed_batch, batches))
+
+        return [embedding for batch_result in results for embedding in batch_result]
+
+    async def aembed(self, texts: List[str]) -> List[List[float]]:
+        """异步批量生成嵌入向量，同时进行的请求数量不超过max_workers
+
+        Args:
+            texts: 输入文本列表
+
+        Returns:
+            List[List[float]]: 嵌入向量列表，与输入文本顺序一致
+        """
+        semaphore = asyncio.Semaphore(self.max_workers)
+
+        async def embed_batch(batch: List[str]) -> List[List[float]]:
+            async with semaphore:
+                return await self._aembed_batch(batch)
+
+        # gather按传入顺序返回结果
+        results = await asyncio.gather(*(embed_batch(batch) for batch in self._make_batches(texts)))
+        return [embedding for batch_result in results for embedding in batch_result]
+
+    def _make_batches(self, texts: List[str]) -> List[List[str]]:
+        """按数量和token预算顺序切分批次
+
+        Args:
+            texts: 输入文本列表
+
+        Returns:
+            List[List[str]]: 批次列表
+        """
+        batches = []
+        batch: List[str] = []
+        batch_tokens = 0
+
+        for text in texts:
+            tokens = self.token_counter(text)
+            if batch and (len(batch) >= self.batch_size or batch_tokens + tokens > self.max_batch_tokens):
+                batches.append(batch)
+                batch = []
+                batch_tokens = 0
+            batch.append(text)
+            batch_tokens += tokens
+
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def _embed_batch(self, batch: List[str]) -> List[List[float]]:
+        """为一批文本生成嵌入向量
+
+        Args:
+            batch: 文本列表
+
+        Returns:
+            List[List[float]]: 嵌入向量列表
+        """
+        if hasattr(self.embedding_model, 'generate_embeddings'):
+            embeddings = self.embedding_model.generate_embeddings(batch)
+        else:
+            embeddings = [self.embedding_model.generate_embedding(text) for text in batch]
+
+        if len(embeddings) != len(batch):
+            raise ValueError(f"Embedding model returned {len(embeddings)} embeddings for {len(batch)} texts")
+        return embeddings
+
+    async def _aembed_batch(self, batch: List[str]) -> List[List[float]]:
+        """异步为一批文本生成嵌入向量
+
+        Args:
+            batch: 文本列表
+
+        Returns:
+            List[List[float]]: 嵌入向量列表
+        """
+        if not hasattr(self.embedding_model, 'agenerate_embeddings'):
+            return await asyncio.to_thread(self._embed_batch, batch)
+
+        embeddings = await self.embedding_model.agenerate_embeddings(batch)
+        if len(embeddings) != len(batch):
+            raise ValueError(f"Embedding model returned {len(embeddings)} embeddings for {len(batch)} texts")
+        return embeddings
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""追加写入的嵌入向量存储"""
+
+import os
+import tempfile
+import weakref
+from typing import BinaryIO, List, Optional, Sequence, Union
+
+import numpy as np
+
+
+def _remove_file(file_path: str) -> None:
+    """删除文件，文件不存在或仍被占用时忽略"""
+    try:
+        os.remove(file_path)
+    except OSError:
+        pass
+
+
+class EmbeddingStore:
+    """追加写入的嵌入向量矩阵
+
+    第i行保存内部ID为i的向量。已持久化的部分通过内存映射（np.memmap）按需读取，
+    新追加的向量先保存在内存中，保存时只把新增部分追加到文件末尾。
+    文件为不带文件头的原始矩阵，行数由文件大小推算，维度和数据类型由调用方记录。
+    追加不会改动已有的行，因此快照只需记录有效行数；需要整体重写时写入按快照代数命名的新文件，
+    旧快照引用的文件保持不变。
+
+    内存中的向量超过 ``max_pending_bytes`` 时提前写出并重新映射：当前文件未被改动时追加到其末尾
+    （快照记录的有效行数不变，多出的行在加载时被忽略），否则写入临时的溢出文件，保存时再复制到快照文件。
+    """
+
+    # 支持的存储数据类型，float16可以将磁盘和页缓存占用减半
+    SUPPORTED_DTYPES = ('float32', 'float16')
+
+    def __init__(self, dimension: int, dtype: str = 'float32', max_pending_bytes: int = 64 * 1024 * 1024):
+        """初始化嵌入向量存储
+
+        Args:
+            dimension: 向量维度
+            dtype: 存储数据类型，支持'float32'和'float16'
+            max_pending_bytes: 内存中尚未写出的向量的最大字节数，超过后写出到文件
+        """
+        if dtype not in self.SUPPORTED_DTYPES:
+            raise ValueError(f"Unsupported embedding dtype: {dtype}")
+
+        self.dimension = dimension
+        self.dtype = np.dtype(dtype)
+        self.max_pending_bytes = max_pending_bytes
+
+        # 已持久化部分的内存映射、文件路径及其所属的保存路径前缀
+        self._mmap: Optional[np.memmap] = None
+        self._path: Optional[str] = None
+        self._prefix: Optional[str] = None
+        self._persisted_rows = 0
+
+        # 当前映射的临时溢出文件，切换到其他文件或对象被回收时删除
+        self._spill: Optional[weakref.finalize] = None
+
+        # 尚未持久化的向量块
+        self._pending: List[np.ndarray] = []
+        self._pending_rows = 0
+
+    def __len__(self) -> int:
+        """获取向量行数
+
+        Returns:
+            int: 行数
+        """
+        return self._persisted_rows + self._pending_rows
+
+    @staticmethod
+    def file_path(path: str, generation: Optional[int] = None) -> str:
+        """获取向量文件路径
+
+        Args:
+            path: 向量存储的保存路径前缀
+            generation: 快照代数（可选，不提供时为旧版本不带代数的文件名）
+
+        Returns:
+            str: 向量文件路径
+        """
+        if generation is None:
+            return f"{path}_embeddings.bin"
+        return f"{path}_embeddings.{generation}.bin"
+
+    def append(self, vectors: np.ndarray) -> int:
+        """追加向量
+
+        Args:
+            vectors: 向量矩阵，形状为(n, dimension)
+
+        Returns:
+            int: 第一行的行号
+        """
+        vectors = np.asarray(vectors)
+        if vectors.ndim != 2 or vectors.shape[1] != self.dimension:
+            raise ValueError(f"Expected vectors of shape (n, {self.dimension}), got {vectors.shape}")
+
+        start = len(self)
+        self._pending.append(vectors.astype(self.dtype, copy=True))
+        self._pending_rows += len(vectors)
+        if self._pending_rows * self._row_bytes() > self.max_pending_bytes:
+            self.flush()
+        return start
+
+    def flush(self) -> None:
+        """把内存中的向量写出到文件并重新映射，释放内存
+
+        当前文件未被改动时追加到其末尾，否则连同已持久化的部分写入新的临时溢出文件。
+        """
+        if not self._pending:
+            return
+
+        if self._appendable():
+            with open(self._path, 'ab') as f:
+                self._write_pending(f)
+            self._open(self._path)
+            return
+
+        fd, spill_path = tempfile.mkstemp(suffix='_embeddings.bin')
+        with os.fdopen(fd, 'wb') as f:
+            self._write_persisted(f)
+            self._write_pending(f)
+        self._open(spill_path)
+        self._spill = weakref.finalize(self, _remove_file, spill_path)
+
+    def get(self, rows: Union[Sequence[int], np.ndarray]) -> np.ndarray:
+        """按行号读取向量
+
+        Args:
+            rows: 行号列表
+
+        Returns:
+            np.ndarray: float32向量矩阵，形状为(len(rows), dimension)
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        result = np.empty((len(rows), self.dimension), dtype=np.float32)
+        if len(rows) == 0:
+            return result
+
+        if rows.min() < 0 or rows.max() >= len(self):
+            raise IndexError("Embedding row out of range")
+
+        persisted = rows < self._persisted_rows
+        if persisted.any():
+            result[persisted] = self._mmap[rows[persisted]]
+        if not persisted.all():
+            result[~persisted] = self._pending_matrix()[rows[~persisted] - self._persisted_rows]
+
+        return result
+
+    def save(self, path: str, generation: Optional[int] = None) -> str:
+        """保存向量到文件
+
+        已绑定同一保存路径前缀下的文件且文件未被改动时，只把新增的向量追加到该文件末尾；
+        否则（包括当前映射的是临时溢出文件时）写入该代的新文件。
+
+        Args:
+            path: 保存路径前缀
+            generation: 快照代数（可选）
+
+        Returns:
+            str: 保存后使用的向量文件路径
+        """
+        # 溢出文件在对象回收时删除，不能作为快照引用的文件
+        if self._prefix == path and self._spill is None and self._appendable():
+            file_path = self._path
+            with open(file_path, 'ab') as f:
+                self._write_pending(f)
+        else:
+            file_path = self.file_path(path, generation)
+            tmp_path = f"{file_path}.tmp"
+            with open(tmp_path, 'wb') as f:
+                self._write_persisted(f)
+                self._write_pending(f)
+            os.replace(tmp_path, file_path)
+
+        self._open(file_path)
+        self._prefix = path
+        return file_path
+
+    def load(self, path: str, rows: Optional[int] = None, file_path: Optional[str] = None) -> None:
+        """从文件加载向量（内存映射，不读入内存）
+
+        Args:
+            path: 加载路径前缀
+            rows: 有效行数（可选）。保存过程中断时文件末尾可能有多余的行，超出部分会被忽略
+            file_path: 向量文件路径（可选，默认为旧版本不带代数的文件名）
+        """
+        self._open(file_path or self.file_path(path), rows)
+        self._prefix = path
+
+    def clear(self) -> None:
+        """清空向量存储（不删除已保存的文件）"""
+        self._release_spill()
+        self._mmap = None
+        self._path = None
+        self._prefix = None
+        self._persisted_rows = 0
+        self._pending = []
+        self._pending_rows = 0
+
+    def _row_bytes(self) -> int:
+        """每行向量占用的字节数"""
+        return self.dimension * self.dtype.itemsize
+
+    def _appendable(self) -> bool:
+        """当前映射的文件是否存在且未被改动，可以直接在末尾追加"""
+        return (
+            self._path is not None
+            and os.path.exists(self._path)
+            and os.path.getsize(self._path) == self._persisted_rows * self._row_bytes()
+        )
+
+    def _write_persisted(self, f: BinaryIO) -> None:
+        """分块复制已持久化部分，避免一次性读入内存"""
+        if self._mmap is not None:
+            for start in range(0, self._persisted_rows, 65536):
+                f.write(np.ascontiguousarray(self._mmap[start:start + 65536]).tobytes())
+
+    def _write_pending(self, f: BinaryIO) -> None:
+        """写出内存中的向量块"""
+        for block in self._pending:
+            f.write(block.tobytes())
+
+    def _release_spill(self) -> None:
+        """删除当前映射的临时溢出文件"""
+        if self._spill is not None:
+            self._mmap = None
+            self._spill()
+            self._spill = None
+
+    def _open(self, file_path: str, max_rows: Optional[int] = None) -> None:
+        """以只读内存映射方式打开向量文件，并清空内存中的待写入向量
+
+        Args:
+            file_path: 向量文件路径
+            max_rows: 最多映射的行数（可选）
+        """
+        if file_path != self._path:
+            self._release_spill()
+
+        rows = os.path.getsize(file_path) // self._row_bytes() if os.path.exists(file_path) else 0
+        if max_rows is not None:
+            rows = min(rows, max_rows)
+
+        # 空文件无法建立内存映射
+        self._mmap = np.memmap(file_path, dtype=self.dtype, mode='r', shape=(rows, self.dimension)) if rows else None
+        self._path = file_path
+        self._persisted_rows = rows
+        self._pending = []
+        self._pending_rows = 0
+
+    def _pending_matrix(self) -> np.ndarray:
+        """获取尚未持久化的向量矩阵（合并内存中的向量块）
+
+        Returns:
+            np.ndarray: 向量矩阵
+        """
+        if len(self._pending) > 1:
+            self._pending = [np.concatenate(self._pending)]
+        return self._pending[0]
@@ -3,11 +3,20 @@
 
 """FAISS向量存储实现"""
 
+import copy
 import json
 import os
-from typing import Dict, List, Optional, Tuple, Union
+import re
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple, Union
 
-from ai_services.vector_store.base_vector_store import BaseVectorStore, VectorStoreDocument
+from ai_services.nlp.near_duplicate import NearDuplicateIndex, SimHasher
+from ai_services.utils.logger import get_logger
+from ai_services.utils.rw_lock import ReadWriteLock
+from ai_services.vector_store.base_vector_store import BaseVectorStore, VectorStoreDocument, collapse_search_results
+from ai_services.vector_store.doc_store import BinaryDocStore
+from ai_services.vector_store.embedding_store import EmbeddingStore
+from ai_services.vector_store.write_ahead_log import WriteAheadLog
 
 # 尝试导入faiss库
 try:
@@ -64,25 +73,182 @@ except ImportError:
     np = MockNumPy()
 
 
+logger = get_logger('faiss_vector_store')
+
+
 class FAISSVectorStore(BaseVectorStore):
-    """基于FAISS的向量存储实现"""
+    """基于FAISS的向量存储实现
+    
+    支持的索引类型（通过配置项 ``index_type`` 指定）：
+    
+    - ``flat``: 精确的暴力检索（IndexFlat），召回率100%，延迟随数据量线性增长
+    - ``ivf_flat``: 倒排文件索引（IndexIVFFlat），由 ``nlist`` 控制聚类中心数量，
+      ``nprobe`` 控制每次查询探查的聚类数量，需要训练
+    - ``hnsw``: 分层可导航小世界图索引（IndexHNSWFlat），由 ``hnsw_m`` 控制每个节点的连接数，
+      ``ef_construction`` 和 ``ef_search`` 分别控制建图和查询时的搜索宽度
+    - ``sq8`` / ``ivf_sq8``: 8位标量量化（IndexScalarQuantizer / IndexIVFScalarQuantizer），内存为原来的1/4
+    - ``pq`` / ``ivf_pq``: 乘积量化（IndexPQ / IndexIVFPQ），由 ``pq_m`` 控制子空间数量、
+      ``pq_nbits`` 控制每个子空间的编码位数，每个向量占用 ``pq_m * pq_nbits / 8`` 字节
+    
+    相似度度量通过 ``metric`` 指定（未指定时使用 ``similarity_metric``）：
+    
+    - ``l2``: 欧氏距离（默认），分数越小越相似
+    - ``ip``: 内积，分数越大越相似
+    - ``cosine``: 余弦相似度，向量在写入和查询时归一化后使用内积索引，分数越大越相似
+    
+    量化索引可以通过 ``refine_factor`` 开启精确重排：先从量化索引取出 ``top_k * refine_factor`` 个候选，
+    再使用原始向量计算精确距离重新排序，以少量额外计算换回量化损失的召回率。
+    
+    每个文档在索引中对应一个稳定的int64内部ID（单调递增、不复用），
+    检索结果通过ID映射表以O(k)的代价还原为文档ID，删除时直接从索引中移除对应向量。
+    
+    原始向量按内部ID追加保存在 :class:`EmbeddingStore` 中（``embedding_dtype`` 可选float32/float16），
+    重建索引、切换索引类型和冷启动都直接从内存映射的向量文件读取，无需重新调用嵌入模型。
+    文档内容保存在 :class:`BinaryDocStore` 中，加载时只读取偏移表，内容在被检索到时才从磁盘读取。
+    
+    开启 ``wal_enabled`` 后，保存或加载过的存储会把每次添加/删除操作立即追加到预写日志，
+    ``save()`` 只需把日志刷新到磁盘；日志累计 ``wal_compact_threshold`` 条操作后才写入完整快照并清空日志。
+    两次快照之间进程崩溃时，加载快照后重放日志即可恢复。
+    
+    开启 ``dedup`` 后，写入前用TextProcessor分词计算文档的SimHash指纹，并通过LSH分桶索引查找
+    汉明距离不超过 ``dedup_max_distance`` 的已有文档（或同批中更早的文档）：``skip`` 直接丢弃近重复文档，
+    ``merge`` 将其ID追加到已有文档元数据的 ``duplicate_ids`` 中。两种方式都不会为近重复文档生成嵌入向量。
+    
+    元数据筛选使用倒排索引（元数据键 -> 值 -> 内部ID集合）在检索前确定候选集合：
+    候选数量不超过 ``filter_exact_threshold`` 时直接对候选向量做精确检索，
+    否则作为FAISS的ID选择器参与检索，保证筛选后仍能返回top_k个结果。
+    
+    检索在读锁内并发执行（FAISS检索期间释放GIL），添加、删除、保存等写操作持有写锁，彼此串行且与检索互斥；
+    嵌入向量在加锁之前生成，写锁只覆盖修改索引和映射表的部分。
+    
+    多个小型文档集合可以共用一个存储：文档所属的命名空间保存在元数据字段 ``namespace_field`` （默认 ``namespace`` ）中，
+    每个命名空间的内部ID集合由元数据倒排索引维护，按命名空间筛选时作为ID选择器参与检索。
+    命名空间可以单独保存（:meth:`save_namespace`）、加载（:meth:`load_namespace`）和删除（:meth:`drop_namespace`），
+    :class:`NamespacedVectorStore` 把单个命名空间包装为独立的向量存储。
+    
+    :meth:`reindex_async` 在后台线程中从原始向量构建新索引（调整参数、重新训练IVF聚类中心或清理已删除的向量），
+    构建期间旧索引继续提供检索，新写入照常生效并记录下来，构建完成后重放到新索引再整体替换。
+    """
+
+    # 支持的索引类型
+    SUPPORTED_INDEX_TYPES = ('flat', 'ivf_flat', 'hnsw', 'sq8', 'ivf_sq8', 'pq', 'ivf_pq')
+    
+    # 基于倒排文件的索引类型
+    IVF_INDEX_TYPES = ('ivf_flat', 'ivf_sq8', 'ivf_pq')
+    
+    # 有损压缩（量化）的索引类型
+    QUANTIZED_INDEX_TYPES = ('sq8', 'ivf_sq8', 'pq', 'ivf_pq')
+    
+    # 支持的相似度度量
+    SUPPORTED_METRICS = ('l2', 'ip', 'cosine')
+    
+    # 重建索引时每批添加的向量数量
+    REBUILD_BATCH_SIZE = 65536
+    
+    # 每个聚类中心（码字）建议的训练向量数量，训练样本不足时向量达到该数量后在后台重新训练一次
+    TRAIN_POINTS_PER_CENTROID = 39
+    
+    # 可在重建索引时调整的索引参数
+    INDEX_PARAMS = ('nlist', 'nprobe', 'hnsw_m', 'ef_construction', 'ef_search', 'pq_m', 'pq_nbits', 'refine_factor')
 
     def _initialize(self):
         """初始化FAISS向量存储"""
         # 获取维度信息
         self.dimension = self.config.get('dimension', 1536)  # 默认使用OpenAI embedding的维度
         
+        # 索引类型及其调优参数
+        self.index_type = self.config.get('index_type', 'flat').lower()
+        if self.index_type not in self.SUPPORTED_INDEX_TYPES:
+            raise ValueError(f"Unsupported index type: {self.index_type}")
+        
+        # 相似度度量，兼容配置文件中的similarity_metric
+        self._set_metric(self.config.get('metric', self.config.get('similarity_metric', 'l2')))
+        
+        self.nlist = self.config.get('nlist', 100)
+        self.nprobe = self.config.get('nprobe', 10)
+        self.hnsw_m = self.config.get('hnsw_m', 32)
+        self.ef_construction = self.config.get('ef_construction', 40)
+        self.ef_search = self.config.get('ef_search', 16)
+        self.pq_m = self.config.get('pq_m') or self._default_pq_m()
+        self.pq_nbits = self.config.get('pq_nbits', 8)
+        
+        # 量化索引的精确重排倍数，1表示不重排
+        self.refine_factor = self.config.get('refine_factor', 1)
+        
+        # 重建索引时用于训练的最大向量数量
+        self.max_train_size = self.config.get('max_train_size', 100000)
+        
+        # 筛选后候选数量不超过该值时，直接对候选向量做精确检索
+        self.filter_exact_threshold = self.config.get('filter_exact_threshold', 4096)
+        
+        # 已删除但仍留在索引中的向量占比超过该值时，在后台重建索引
+        self.tombstone_reindex_ratio = self.config.get('tombstone_reindex_ratio', 0.2)
+        
+        # 按父文档折叠结果时，候选分块数量为top_k的倍数
+        self.collapse_candidate_factor = self.config.get('collapse_candidate_factor', 4)
+        
+        # MMR重排的相关性权重和候选倍数
+        self.mmr_lambda = self.config.get('mmr_lambda', 0.5)
+        self.mmr_candidate_factor = self.config.get('mmr_candidate_factor', 4)
+        
+        # 保存文档所属命名空间的元数据字段
+        self.namespace_field = self.config.get('namespace_field', 'namespace')
+        
+        # 近重复检测（可选）：skip跳过近重复文档，merge将其ID合并到已有文档的元数据中
+        self.dedup = self.config.get('dedup')
+        if self.dedup not in (None, 'skip', 'merge'):
+            raise ValueError(f"Unsupported dedup mode: {self.dedup}")
+        self._simhasher = SimHasher() if self.dedup else None
+        self._near_duplicates = NearDuplicateIndex(self.config.get('dedup_max_distance', 3)) if self.dedup else None
+        
+        # 预写日志配置
+        self.wal_enabled = self.config.get('wal_enabled', False)
+        self.wal_compact_threshold = self.config.get('wal_compact_threshold', 10000)
+        self.wal_fsync = self.config.get('wal_fsync', False)
+        
+        # 当前绑定的保存路径的预写日志（首次保存或加载后绑定）
+        self._wal: Optional[WriteAheadLog] = None
+        self._wal_generation = 0
+        
+        # 读写锁：检索并发执行，写操作互斥且与检索互斥；后台重建索引期间，写入索引的操作按顺序记录在_rebuild_log中
+        self._lock = ReadWriteLock()
+        self._rebuild_log: Optional[List[Tuple[str, Any]]] = None
+        self._rebuild_future: Optional[Future] = None
+        self._rebuild_executor: Optional[ThreadPoolExecutor] = None
+        
         # 初始化FAISS索引
-        self.index = faiss.IndexFlatL2(self.dimension)  # 使用L2距离
+        self.index = self._create_index()
         
-        # 存储文档ID到内容的映射
-        self.id_to_doc = {}
+        # 文档内容存储（按内部ID保存）
+        self._docstore = BinaryDocStore()
         
         # 存储文档ID到元数据的映射
         self.id_to_metadata = {}
         
-        # 获取嵌入模型（可选）
-        self.embedding_model = self.config.get('embedding_model')
+        # 文档ID与FAISS内部int64 ID的双向映射
+        self._id_to_int: Dict[str, int] = {}
+        self._int_to_id: Dict[int, str] = {}
+        self._next_int_id = 0
+        
+        # 索引不支持按ID删除（如HNSW）时，已删除但仍留在索引中的内部ID，
+        # 以及检索时排除这些ID的FAISS选择器缓存：(_deleted_int_ids, 缓存时的数量, 选择器)
+        self._deleted_int_ids = set()
+        self._tombstone_cache = None
+        
+        # 训练当前索引使用的向量数量
+        self._trained_size = 0
+        
+        # 元数据倒排索引：元数据键 -> 值 -> 内部ID集合（只索引可哈希的值）
+        self._metadata_index: Dict[str, Dict[Any, Set[int]]] = {}
+        
+        # 原始向量存储，第i行对应内部ID为i的向量；内存中未保存的向量超过embedding_buffer_bytes时写出到文件
+        self.embedding_buffer_bytes = self.config.get('embedding_buffer_bytes', 64 * 1024 * 1024)
+        self._embeddings = EmbeddingStore(
+            self.dimension, self.config.get('embedding_dtype', 'float32'), self.embedding_buffer_bytes
+        )
+        
+        # 嵌入模型（可选）的批处理器和查询向量缓存
+        self._init_embedding()
 
     def add_document(
         self,
@@ -96,23 +262,7 @@ class FAISSVectorStore(BaseVectorStore):
         Returns:
             str: 文档ID
         """
-        # 如果没有提供嵌入向量，尝试使用嵌入模型生成
-        if document.embedding is None and self.embedding_model:
-            document.embedding = self.embedding_model.generate_embedding(document.content)
-        
-        if document.embedding is None:
-            raise ValueError("Document embedding is required")
-        
-        # 添加向量到FAISS索引
-        vector_np = np.array([document.embedding], dtype=np.float32)
-        self.index.add(vector_np)
-        
-        # 存储文档信息
-        self.id_to_doc[document.id] = document.content
-        if document.metadata:
-            self.id_to_metadata[document.id] = document.metadata
-        
-        return document.id
+        return self.add_documents([document])[0]
 
     def add_documents(
         self,
@@ -120,44 +270,179 @@ class FAISSVectorStore(BaseVectorStore):
     ) -> List[str]:
         """批量添加文档到FAISS向量存储
         
+        ID已存在的文档替换旧版本：旧向量与新向量在同一次写锁内批量删除和写入；
+        同一批次中ID重复时以最后一个文档为准。
+        
         Args:
             documents: 要添加的文档列表
             
         Returns:
             List[str]: 文档ID列表
         """
-        document_ids = []
-        vectors = []
+        if not documents:
+            return []
         
-        # 准备向量和ID
-        for doc in documents:
-            # 如果没有提供嵌入向量，尝试使用嵌入模型生成
-            if doc.embedding is None and self.embedding_model:
-                doc.embedding = self.embedding_model.generate_embedding(doc.content)
-            
+        latest = list({doc.id: doc for doc in documents}.values())
+        input_ids = [doc.id for doc in latest]
+        
+        # 近重复检测在生成嵌入向量之前进行，将被替换的旧版本不参与检测；
+        # 分词计算指纹较慢，在加锁之前完成，写锁只覆盖LSH查找和元数据合并
+        fingerprints = None
+        canonical_ids = None
+        if self._near_duplicates is not None:
+            fingerprints = [self._simhasher.fingerprint(doc.content) for doc in latest]
+            with self._lock.write_locked():
+                replaced = {self._id_to_int[document_id] for document_id in input_ids if document_id in self._id_to_int}
+                latest, fingerprints, result_ids = self._deduplicate(latest, fingerprints, replaced)
+            canonical_ids = dict(zip(input_ids, result_ids))
+        
+        # 如果没有提供嵌入向量，尝试使用嵌入模型批量生成
+        self._embed_documents(latest)
+        
+        for doc in latest:
             if doc.embedding is None:
                 raise ValueError(f"Document embedding is required for document {doc.id}")
+        
+        vectors_np = np.array([doc.embedding for doc in latest], dtype=np.float32)
+        if self.metric == 'cosine' and len(latest) > 0:
+            faiss.normalize_L2(vectors_np)
+        
+        # 在写锁内删除旧版本、分配内部ID、写入并记录日志，保证日志顺序与写入顺序一致
+        with self._lock.write_locked():
+            replaced_ids = [document_id for document_id in input_ids if document_id in self._id_to_int]
+            if replaced_ids:
+                self._delete(replaced_ids)
+                if self._wal is not None:
+                    for document_id in replaced_ids:
+                        self._wal.append_delete(document_id)
+            
+            if latest:
+                int_ids = np.arange(self._next_int_id, self._next_int_id + len(latest), dtype=np.int64)
+                self._insert(latest, int_ids, vectors_np, fingerprints)
+                
+                if self._wal is not None:
+                    for doc, int_id, vector in zip(latest, int_ids.tolist(), vectors_np):
+                        self._wal.append_add(int_id, doc.id, doc.content, doc.metadata, vector)
+        
+        self._retrain_if_undertrained()
+        self._reindex_if_fragmented()
+        
+        if canonical_ids is not None:
+            return [canonical_ids[doc.id] for doc in documents]
+        return [doc.id for doc in documents]
+
+    def _deduplicate(
+        self,
+        documents: List[VectorStoreDocument],
+        fingerprints: List[Optional[int]],
+        exclude: Optional[Set[int]] = None
+    ):
+        """过滤近重复文档（调用方持有写锁）
+        
+        Args:
+            documents: 待添加的文档列表
+            fingerprints: 与文档一一对应的SimHash指纹
+            exclude: 不参与检测的内部ID集合（可选，如即将被替换的旧版本）
             
-            vectors.append(doc.embedding)
-            document_ids.append(doc.id)
+        Returns:
+            Tuple[List[VectorStoreDocument], List[Optional[int]], List[str]]:
+                需要写入的文档、对应的指纹，以及与输入一一对应的文档ID（近重复文档为已有文档的ID）
+        """
+        kept: List[VectorStoreDocument] = []
+        kept_fingerprints: List[Optional[int]] = []
+        result_ids: List[str] = []
+        batch_index = NearDuplicateIndex(self._near_duplicates.max_distance)
+        
+        for doc, fingerprint in zip(documents, fingerprints):
+            if fingerprint is None:
+                match, batch_match = None, None
+            else:
+                match = self._near_duplicates.find(fingerprint, exclude)
+                batch_match = batch_index.find(fingerprint) if match is None else None
             
-            # 存储文档信息
-            self.id_to_doc[doc.id] = doc.content
-            if doc.metadata:
-                self.id_to_metadata[doc.id] = doc.metadata
+            if match is not None:
+                canonical_id = self._int_to_id[match[0]]
+                if self.dedup == 'merge':
+                    metadata = dict(self.id_to_metadata.get(canonical_id, {}))
+                    metadata['duplicate_ids'] = list(metadata.get('duplicate_ids', [])) + [doc.id]
+                    self._set_metadata(canonical_id, metadata)
+                    if self._wal is not None:
+                        self._wal.append_update_metadata(canonical_id, metadata)
+                result_ids.append(canonical_id)
+            elif batch_match is not None:
+                canonical = kept[batch_match[0]]
+                if self.dedup == 'merge':
+                    canonical.metadata = dict(canonical.metadata)
+                    canonical.metadata['duplicate_ids'] = list(canonical.metadata.get('duplicate_ids', [])) + [doc.id]
+                result_ids.append(canonical.id)
+            else:
+                if fingerprint is not None:
+                    batch_index.add(len(kept), fingerprint)
+                kept.append(doc)
+                kept_fingerprints.append(fingerprint)
+                result_ids.append(doc.id)
+        
+        skipped = len(documents) - len(kept)
+        if skipped:
+            logger.info(f"Skipped {skipped} near-duplicate documents ({self.dedup})")
+        return kept, kept_fingerprints, result_ids
+
+    def _set_metadata(self, document_id: str, metadata: Dict) -> None:
+        """替换文档元数据并更新倒排索引（不记录预写日志）
+        
+        Args:
+            document_id: 文档ID
+            metadata: 新的元数据
+        """
+        int_id = self._id_to_int[document_id]
+        self._unindex_metadata(int_id, self.id_to_metadata.get(document_id))
+        self.id_to_metadata[document_id] = metadata
+        self._index_metadata(int_id, metadata)
+
+    def _insert(self, documents: List[VectorStoreDocument], int_ids, vectors, fingerprints=None) -> None:
+        """以指定的内部ID写入文档和向量（不记录预写日志）
         
-        # 批量添加向量到FAISS索引
-        vectors_np = np.array(vectors, dtype=np.float32)
-        self.index.add(vectors_np)
+        Args:
+            documents: 文档列表
+            int_ids: 内部ID数组（int64）
+            vectors: 向量矩阵（float32）
+            fingerprints: 文档的SimHash指纹（可选，开启近重复检测且未提供时重新计算）
+        """
+        if self._near_duplicates is not None and fingerprints is None:
+            fingerprints = [self._simhasher.fingerprint(doc.content) for doc in documents]
         
-        return document_ids
+        with self._lock.write_locked():
+            self._next_int_id = max(self._next_int_id, int(int_ids[-1]) + 1)
+            
+            for doc, int_id in zip(documents, int_ids.tolist()):
+                # 存储文档信息
+                self._docstore.put(int_id, doc.content)
+                if doc.metadata:
+                    self.id_to_metadata[doc.id] = doc.metadata
+                self._id_to_int[doc.id] = int_id
+                self._int_to_id[int_id] = doc.id
+                self._index_metadata(int_id, doc.metadata)
+            
+            if self._near_duplicates is not None:
+                for int_id, fingerprint in zip(int_ids.tolist(), fingerprints):
+                    if fingerprint is not None:
+                        self._near_duplicates.add(int_id, fingerprint)
+            
+            # 保存原始向量并批量添加到FAISS索引
+            self._embeddings.append(vectors)
+            self._add_vectors(vectors, int_ids)
+            if self._rebuild_log is not None:
+                self._rebuild_log.append(('add', int_ids))
 
     def search(
         self,
         query: str,
         embedding: Optional[List[float]] = None,
         top_k: int = 5,
-        filters: Optional[Dict] = None
+        filters: Optional[Dict] = None,
+        collapse_by_parent: bool = False,
+        mmr: bool = False,
+        mmr_lambda: Optional[float] = None
     ) -> List[Tuple[VectorStoreDocument, float]]:
         """搜索相似文档
         
@@ -166,43 +451,293 @@ class FAISSVectorStore(BaseVectorStore):
             embedding: 查询向量（可选，如不提供则自动生成）
             top_k: 返回的最大结果数
             filters: 筛选条件（可选）
+            collapse_by_parent: 是否按父文档折叠结果，同一文档的多个分块只返回最相关的一个
+            mmr: 是否使用最大边际相关性（MMR）重排，在相关的前提下减少内容重复的结果
+            mmr_lambda: MMR的相关性权重（可选，默认使用配置中的mmr_lambda）
             
         Returns:
-            List[Tuple[VectorStoreDocument, float]]: 文档和相似度分数的列表
+            List[Tuple[VectorStoreDocument, float]]: 文档和分数的列表（l2为距离，ip/cosine为相似度）
+        """
+        embeddings = [embedding] if embedding is not None else None
+        return self.search_batch(
+            [query], embeddings=embeddings, top_k=top_k, filters=filters,
+            collapse_by_parent=collapse_by_parent, mmr=mmr, mmr_lambda=mmr_lambda
+        )[0]
+
+    def search_batch(
+        self,
+        queries: List[str],
+        embeddings: Optional[List[Optional[List[float]]]] = None,
+        top_k: int = 5,
+        filters: Optional[Dict] = None,
+        collapse_by_parent: bool = False,
+        mmr: bool = False,
+        mmr_lambda: Optional[float] = None
+    ) -> List[List[Tuple[VectorStoreDocument, float]]]:
+        """批量搜索相似文档，所有查询向量合并为一个矩阵后只调用一次FAISS检索
+        
+        Args:
+            queries: 搜索查询列表
+            embeddings: 与查询一一对应的查询向量列表（可选，缺失的向量自动生成）
+            top_k: 每个查询返回的最大结果数
+            filters: 筛选条件（可选，对所有查询生效）
+            collapse_by_parent: 是否按父文档折叠结果，同一文档的多个分块只返回最相关的一个
+            mmr: 是否使用最大边际相关性（MMR）重排，在相关的前提下减少内容重复的结果
+            mmr_lambda: MMR的相关性权重（可选，默认使用配置中的mmr_lambda）
+            
+        Returns:
+            List[List[Tuple[VectorStoreDocument, float]]]: 每个查询的文档和相似度分数列表
         """
-        # 如果没有提供查询向量，尝试使用嵌入模型生成
-        if embedding is None and self.embedding_model:
-            embedding = self.embedding_model.generate_embedding(query)
+        if mmr:
+            # 多取候选文档，再用MMR从候选中选出top_k个；查询向量只生成一次
+            query_vectors = self._embed_queries(queries, embeddings)
+            lambda_mult = self.mmr_lambda if mmr_lambda is None else mmr_lambda
+            with self._lock.read_locked():
+                results = self.search_batch(
+                    queries, query_vectors, top_k * self.mmr_candidate_factor, filters, collapse_by_parent
+                )
+                return [
+                    self._mmr_rerank(query_vector, hits, top_k, lambda_mult)
+                    for query_vector, hits in zip(query_vectors, results)
+                ]
         
-        if embedding is None:
-            raise ValueError("Query embedding is required")
+        if collapse_by_parent:
+            # 多取候选分块，折叠后仍尽量返回top_k个父文档
+            results = self.search_batch(queries, embeddings, top_k * self.collapse_candidate_factor, filters)
+            return [collapse_search_results(hits, top_k) for hits in results]
         
-        # 执行搜索
-        query_vector = np.array([embedding], dtype=np.float32)
-        distances, indices = self.index.search(query_vector, min(top_k, self.index.ntotal))
+        query_vectors = self._embed_queries(queries, embeddings)
         
-        # 准备结果
-        results = []
-        document_ids = list(self.id_to_doc.keys())
+        if not queries:
+            return []
         
-        for i, idx in enumerate(indices[0]):
-            if 0 <= idx < len(document_ids):
-                doc_id = document_ids[idx]
-                content = self.id_to_doc[doc_id]
-                metadata = self.id_to_metadata.get(doc_id, {})
-                
-                # 应用筛选条件
-                if filters and not self._match_filters(metadata, filters):
-                    continue
+        with self._lock.read_locked():
+            if not self._int_to_id:
+                return [[] for _ in queries]
+            
+            # 通过元数据倒排索引确定候选集合，无法通过倒排索引筛选时退回到检索后筛选
+            candidate_ids = self._select_ids(filters) if filters else None
+            if candidate_ids is not None:
+                return self._search_ids(query_vectors, candidate_ids, top_k)
+            
+            if not self.index.is_trained:
+                # 训练样本不足时向量尚未加入索引，对全部向量做精确检索
+                int_ids = np.array(sorted(self._int_to_id), dtype=np.int64)
+                distances, indices = self._exact_search(query_vectors, int_ids, len(int_ids) if filters else top_k)
+                return [
+                    self._collect_results(distances[i], indices[i], top_k, filters)
+                    for i in range(len(queries))
+                ]
+            
+            # 执行搜索（已删除但仍留在索引中的向量通过ID选择器排除）
+            k = min(top_k, self.index.ntotal)
+            selector = self._tombstone_selector()
+            distances, indices = self.index.search(
+                query_vectors, min(k * self._refine_multiplier(), self.index.ntotal),
+                params=self._search_params(selector) if selector is not None else None
+            )
+            distances, indices = self._refine(query_vectors, distances, indices, k)
+            
+            return [
+                self._collect_results(distances[i], indices[i], top_k, filters)
+                for i in range(len(queries))
+            ]
+
+    def _search_ids(
+        self,
+        query_vectors,
+        candidate_ids,
+        top_k: int,
+        filters: Optional[Dict] = None
+    ) -> List[List[Tuple[VectorStoreDocument, float]]]:
+        """只在候选内部ID中检索
+        
+        候选数量不超过 ``filter_exact_threshold`` 或索引尚未训练时直接对候选向量做精确检索，
+        否则以ID选择器的方式交给FAISS检索。
+        
+        Args:
+            query_vectors: float32查询向量矩阵
+            candidate_ids: 有序的候选内部ID数组（int64）
+            top_k: 每个查询返回的最大结果数
+            filters: 检索后再应用的筛选条件（可选）
+            
+        Returns:
+            List[List[Tuple[VectorStoreDocument, float]]]: 每个查询的文档和分数列表
+        """
+        if len(candidate_ids) == 0:
+            return [[] for _ in range(len(query_vectors))]
+        
+        if len(candidate_ids) <= self.filter_exact_threshold or not self.index.is_trained:
+            distances, indices = self._exact_search(query_vectors, candidate_ids, top_k)
+        else:
+            params = self._search_params(faiss.IDSelectorBatch(candidate_ids))
+            k = min(top_k * self._refine_multiplier(), len(candidate_ids))
+            distances, indices = self.index.search(query_vectors, k, params=params)
+            distances, indices = self._refine(query_vectors, distances, indices, top_k)
+        
+        return [
+            self._collect_results(distances[i], indices[i], top_k, filters)
+            for i in range(len(query_vectors))
+        ]
+
+    def search_batch_where(
+        self,
+        queries: List[str],
+        embeddings: Optional[List[Optional[List[float]]]],
+        top_k: int,
+        field: str,
+        predicate: Callable[[Any], bool],
+        filters: Optional[Dict] = None
+    ) -> List[List[Tuple[VectorStoreDocument, float]]]:
+        """只在元数据字段取值满足条件的文档中批量检索
+        
+        候选文档由元数据倒排索引中满足条件的字段取值确定，不逐个读取文档的元数据，
+        适合日期范围等无法用等值筛选条件表达的检索。
+        
+        Args:
+            queries: 搜索查询列表
+            embeddings: 与查询一一对应的查询向量列表（可选，缺失的向量自动生成）
+            top_k: 每个查询返回的最大结果数
+            field: 元数据字段
+            predicate: 字段取值的判断函数，返回True的取值对应的文档参与检索
+            filters: 筛选条件（可选，对所有查询生效）
+            
+        Returns:
+            List[List[Tuple[VectorStoreDocument, float]]]: 每个查询的文档和分数列表
+        """
+        query_vectors = self._embed_queries(queries, embeddings)
+        
+        with self._lock.read_locked():
+            # 通过倒排索引中满足条件的取值确定候选文档，再与可索引的筛选条件求交集
+            id_sets = [
+                int_ids for value, int_ids in self._metadata_index.get(field, {}).items()
+                if predicate(value)
+            ]
+            candidate_ids = np.array(sorted(set().union(*id_sets)), dtype=np.int64)
+            if filters:
+                selected = self._select_ids(filters)
+                if selected is not None:
+                    candidate_ids, filters = np.intersect1d(candidate_ids, selected), None
+            
+            return self._search_ids(query_vectors, candidate_ids, top_k, filters)
+
+    def search_range(
+        self,
+        query: str,
+        radius: float,
+        embedding: Optional[List[float]] = None,
+        max_results: Optional[int] = None,
+        filters: Optional[Dict] = None
+    ) -> List[Tuple[VectorStoreDocument, float]]:
+        """搜索分数在半径范围内的所有文档
+        
+        l2度量下返回距离（与search相同，为L2距离的平方）小于radius的文档，ip/cosine度量下返回相似度大于radius的文档。
+        使用FAISS范围检索，工作量与范围内的文档数量相关。量化索引按近似分数确定候选，
+        半径边界附近的文档可能遗漏，候选的分数使用原始向量重新计算后再按半径过滤。
+        
+        Args:
+            query: 搜索查询
+            radius: 距离上限（l2）或相似度下限（ip/cosine）
+            embedding: 查询向量（可选，如不提供则自动生成）
+            max_results: 返回的最大结果数（可选，默认不限制）
+            filters: 筛选条件（可选）
+            
+        Returns:
+            List[Tuple[VectorStoreDocument, float]]: 按相似度排序的文档和分数列表
+        """
+        query_vectors = self._embed_queries([query], [embedding] if embedding is not None else None)
+        
+        with self._lock.read_locked():
+            if not self._int_to_id or max_results == 0:
+                return []
+            
+            # 与search_batch相同，优先通过元数据倒排索引确定候选集合；索引尚未训练时以全部向量为候选
+            candidate_ids = self._select_ids(filters) if filters else None
+            if candidate_ids is not None:
+                filters = None
+            elif not self.index.is_trained:
+                candidate_ids = np.array(sorted(self._int_to_id), dtype=np.int64)
+            
+            if candidate_ids is not None:
+                if len(candidate_ids) == 0:
+                    return []
                 
-                document = VectorStoreDocument(
-                    id=doc_id,
-                    content=content,
-                    metadata=metadata
-                )
-                results.append((document, distances[0][i]))
+                if len(candidate_ids) <= self.filter_exact_threshold or not self.index.is_trained:
+                    scores, int_ids = self._exact_scores(query_vectors[0], candidate_ids), candidate_ids
+                else:
+                    scores, int_ids = self._range_search(query_vectors, radius, faiss.IDSelectorBatch(candidate_ids), max_results)
+            else:
+                scores, int_ids = self._range_search(query_vectors, radius, self._tombstone_selector(), max_results)
+            
+            if self.index_type in self.QUANTIZED_INDEX_TYPES and len(int_ids) > 0:
+                scores = self._exact_scores(query_vectors[0], int_ids)
+            
+            within = scores > radius if self.higher_is_better else scores < radius
+            scores, int_ids = scores[within], int_ids[within]
+            order = np.argsort(-scores if self.higher_is_better else scores, kind='stable')
+            
+            return self._collect_results(scores[order], int_ids[order], max_results or len(order), filters)
+
+    def _range_search(self, query_vectors, radius: float, selector=None, max_results: Optional[int] = None):
+        """对单个查询执行FAISS范围检索
         
-        return results
+        Args:
+            query_vectors: 只有一行的float32查询向量矩阵
+            radius: 距离上限（l2）或相似度下限（ip/cosine）
+            selector: FAISS的ID选择器（可选）
+            max_results: 需要的最大结果数（可选，只用于不支持范围检索时的回退）
+            
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: 范围内的分数数组和内部ID数组
+        """
+        params = self._search_params(selector)
+        try:
+            _, distances, indices = self.index.range_search(query_vectors, radius, params=params)
+            return distances, indices
+        except RuntimeError:
+            # 旧版本FAISS的部分索引不支持范围检索，退回到逐步加倍k的top-k检索
+            pass
+        
+        ntotal = self.index.ntotal
+        k = min(max(max_results or 0, 64), ntotal)
+        while True:
+            distances, indices = self.index.search(query_vectors, k, params=params)
+            distances, indices = distances[0], indices[0]
+            within = (indices >= 0) & (distances > radius if self.higher_is_better else distances < radius)
+            
+            # 第k个结果已超出半径、已取完全部向量或结果数量已足够时停止
+            enough = max_results is not None and within.sum() >= max_results
+            if not within[-1] or k >= ntotal or enough:
+                return distances[within], indices[within]
+            k = min(k * 2, ntotal)
+
+    def _exact_scores(self, query_vector, int_ids):
+        """使用原始向量计算查询与候选向量的精确分数
+        
+        Args:
+            query_vector: float32查询向量
+            int_ids: 候选内部ID数组（int64）
+            
+        Returns:
+            np.ndarray: 分数数组（l2为L2距离的平方，ip/cosine为内积）
+        """
+        vectors = self._embeddings.get(int_ids)
+        if self.higher_is_better:
+            return vectors @ query_vector
+        return ((vectors - query_vector) ** 2).sum(axis=1)
+
+    def _document_vectors(self, document_ids: List[str]) -> np.ndarray:
+        """获取文档的已保存向量（cosine度量下为归一化后的向量）
+        
+        Args:
+            document_ids: 文档ID列表
+            
+        Returns:
+            np.ndarray: 与文档ID一一对应的float32向量矩阵
+        """
+        with self._lock.read_locked():
+            int_ids = np.array([self._id_to_int[document_id] for document_id in document_ids], dtype=np.int64)
+            return self._embeddings.get(int_ids)
 
     def get_document(
         self,
@@ -216,14 +751,28 @@ class FAISSVectorStore(BaseVectorStore):
         Returns:
             Optional[VectorStoreDocument]: 文档对象，如果不存在则返回None
         """
-        if document_id not in self.id_to_doc:
-            return None
+        with self._lock.read_locked():
+            int_id = self._id_to_int.get(document_id)
+            if int_id is None:
+                return None
+            
+            return VectorStoreDocument(
+                id=document_id,
+                content=self._docstore.get(int_id),
+                metadata=self.id_to_metadata.get(document_id, {})
+            )
+
+    def __contains__(self, document_id: str) -> bool:
+        """检查文档是否存在
         
-        return VectorStoreDocument(
-            id=document_id,
-            content=self.id_to_doc[document_id],
-            metadata=self.id_to_metadata.get(document_id, {})
-        )
+        Args:
+            document_id: 文档ID
+            
+        Returns:
+            bool: 文档是否存在
+        """
+        with self._lock.read_locked():
+            return document_id in self._id_to_int
 
     def delete_document(
         self,
@@ -237,99 +786,1247 @@ class FAISSVectorStore(BaseVectorStore):
         Returns:
             bool: 是否删除成功
         """
-        if document_id not in self.id_to_doc:
-            return False
+        return self.delete_documents([document_id]) > 0
+
+    def delete_documents(
+        self,
+        document_ids: List[str]
+    ) -> int:
+        """批量删除文档，所有向量通过一次索引操作删除
         
-        # 在FAISS中删除向量（注意：FAISS的IndexFlatL2不直接支持按ID删除，这里需要重建索引）
-        # 实际应用中，可能需要使用FAISS的IndexIDMap包装器来支持按ID删除
-        # 这里我们简化处理，只从映射中删除
-        del self.id_to_doc[document_id]
-        if document_id in self.id_to_metadata:
-            del self.id_to_metadata[document_id]
+        Args:
+            document_ids: 文档ID列表
+            
+        Returns:
+            int: 实际删除的文档数量
+        """
+        with self._lock.write_locked():
+            document_ids = [document_id for document_id in dict.fromkeys(document_ids) if document_id in self._id_to_int]
+            if not document_ids:
+                return 0
+            
+            self._delete(document_ids)
+            if self._wal is not None:
+                for document_id in document_ids:
+                    self._wal.append_delete(document_id)
         
-        # 重建索引
-        self._rebuild_index()
+        self._reindex_if_fragmented()
+        return len(document_ids)
+
+    def _delete(self, document_ids: List[str]) -> None:
+        """删除文档及其向量（不记录预写日志）
         
-        return True
+        Args:
+            document_ids: 文档ID列表（必须存在且不重复）
+        """
+        with self._lock.write_locked():
+            int_ids = []
+            for document_id in document_ids:
+                metadata = self.id_to_metadata.pop(document_id, None)
+                int_id = self._id_to_int.pop(document_id)
+                del self._int_to_id[int_id]
+                self._docstore.delete(int_id)
+                self._unindex_metadata(int_id, metadata)
+                if self._near_duplicates is not None:
+                    self._near_duplicates.remove(int_id)
+                int_ids.append(int_id)
+            
+            # 从FAISS索引中批量原地删除对应向量
+            self._remove_vectors(int_ids)
+            if self._rebuild_log is not None:
+                self._rebuild_log.append(('remove', int_ids))
 
     def clear(self) -> None:
         """清空向量存储"""
-        self.index = faiss.IndexFlatL2(self.dimension)
-        self.id_to_doc.clear()
-        self.id_to_metadata.clear()
+        with self._lock.write_locked():
+            self._reset()
+            if self._wal is not None:
+                self._wal.append_clear()
 
-    def save(self, path: str) -> None:
-        """保存向量存储到文件
+    def _reset(self) -> None:
+        """清空所有文档、向量和索引（不记录预写日志）"""
+        with self._lock.write_locked():
+            # 内部ID从0重新分配，正在进行的后台重建已无意义
+            self._rebuild_log = None
+            self.index = self._create_index()
+            self._docstore.clear()
+            self.id_to_metadata.clear()
+            self._id_to_int.clear()
+            self._int_to_id.clear()
+            self._next_int_id = 0
+            self._deleted_int_ids.clear()
+            self._tombstone_cache = None
+            self._trained_size = 0
+            self._metadata_index.clear()
+            self._embeddings.clear()
+            if self._near_duplicates is not None:
+                self._near_duplicates.clear()
+
+    def list_namespaces(self) -> Dict[str, int]:
+        """列出所有命名空间
+        
+        Returns:
+            Dict[str, int]: 命名空间 -> 文档数量
+        """
+        with self._lock.read_locked():
+            return {
+                namespace: len(int_ids)
+                for namespace, int_ids in self._metadata_index.get(self.namespace_field, {}).items()
+                if int_ids
+            }
+
+    def drop_namespace(self, namespace: str) -> int:
+        """删除命名空间中的所有文档（一次批量删除）
         
         Args:
-            path: 保存路径
+            namespace: 命名空间
+            
+        Returns:
+            int: 删除的文档数量
         """
-        # 确保目录存在
-        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._lock.write_locked():
+            int_ids = self._metadata_index.get(self.namespace_field, {}).get(namespace, ())
+            return self.delete_documents([self._int_to_id[int_id] for int_id in int_ids])
+
+    def save_namespace(self, namespace: str, path: str) -> int:
+        """将命名空间中的文档单独保存为一个向量存储
         
-        # 保存FAISS索引
-        index_path = f"{path}_index.faiss"
-        faiss.write_index(self.index, index_path)
+        保存的文件与普通的FAISSVectorStore格式相同，向量直接从已保存的原始向量复制，不调用嵌入模型。
         
-        # 保存文档映射
-        data = {
-            'id_to_doc': self.id_to_doc,
-            'id_to_metadata': self.id_to_metadata,
-            'dimension': self.dimension
-        }
+        Args:
+            namespace: 命名空间
+            path: 保存路径
+            
+        Returns:
+            int: 保存的文档数量
+        """
+        with self._lock.read_locked():
+            int_ids = sorted(self._metadata_index.get(self.namespace_field, {}).get(namespace, ()))
+            documents = self._load_documents(int_ids, include_embeddings=True)
         
-        with open(f"{path}_data.json", 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        store = self._namespace_store()
+        store.add_documents(documents)
+        store.save(path)
+        logger.info(f"Saved {len(documents)} documents of namespace '{namespace}' to {path}")
+        return len(documents)
 
-    def load(self, path: str) -> None:
-        """从文件加载向量存储
+    def load_namespace(self, namespace: str, path: str) -> int:
+        """从save_namespace保存的文件加载命名空间，替换该命名空间中现有的文档
+        
+        文件中有文档但都不属于该命名空间时（例如其他命名空间保存的文件）抛出ValueError，不修改现有文档。
         
         Args:
+            namespace: 命名空间
             path: 加载路径
+            
+        Returns:
+            int: 加载的文档数量
         """
-        # 加载FAISS索引
-        index_path = f"{path}_index.faiss"
-        if os.path.exists(index_path):
-            self.index = faiss.read_index(index_path)
+        store = self._namespace_store()
+        store.load(path)
+        documents = [
+            doc for doc in store.iter_documents(include_embeddings=True)
+            if doc.metadata.get(self.namespace_field) == namespace
+        ]
+        if store.count() and not documents:
+            found = sorted(map(str, store.list_namespaces()))
+            raise ValueError(f"{path} holds no documents of namespace '{namespace}' (found: {', '.join(found)})")
         
-        # 加载文档映射
-        data_path = f"{path}_data.json"
-        if os.path.exists(data_path):
-            with open(data_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                
-            self.id_to_doc = data.get('id_to_doc', {})
-            self.id_to_metadata = data.get('id_to_metadata', {})
-            self.dimension = data.get('dimension', 1536)
+        with self._lock.write_locked():
+            self.drop_namespace(namespace)
+            self.add_documents(documents)
+        logger.info(f"Loaded {len(documents)} documents of namespace '{namespace}' from {path}")
+        return len(documents)
 
-    def count(self) -> int:
-        """获取向量存储中的文档数量
+    def _namespace_store(self) -> 'FAISSVectorStore':
+        """创建单独保存/加载命名空间时使用的临时存储
+        
+        使用相同的索引配置，不绑定路径，也不使用预写日志、近重复检测和嵌入模型。
         
         Returns:
-            int: 文档数量
+            FAISSVectorStore: 空的向量存储
         """
-        return len(self.id_to_doc)
+        return FAISSVectorStore(**{
+            **self.config,
+            'index_type': self.index_type,
+            'index_path': None,
+            'wal_enabled': False,
+            'dedup': None,
+            'embedding_model': None
+        })
 
-    def _match_filters(self, metadata: Dict, filters: Dict) -> bool:
-        """检查元数据是否匹配筛选条件
+    def save(self, path: Optional[str] = None) -> None:
+        """保存向量存储到文件
+        
+        开启预写日志且保存到已绑定的路径时，只把日志刷新到磁盘；
+        日志中的操作数达到 ``wal_compact_threshold`` 后才写入完整快照并换用新的日志。
+        写入完整快照期间持有写锁，检索需要等待快照写完。
         
         Args:
-            metadata: 文档元数据
-            filters: 筛选条件
+            path: 保存路径（可选，默认使用已绑定的路径或配置项index_path）
+        """
+        path = self._resolve_path(path)
+        with self._lock.write_locked():
+            self._save(path)
+
+    def _save(self, path: str) -> None:
+        """在写锁内保存向量存储
+        
+        Args:
+            path: 保存路径
+        """
+        if (
+            self._wal is not None
+            and path == self._persist_path
+            and self._wal.count < self.wal_compact_threshold
+        ):
+            self._wal.flush()
+            return
+        
+        # 写入新的快照并换用新一代的日志（清除该路径下可能残留的同代日志）。
+        # 代数大于目标路径下已有的所有文件，新快照不会覆盖当前快照引用的文件
+        previous_wal = self._wal if path == self._persist_path else None
+        self._wal_generation = max(self._wal_generation, self._latest_generation(path)) + 1
+        wal = WriteAheadLog(path, self._wal_generation, fsync=self.wal_fsync)
+        wal.remove()
+        self._write_snapshot(path)
+        self._bind(path, wal)
+        if previous_wal is not None:
+            previous_wal.remove()
+
+    def load(self, path: Optional[str] = None) -> None:
+        """从文件加载向量存储
+        
+        索引文件缺失或配置的索引类型与保存时不同时，从向量文件重建索引。
+        开启预写日志时，加载快照后重放快照之后记录的操作。
+        
+        Args:
+            path: 加载路径（可选，默认使用已绑定的路径或配置项index_path）
+        """
+        path = self._resolve_path(path)
+        self._wait_for_rebuild()
+        
+        with self._lock.write_locked():
+            self._load_snapshot(path)
             
-        Returns:
-            bool: 是否匹配
+            wal = WriteAheadLog(path, self._wal_generation, fsync=self.wal_fsync)
+            if self.wal_enabled:
+                self._replay_wal(wal)
+            self._bind(path, wal)
+
+    def close(self) -> None:
+        """关闭预写日志文件
+        
+        存储不再使用（例如所在分区被删除）时调用，之后不应再写入。
         """
-        for key, value in filters.items():
-            if key not in metadata or metadata[key] != value:
-                return False
-        return True
+        with self._lock.write_locked():
+            if self._wal is not None:
+                self._wal.close()
+
+    def _bind(self, path: str, wal: WriteAheadLog) -> None:
+        """绑定保存路径，开启预写日志时之后的写操作记录到指定日志
+        
+        Args:
+            path: 保存路径
+            wal: 与当前快照对应的预写日志
+        """
+        if self._wal is not None:
+            self._wal.close()
+        
+        self._persist_path = path
+        self._wal = wal if self.wal_enabled else None
 
-    def _rebuild_index(self) -> None:
-        """重建FAISS索引"""
-        # 这是一个简化的实现，实际应用中应该使用更高效的方法
-        self.index = faiss.IndexFlatL2(self.dimension)
-        document_ids = list(self.id_to_doc.keys())
+    def _write_snapshot(self, path: str) -> None:
+        """写入完整快照
+        
+        向量文件和文档内容文件只在末尾追加（已有内容不变），其余文件都写入以快照代数命名的新文件，
+        数据文件记录快照引用的文件名，最后原子替换数据文件作为快照提交的标志，之后才删除旧快照的文件。
+        任何一步中断时，旧的数据文件引用的文件都保持完整，加载时得到旧快照并重放对应的日志。
         
-        # 注意：这里假设文档内容中存储了嵌入向量
-        # 在实际应用中，应该单独存储嵌入向量或能够重新生成它们
\ No newline at end of file
+        Args:
+            path: 保存路径
+        """
+        # 确保目录存在
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        generation = self._wal_generation
+        
+        # 保存原始向量和文档内容（保存到同一路径时只追加新增部分）
+        embeddings_path = self._embeddings.save(path, generation)
+        docs_path, docs_index_path = self._docstore.save(path, generation)
+        files = {'embeddings': embeddings_path, 'docs': docs_path, 'docs_index': docs_index_path}
+        
+        # 保存近重复检测的指纹
+        if self._near_duplicates is not None:
+            table = np.array(self._near_duplicates.items(), dtype=[('id', '<i8'), ('fingerprint', '<u8')])
+            files['simhash'] = f"{path}_simhash.{generation}.npy"
+            with open(f"{files['simhash']}.tmp", 'wb') as f:
+                np.save(f, table)
+            os.replace(f"{files['simhash']}.tmp", files['simhash'])
+        
+        # 保存FAISS索引
+        files['index'] = f"{path}_index.{generation}.faiss"
+        faiss.write_index(self.index, f"{files['index']}.tmp")
+        os.replace(f"{files['index']}.tmp", files['index'])
+        
+        # 保存元数据、ID映射和快照引用的文件名，数据文件最后替换，作为快照完成的标志
+        data = {
+            'id_to_metadata': self.id_to_metadata,
+            'dimension': self.dimension,
+            'index_type': self.index_type,
+            'metric': self.metric,
+            'embedding_dtype': self._embeddings.dtype.name,
+            'int_ids': self._id_to_int,
+            'next_int_id': self._next_int_id,
+            'deleted_int_ids': sorted(self._deleted_int_ids),
+            'wal_generation': self._wal_generation,
+            'trained_size': self._trained_size,
+            'files': {name: os.path.basename(file_path) for name, file_path in files.items()}
+        }
+        
+        data_path = f"{path}_data.json"
+        with open(f"{data_path}.tmp", 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(f"{data_path}.tmp", data_path)
+        
+        self._remove_stale_files(path, data['files'].values())
+
+    @staticmethod
+    def _snapshot_file_pattern(path: str):
+        """匹配保存路径下快照和日志文件名的正则表达式，分组kind为文件类型，generation为代数（旧版本不带代数的文件为None）
+        
+        Args:
+            path: 保存路径
+            
+        Returns:
+            re.Pattern: 正则表达式
+        """
+        return re.compile(
+            re.escape(os.path.basename(path))
+            + r'_(?P<kind>index|docs|embeddings|simhash|wal)(?:[._](?P<generation>\d+))?\.(?:faiss|bin|idx|npy)$'
+        )
+
+    def _latest_generation(self, path: str) -> int:
+        """获取保存路径下已有快照和日志文件的最大代数
+        
+        Args:
+            path: 保存路径
+            
+        Returns:
+            int: 最大代数，没有带代数的文件时返回0
+        """
+        directory = os.path.dirname(path) or '.'
+        if not os.path.isdir(directory):
+            return 0
+        
+        pattern = self._snapshot_file_pattern(path)
+        generations = [
+            int(match.group('generation')) for match in map(pattern.match, os.listdir(directory))
+            if match is not None and match.group('generation') is not None
+        ]
+        return max(generations, default=0)
+
+    def _remove_stale_files(self, path: str, keep) -> None:
+        """删除保存路径下当前快照不再引用的快照文件（预写日志由保存流程单独删除）
+        
+        Args:
+            path: 保存路径
+            keep: 当前快照引用的文件名
+        """
+        directory = os.path.dirname(path) or '.'
+        keep = set(keep)
+        pattern = self._snapshot_file_pattern(path)
+        for name in os.listdir(directory):
+            match = pattern.match(name)
+            if match is None or match.group('kind') == 'wal' or name in keep:
+                continue
+            try:
+                os.remove(os.path.join(directory, name))
+            except OSError as e:
+                logger.warning(f"Failed to remove stale snapshot file {name}: {e}")
+
+    def _load_snapshot(self, path: str) -> None:
+        """加载完整快照
+        
+        Args:
+            path: 加载路径
+        """
+        # 加载数据文件，旧版本的快照没有记录文件名，使用不带代数的文件名
+        data_path = f"{path}_data.json"
+        data = None
+        if os.path.exists(data_path):
+            with open(data_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        
+        directory = os.path.dirname(path)
+        files = {name: os.path.join(directory, file_name) for name, file_name in (data or {}).get('files', {}).items()}
+        
+        # 加载FAISS索引
+        index_path = files.get('index', f"{path}_index.faiss")
+        index_loaded = os.path.exists(index_path)
+        if index_loaded:
+            self.index = faiss.read_index(index_path)
+        
+        # 加载文档映射
+        if data is not None:
+            self.id_to_metadata = data.get('id_to_metadata', {})
+            self.dimension = data.get('dimension', 1536)
+            self.index_type = data.get('index_type', 'flat')
+            # 已保存的向量可能已归一化，度量以保存时为准
+            saved_metric = data.get('metric', 'l2')
+            configured = 'metric' in self.config or 'similarity_metric' in self.config
+            if configured and saved_metric != self.metric:
+                logger.warning(f"Configured metric '{self.metric}' differs from saved metric '{saved_metric}', using '{saved_metric}'")
+            self._set_metric(saved_metric)
+            self._embeddings = EmbeddingStore(
+                self.dimension, data.get('embedding_dtype', 'float32'), self.embedding_buffer_bytes
+            )
+            self._docstore = BinaryDocStore()
+            
+            if 'int_ids' in data:
+                self._id_to_int = data['int_ids']
+                self._next_int_id = data.get('next_int_id', 0)
+                self._deleted_int_ids = set(data.get('deleted_int_ids', []))
+                self._wal_generation = data.get('wal_generation', 0)
+                self._trained_size = data.get('trained_size', 0)
+                self._embeddings.load(path, rows=self._next_int_id, file_path=files.get('embeddings'))
+            else:
+                self._migrate_legacy_index(data.get('id_to_doc', {}))
+            
+            # 旧版本将文档内容保存在JSON中，新版本从二进制文档存储按需读取
+            if 'id_to_doc' in data:
+                for doc_id, content in data['id_to_doc'].items():
+                    if doc_id in self._id_to_int:
+                        self._docstore.put(self._id_to_int[doc_id], content)
+            else:
+                self._docstore.load(path, (files['docs'], files['docs_index']) if 'docs' in files else None)
+            self._int_to_id = {int_id: doc_id for doc_id, int_id in self._id_to_int.items()}
+            
+            # 元数据倒排索引不单独保存，根据元数据重建
+            self._metadata_index = {}
+            for doc_id, metadata in self.id_to_metadata.items():
+                self._index_metadata(self._id_to_int[doc_id], metadata)
+            
+            if self._near_duplicates is not None:
+                self._load_fingerprints(files.get('simhash', f"{path}_simhash.npy"))
+        
+        # 配置指定了不同的索引类型，或索引文件缺失时，从向量文件重建
+        configured_type = self.config.get('index_type', self.index_type).lower()
+        if configured_type != self.index_type or (not index_loaded and self._int_to_id):
+            self.reindex(configured_type)
+        else:
+            # 查询参数以当前配置为准
+            self._apply_search_params()
+
+    def _load_fingerprints(self, fingerprint_path: str) -> None:
+        """加载近重复检测的指纹，指纹文件不存在时根据文档内容重新计算
+        
+        Args:
+            fingerprint_path: 指纹文件路径
+        """
+        self._near_duplicates.clear()
+        
+        if os.path.exists(fingerprint_path):
+            with open(fingerprint_path, 'rb') as f:
+                table = np.load(f)
+            for int_id, fingerprint in zip(table['id'].tolist(), table['fingerprint'].tolist()):
+                if int_id in self._int_to_id:
+                    self._near_duplicates.add(int_id, fingerprint)
+            return
+        
+        logger.info("SimHash fingerprints not found, computing them from stored documents")
+        for int_id in self._int_to_id:
+            fingerprint = self._simhasher.fingerprint(self._docstore.get(int_id))
+            if fingerprint is not None:
+                self._near_duplicates.add(int_id, fingerprint)
+
+    def _replay_wal(self, wal: WriteAheadLog) -> None:
+        """重放预写日志中快照之后的操作（不再次记录日志）
+        
+        连续的添加操作合并为一次批量写入，连续的删除操作合并为一次批量删除。
+        
+        Args:
+            wal: 与快照对应的预写日志
+        """
+        pending_docs, pending_ids, pending_vectors = [], [], []
+        pending_deletes = []
+        
+        def flush_adds():
+            if pending_docs:
+                self._insert(pending_docs, np.array(pending_ids, dtype=np.int64), np.stack(pending_vectors))
+                pending_docs.clear()
+                pending_ids.clear()
+                pending_vectors.clear()
+        
+        def flush_deletes():
+            if pending_deletes:
+                document_ids = [
+                    document_id for document_id in dict.fromkeys(pending_deletes)
+                    if document_id in self._id_to_int
+                ]
+                if document_ids:
+                    self._delete(document_ids)
+                pending_deletes.clear()
+        
+        for op, record, vector in wal.replay():
+            if op == WriteAheadLog.OP_ADD:
+                flush_deletes()
+                pending_docs.append(VectorStoreDocument(
+                    id=record['id'],
+                    content=record['content'],
+                    metadata=record['metadata']
+                ))
+                pending_ids.append(record['int_id'])
+                pending_vectors.append(vector)
+                continue
+            
+            flush_adds()
+            if op == WriteAheadLog.OP_DELETE:
+                pending_deletes.append(record['id'])
+                continue
+            
+            flush_deletes()
+            if op == WriteAheadLog.OP_UPDATE_METADATA:
+                if record['id'] in self._id_to_int:
+                    self._set_metadata(record['id'], record['metadata'])
+            elif op == WriteAheadLog.OP_CLEAR:
+                self._reset()
+        
+        flush_adds()
+        flush_deletes()
+
+    def count(self) -> int:
+        """获取向量存储中的文档数量
+        
+        Returns:
+            int: 文档数量
+        """
+        return len(self._id_to_int)
+
+    def list_documents(self) -> List[VectorStoreDocument]:
+        """按添加顺序列出所有文档
+        
+        Returns:
+            List[VectorStoreDocument]: 文档列表
+        """
+        with self._lock.read_locked():
+            return self._load_documents(sorted(self._int_to_id))
+
+    def list_document_ids(self) -> List[str]:
+        """列出所有文档ID，不读取文档内容
+        
+        Returns:
+            List[str]: 文档ID列表
+        """
+        with self._lock.read_locked():
+            return list(self._id_to_int)
+
+    def list_documents_page(
+        self,
+        cursor: Optional[str] = None,
+        limit: int = 1000,
+        include_embeddings: bool = False,
+        filters: Optional[Dict] = None
+    ) -> Tuple[List[VectorStoreDocument], Optional[str]]:
+        """按添加顺序分页列出文档
+        
+        游标是下一个待读取的内部ID。内部ID按添加顺序递增且不会复用，
+        因此翻页期间新增或删除文档不会导致已返回的文档重复或未删除的已有文档被跳过。
+        筛选值可索引时通过元数据倒排索引直接定位本页文档，否则逐个检查文档元数据。
+        
+        Args:
+            cursor: 上一页返回的游标（可选，不提供时从头开始）
+            limit: 本页最多返回的文档数量
+            include_embeddings: 是否同时返回嵌入向量（余弦度量下为归一化后的向量）
+            filters: 筛选条件（可选）
+            
+        Returns:
+            Tuple[List[VectorStoreDocument], Optional[str]]: 本页文档和下一页的游标，没有更多文档时游标为None
+        """
+        if limit < 1:
+            raise ValueError("limit must be at least 1")
+        
+        try:
+            int_id = int(cursor) if cursor is not None else 0
+        except ValueError:
+            raise ValueError(f"Invalid cursor: {cursor}")
+        
+        with self._lock.read_locked():
+            end = self._next_int_id
+            candidates = self._select_ids(filters) if filters else None
+            if candidates is not None:
+                candidates = candidates[np.searchsorted(candidates, int_id):]
+                int_ids = candidates[:limit].tolist()
+                int_id = int_ids[-1] + 1 if len(candidates) > limit else end
+            else:
+                int_ids = []
+                while int_id < end and len(int_ids) < limit:
+                    document_id = self._int_to_id.get(int_id)
+                    if document_id is not None and (
+                        not filters or self._match_filters(self.id_to_metadata.get(document_id, {}), filters)
+                    ):
+                        int_ids.append(int_id)
+                    int_id += 1
+            
+            documents = self._load_documents(int_ids, include_embeddings)
+        return documents, (str(int_id) if int_id < end else None)
+
+    def _load_documents(self, int_ids: List[int], include_embeddings: bool = False) -> List[VectorStoreDocument]:
+        """按内部ID读取文档
+        
+        Args:
+            int_ids: 内部ID列表
+            include_embeddings: 是否同时读取嵌入向量
+            
+        Returns:
+            List[VectorStoreDocument]: 文档列表
+        """
+        embeddings = [None] * len(int_ids)
+        if include_embeddings and int_ids:
+            embeddings = self._embeddings.get(np.array(int_ids, dtype=np.int64)).tolist()
+        
+        return [
+            VectorStoreDocument(
+                id=self._int_to_id[int_id],
+                content=self._docstore.get(int_id),
+                metadata=self.id_to_metadata.get(self._int_to_id[int_id], {}),
+                embedding=embedding
+            )
+            for int_id, embedding in zip(int_ids, embeddings)
+        ]
+
+    async def _aembed_documents(
+        self,
+        documents: List[VectorStoreDocument]
+    ) -> List[VectorStoreDocument]:
+        """异步为缺少嵌入向量的文档生成向量
+        
+        启用近重复检测时不预先生成，由add_documents在过滤近重复文档后生成。
+        
+        Args:
+            documents: 要添加的文档列表
+            
+        Returns:
+            List[VectorStoreDocument]: 文档列表
+        """
+        if self._near_duplicates is not None:
+            return documents
+        return await super()._aembed_documents(documents)
+
+    def _embed_queries(
+        self,
+        queries: List[str],
+        embeddings: Optional[List[Optional[List[float]]]] = None
+    ):
+        """获取查询向量矩阵，未提供的查询向量使用嵌入模型生成
+        
+        Args:
+            queries: 搜索查询列表
+            embeddings: 与查询一一对应的查询向量列表（可选）
+            
+        Returns:
+            np.ndarray: float32查询向量矩阵
+        """
+        # 如果没有提供查询向量，尝试使用嵌入模型批量生成
+        vectors = []
+        for embedding in super()._embed_queries(queries, embeddings):
+            if embedding is None:
+                raise ValueError("Query embedding is required")
+            
+            vectors.append(embedding)
+        
+        query_vectors = np.array(vectors, dtype=np.float32).reshape(len(vectors), self.dimension)
+        if self.metric == 'cosine':
+            faiss.normalize_L2(query_vectors)
+        return query_vectors
+
+    def _collect_results(
+        self,
+        distances,
+        indices,
+        top_k: int,
+        filters: Optional[Dict] = None
+    ) -> List[Tuple[VectorStoreDocument, float]]:
+        """将单个查询的FAISS检索结果还原为文档列表
+        
+        Args:
+            distances: 距离数组
+            indices: 内部ID数组
+            top_k: 返回的最大结果数
+            filters: 筛选条件（可选）
+            
+        Returns:
+            List[Tuple[VectorStoreDocument, float]]: 文档和相似度分数的列表
+        """
+        results = []
+        
+        for distance, idx in zip(distances, indices):
+            # 通过ID映射表还原文档ID，-1表示结果不足，已删除的内部ID不在映射表中
+            doc_id = self._int_to_id.get(int(idx))
+            if doc_id is None:
+                continue
+            
+            content = self._docstore.get(int(idx))
+            metadata = self.id_to_metadata.get(doc_id, {})
+            
+            # 应用筛选条件
+            if filters and not self._match_filters(metadata, filters):
+                continue
+            
+            document = VectorStoreDocument(
+                id=doc_id,
+                content=content,
+                metadata=metadata
+            )
+            results.append((document, distance))
+            if len(results) >= top_k:
+                break
+        
+        return results
+
+    def _exact_search(self, query_vectors, candidate_ids, k: int):
+        """对候选向量做精确检索
+        
+        Args:
+            query_vectors: float32查询向量矩阵
+            candidate_ids: 候选内部ID数组（int64）
+            k: 每个查询返回的最大结果数
+            
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: 距离矩阵和内部ID矩阵，结果不足时ID为-1
+        """
+        k = min(k, len(candidate_ids))
+        distances, positions = faiss.knn(
+            query_vectors, self._embeddings.get(candidate_ids), k, metric=self._faiss_metric
+        )
+        indices = np.where(positions >= 0, candidate_ids[positions], -1)
+        return distances, indices
+
+    def _refine_multiplier(self) -> int:
+        """获取候选结果的扩大倍数（只对量化索引开启精确重排）
+        
+        Returns:
+            int: 候选扩大倍数
+        """
+        if self.index_type in self.QUANTIZED_INDEX_TYPES and self.refine_factor > 1:
+            return int(self.refine_factor)
+        return 1
+
+    def _refine(self, query_vectors, distances, indices, k: int):
+        """使用原始向量对候选结果计算精确距离并重新排序
+        
+        Args:
+            query_vectors: float32查询向量矩阵
+            distances: 候选距离矩阵
+            indices: 候选内部ID矩阵
+            k: 每个查询保留的结果数
+            
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: 重排后的距离矩阵和内部ID矩阵
+        """
+        if self._refine_multiplier() == 1:
+            return distances, indices
+        
+        refined_distances = np.full((len(query_vectors), k), -np.inf if self.higher_is_better else np.inf, dtype=np.float32)
+        refined_indices = np.full((len(query_vectors), k), -1, dtype=np.int64)
+        
+        for row, (query_vector, candidates) in enumerate(zip(query_vectors, indices)):
+            candidates = candidates[candidates >= 0]
+            if len(candidates) == 0:
+                continue
+            
+            exact = self._exact_scores(query_vector, candidates)
+            order = np.argsort(-exact if self.higher_is_better else exact)[:k]
+            refined_distances[row, :len(order)] = exact[order]
+            refined_indices[row, :len(order)] = candidates[order]
+        
+        return refined_distances, refined_indices
+
+    def _search_params(self, selector=None):
+        """构造带ID选择器的查询参数
+        
+        Args:
+            selector: FAISS的ID选择器（可选）
+            
+        Returns:
+            faiss.SearchParameters: 查询参数
+        """
+        # 查询参数会覆盖索引上设置的值，需要同时传入当前的nprobe/efSearch
+        if self.index_type in self.IVF_INDEX_TYPES:
+            return faiss.SearchParametersIVF(sel=selector, nprobe=self.nprobe)
+        if self.index_type == 'hnsw':
+            return faiss.SearchParametersHNSW(sel=selector, efSearch=self.ef_search)
+        return faiss.SearchParameters(sel=selector)
+
+    def _tombstone_selector(self):
+        """获取排除已删除但仍留在索引中的内部ID的选择器（调用方持有锁）
+        
+        选择器按已删除ID的数量缓存，删除新的文档后才重新构造。
+        
+        Returns:
+            Optional[faiss.IDSelector]: ID选择器，没有这类ID时返回None
+        """
+        if not self._deleted_int_ids:
+            return None
+        
+        cache = self._tombstone_cache
+        if cache is None or cache[0] is not self._deleted_int_ids or cache[1] != len(self._deleted_int_ids):
+            deleted = faiss.IDSelectorBatch(np.fromiter(self._deleted_int_ids, dtype=np.int64))
+            # IDSelectorNot只保存被包装选择器的指针，需要同时保留被包装的选择器
+            cache = (self._deleted_int_ids, len(self._deleted_int_ids), (faiss.IDSelectorNot(deleted), deleted))
+            self._tombstone_cache = cache
+        return cache[2][0]
+
+    def _index_metadata(self, int_id: int, metadata: Optional[Dict]) -> None:
+        """将文档元数据加入倒排索引
+        
+        Args:
+            int_id: 内部ID
+            metadata: 文档元数据
+        """
+        for key, value in (metadata or {}).items():
+            if self._is_indexable(value):
+                self._metadata_index.setdefault(key, {}).setdefault(value, set()).add(int_id)
+
+    def _unindex_metadata(self, int_id: int, metadata: Optional[Dict]) -> None:
+        """将文档元数据从倒排索引中移除
+        
+        Args:
+            int_id: 内部ID
+            metadata: 文档元数据
+        """
+        for key, value in (metadata or {}).items():
+            if not self._is_indexable(value):
+                continue
+            
+            values = self._metadata_index.get(key, {})
+            ids = values.get(value)
+            if ids is None:
+                continue
+            
+            ids.discard(int_id)
+            if not ids:
+                del values[value]
+                if not values:
+                    del self._metadata_index[key]
+
+    def _select_ids(self, filters: Dict):
+        """通过元数据倒排索引计算满足筛选条件的内部ID
+        
+        Args:
+            filters: 筛选条件
+            
+        Returns:
+            Optional[np.ndarray]: 满足条件的内部ID数组（int64），筛选值无法索引时返回None
+        """
+        if not all(self._is_indexable(value) for value in filters.values()):
+            return None
+        
+        # 从最小的集合开始求交集
+        id_sets = sorted(
+            (self._metadata_index.get(key, {}).get(value, set()) for key, value in filters.items()),
+            key=len
+        )
+        selected = set(id_sets[0]).intersection(*id_sets[1:])
+        return np.array(sorted(selected), dtype=np.int64)
+
+    @staticmethod
+    def _is_indexable(value: Any) -> bool:
+        """检查元数据值是否可以加入倒排索引
+        
+        Args:
+            value: 元数据值
+            
+        Returns:
+            bool: 是否可索引
+        """
+        return isinstance(value, (str, int, float, bool)) or value is None
+
+    def _match_filters(self, metadata: Dict, filters: Dict) -> bool:
+        """检查元数据是否匹配筛选条件
+        
+        Args:
+            metadata: 文档元数据
+            filters: 筛选条件
+            
+        Returns:
+            bool: 是否匹配
+        """
+        for key, value in filters.items():
+            if key not in metadata or metadata[key] != value:
+                return False
+        return True
+
+    def set_search_params(
+        self,
+        nprobe: Optional[int] = None,
+        ef_search: Optional[int] = None
+    ) -> None:
+        """调整查询参数，在召回率和延迟之间权衡
+        
+        Args:
+            nprobe: IVF索引每次查询探查的聚类数量（越大召回率越高、延迟越高）
+            ef_search: HNSW索引查询时的搜索宽度（越大召回率越高、延迟越高）
+        """
+        with self._lock.write_locked():
+            if nprobe is not None:
+                self.nprobe = nprobe
+            if ef_search is not None:
+                self.ef_search = ef_search
+            self._apply_search_params()
+
+    def reindex(self, index_type: Optional[str] = None, **params) -> None:
+        """使用已保存的原始向量重建索引，可同时切换索引类型或调整索引参数
+        
+        Args:
+            index_type: 新的索引类型（可选，默认保持当前类型）
+            **params: 索引参数，如nlist、nprobe、hnsw_m、ef_construction、ef_search、
+                pq_m、pq_nbits、refine_factor
+        """
+        index_type = (index_type or self.index_type).lower()
+        if index_type not in self.SUPPORTED_INDEX_TYPES:
+            raise ValueError(f"Unsupported index type: {index_type}")
+        
+        self._wait_for_rebuild()
+        with self._lock.write_locked():
+            for name in self.INDEX_PARAMS:
+                if name in params:
+                    setattr(self, name, params[name])
+            
+            self.index_type = index_type
+            self._rebuild_index()
+
+    def reindex_async(self, index_type: Optional[str] = None, **params) -> Future:
+        """在后台线程中重建索引，重建期间旧索引继续提供检索
+        
+        新索引在当前数据的副本上构建，构建期间的添加/删除照常写入旧索引并按顺序记录；
+        构建完成后在写锁内把记录的操作重放到新索引，再替换索引及其参数。
+        构建期间调用clear()会放弃本次重建。
+        
+        Args:
+            index_type: 新的索引类型（可选，默认保持当前类型）
+            **params: 索引参数，同reindex()
+            
+        Returns:
+            Future: 重建完成后结果为True，被放弃时为False
+        """
+        index_type = (index_type or self.index_type).lower()
+        if index_type not in self.SUPPORTED_INDEX_TYPES:
+            raise ValueError(f"Unsupported index type: {index_type}")
+        
+        with self._lock.write_locked():
+            if self._rebuild_future is not None and not self._rebuild_future.done():
+                raise RuntimeError("An index rebuild is already in progress")
+            
+            # 新参数只设置在副本上，替换前不影响旧索引的检索
+            builder = copy.copy(self)
+            builder.index_type = index_type
+            for name in self.INDEX_PARAMS:
+                if name in params:
+                    setattr(builder, name, params[name])
+            builder._rebuild_log = None
+            
+            int_ids = np.array(sorted(self._int_to_id), dtype=np.int64)
+            log = self._rebuild_log = []
+            
+            if self._rebuild_executor is None:
+                self._rebuild_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='faiss-rebuild')
+            self._rebuild_future = self._rebuild_executor.submit(self._background_rebuild, builder, int_ids, log)
+            return self._rebuild_future
+
+    def _background_rebuild(self, builder: 'FAISSVectorStore', int_ids, log: List[Tuple[str, Any]]) -> bool:
+        """在副本上构建新索引，重放构建期间的写操作后替换索引
+        
+        Args:
+            builder: 设置了新索引参数的浅拷贝
+            int_ids: 开始重建时的有效内部ID数组
+            log: 记录重建期间写操作的列表
+            
+        Returns:
+            bool: 是否完成替换
+        """
+        try:
+            builder._rebuild_index(int_ids)
+        except Exception:
+            if self._rebuild_log is not log:
+                # 重建期间存储被清空，读取旧的向量失败
+                return False
+            with self._lock.write_locked():
+                if self._rebuild_log is log:
+                    self._rebuild_log = None
+            raise
+        
+        with self._lock.write_locked():
+            if self._rebuild_log is not log:
+                logger.info("Discarded background index rebuild because the store was cleared")
+                return False
+            
+            if builder.index.is_trained:
+                for operation, ids in log:
+                    if operation == 'add':
+                        builder._add_vectors(self._embeddings.get(ids), ids)
+                    else:
+                        builder._remove_vectors(ids)
+            else:
+                # 开始重建时向量不足以训练新索引，此时直接按当前有效的内部ID重建一次；
+                # 逐条重放时达到训练数量的那次添加会加入全部向量，之后的记录会被重复添加
+                builder._rebuild_index()
+            builder._apply_search_params()
+            
+            # 在写锁内整体替换索引及其参数
+            for name in ('index_type',) + self.INDEX_PARAMS:
+                setattr(self, name, getattr(builder, name))
+            self.index = builder.index
+            self._deleted_int_ids = builder._deleted_int_ids
+            self._trained_size = builder._trained_size
+            self._rebuild_log = None
+        
+        logger.info(
+            f"Swapped in rebuilt {self.index_type} index with {len(int_ids)} vectors "
+            f"and {len(log)} buffered operations"
+        )
+        return True
+
+    def _wait_for_rebuild(self) -> None:
+        """等待正在进行的后台重建结束"""
+        future = self._rebuild_future
+        if future is not None:
+            wait([future])
+
+    def _create_index(self):
+        """根据配置创建FAISS索引
+        
+        Returns:
+            faiss.Index: 新建的空索引
+        """
+        nlist = self.nlist
+        pq_nbits = self.pq_nbits
+        
+        # IVF索引原生支持自定义ID，其余索引通过IndexIDMap2包装
+        metric = self._faiss_metric
+        if self.index_type in self.IVF_INDEX_TYPES:
+            quantizer = faiss.IndexFlat(self.dimension, metric)
+            if self.index_type == 'ivf_sq8':
+                index = faiss.IndexIVFScalarQuantizer(
+                    quantizer, self.dimension, nlist, faiss.ScalarQuantizer.QT_8bit, metric
+                )
+            elif self.index_type == 'ivf_pq':
+                index = faiss.IndexIVFPQ(quantizer, self.dimension, nlist, self.pq_m, pq_nbits, metric)
+            else:
+                index = faiss.IndexIVFFlat(quantizer, self.dimension, nlist, metric)
+            index.nprobe = self.nprobe
+            return index
+        
+        if self.index_type == 'hnsw':
+            index = faiss.IndexHNSWFlat(self.dimension, self.hnsw_m, metric)
+            index.hnsw.efConstruction = self.ef_construction
+            index.hnsw.efSearch = self.ef_search
+        elif self.index_type == 'sq8':
+            index = faiss.IndexScalarQuantizer(self.dimension, faiss.ScalarQuantizer.QT_8bit, metric)
+        elif self.index_type == 'pq':
+            index = faiss.IndexPQ(self.dimension, self.pq_m, pq_nbits, metric)
+        else:
+            index = faiss.IndexFlat(self.dimension, metric)
+        
+        return faiss.IndexIDMap2(index)
+
+    def _set_metric(self, metric: str) -> None:
+        """设置相似度度量
+        
+        Args:
+            metric: 相似度度量（l2、ip或cosine）
+        """
+        metric = metric.lower()
+        if metric not in self.SUPPORTED_METRICS:
+            raise ValueError(f"Unsupported metric: {metric}")
+        
+        self.metric = metric
+        # 内积和余弦相似度的分数越大越相似
+        self.higher_is_better = metric != 'l2'
+        self._faiss_metric = faiss.METRIC_L2 if metric == 'l2' else faiss.METRIC_INNER_PRODUCT
+
+    def _default_pq_m(self) -> int:
+        """获取默认的乘积量化子空间数量：不超过维度的1/8且能整除维度的最大值
+        
+        Returns:
+            int: 子空间数量
+        """
+        for m in range(max(1, self.dimension // 8), 0, -1):
+            if self.dimension % m == 0:
+                return m
+        return 1
+
+    def _base_index(self):
+        """获取去除ID映射包装后的底层索引
+        
+        底层索引归ID映射包装所有，后台重建替换索引后旧的包装可能被回收，因此返回的底层索引持有包装的引用，
+        保证调用方使用期间不被释放。
+        
+        Returns:
+            faiss.Index: 底层索引
+        """
+        index = self.index
+        if isinstance(index, faiss.IndexIDMap):
+            base_index = faiss.downcast_index(index.index)
+            base_index.referenced_objects = [index]
+            return base_index
+        return index
+
+    def _apply_search_params(self) -> None:
+        """将查询参数应用到当前索引"""
+        base_index = self._base_index()
+        if self.index_type in self.IVF_INDEX_TYPES:
+            base_index.nprobe = self.nprobe
+        elif self.index_type == 'hnsw':
+            base_index.hnsw.efSearch = self.ef_search
+
+    def _min_train_size(self) -> int:
+        """获取训练索引所需的最少向量数量
+        
+        IVF索引至少需要nlist个向量，乘积量化至少需要2 ** pq_nbits个向量，
+        标量量化至少需要TRAIN_POINTS_PER_CENTROID个向量（用于估计每一维的取值范围）；不需要训练的索引返回1。
+        
+        Returns:
+            int: 最少训练向量数量
+        """
+        size = 1
+        if self.index_type in self.IVF_INDEX_TYPES:
+            size = max(size, self.nlist)
+        if self.index_type in ('pq', 'ivf_pq'):
+            size = max(size, 2 ** self.pq_nbits)
+        if self.index_type in ('sq8', 'ivf_sq8'):
+            size = max(size, self.TRAIN_POINTS_PER_CENTROID)
+        return size
+
+    def _retrain_if_undertrained(self) -> None:
+        """索引用较少的向量训练后，向量数量达到建议的训练数量时在后台重新训练一次
+        
+        建议的训练数量为 ``TRAIN_POINTS_PER_CENTROID * _min_train_size()`` （不超过max_train_size），
+        重新训练使用配置的索引参数，期间旧索引继续提供检索。
+        """
+        with self._lock.write_locked():
+            target = min(self.TRAIN_POINTS_PER_CENTROID * self._min_train_size(), self.max_train_size)
+            if (
+                self.index_type in ('flat', 'hnsw')
+                or not self.index.is_trained
+                or self._trained_size >= target
+                or len(self._int_to_id) < target
+                or (self._rebuild_future is not None and not self._rebuild_future.done())
+            ):
+                return
+            
+            logger.info(f"Retraining {self.index_type} index trained on {self._trained_size} vectors with {len(self._int_to_id)} vectors")
+            self.reindex_async()
+
+    def _reindex_if_fragmented(self) -> None:
+        """已删除但仍留在索引中的向量占索引的比例超过 ``tombstone_reindex_ratio`` 时在后台重建索引
+        
+        这类向量仍然参与图遍历并占用内存，重建后清除。
+        """
+        with self._lock.write_locked():
+            if (
+                not self._deleted_int_ids
+                or len(self._deleted_int_ids) <= self.tombstone_reindex_ratio * self.index.ntotal
+                or (self._rebuild_future is not None and not self._rebuild_future.done())
+            ):
+                return
+            
+            logger.info(f"Rebuilding {self.index_type} index with {len(self._deleted_int_ids)} deleted vectors out of {self.index.ntotal}")
+            self.reindex_async()
+
+    def _add_vectors(self, vectors, int_ids) -> None:
+        """将向量以指定的内部ID添加到索引
+        
+        需要训练的索引在有效向量达到 :meth:`_min_train_size` 之前只把向量保存在EmbeddingStore中
+        （检索时精确计算），达到后用全部已保存的向量训练并一次性加入索引，不会缩减配置的nlist/pq_nbits。
+        
+        Args:
+            vectors: 向量矩阵（float32）
+            int_ids: 内部ID数组（int64，对应的文档已写入ID映射表）
+        """
+        if self.index.is_trained:
+            self.index.add_with_ids(vectors, int_ids)
+        elif len(self._int_to_id) >= self._min_train_size():
+            self._rebuild_index()
+
+    def _remove_vectors(self, int_ids: List[int]) -> None:
+        """按内部ID从索引中删除向量
+        
+        Args:
+            int_ids: 内部ID列表
+        """
+        if not self.index.is_trained:
+            # 尚未训练的索引中没有向量
+            return
+        
+        try:
+            self.index.remove_ids(np.array(int_ids, dtype=np.int64))
+        except RuntimeError:
+            # HNSW等索引不支持删除，向量保留在索引中，检索时通过ID映射表过滤
+            self._deleted_int_ids.update(int_ids)
+
+    def _migrate_legacy_index(self, id_to_doc: Dict[str, str]) -> None:
+        """迁移旧版本保存的数据（按插入顺序编号、未使用ID映射的索引）
+        
+        Args:
+            id_to_doc: 旧版本保存的文档ID到内容的映射
+        """
+        # 旧版本中索引的第i行对应文档映射中的第i个文档
+        self._id_to_int = {doc_id: i for i, doc_id in enumerate(id_to_doc)}
+        self._next_int_id = len(self._id_to_int)
+        self._deleted_int_ids = set()
+        
+        legacy_index = self.index
+        count = min(legacy_index.ntotal, self._next_int_id)
+        if count > 0:
+            self._embeddings.append(legacy_index.reconstruct_n(0, count))
+        self._int_to_id = {i: doc_id for doc_id, i in self._id_to_int.items() if i < count}
+        self._rebuild_index(np.arange(count, dtype=np.int64))
+        
+        # 旧版本删除文档时不删除向量，没有对应向量的文档无法检索，直接丢弃
+        for doc_id in list(self._id_to_int)[count:]:
+            logger.warning(f"Dropping document without vector from legacy store: {doc_id}")
+            del self._id_to_int[doc_id]
+            self.id_to_metadata.pop(doc_id, None)
+        self._next_int_id = count
+
+    def _rebuild_index(self, int_ids=None) -> None:
+        """使用已保存的原始向量重建FAISS索引
+        
+        只添加仍然有效的内部ID，重建后不再保留已删除的向量。
+        
+        Args:
+            int_ids: 需要添加的有序内部ID数组（可选，默认为当前所有有效的内部ID）
+        """
+        if int_ids is None:
+            int_ids = np.array(sorted(self._int_to_id), dtype=np.int64)
+        self.index = self._create_index()
+        self._deleted_int_ids = set()
+        
+        if len(int_ids) == 0:
+            return
+        
+        # 需要训练的索引使用均匀抽样的向量训练，向量不足时暂不训练，向量只保存在EmbeddingStore中
+        if not self.index.is_trained:
+            if len(int_ids) < self._min_train_size():
+                return
+            step = max(1, len(int_ids) // self.max_train_size)
+            train_ids = int_ids[::step][:self.max_train_size]
+            self.index.train(self._read_embeddings(train_ids))
+            self._trained_size = len(train_ids)
+        
+        # 分批从向量文件读取并添加，避免一次性读入全部向量
+        for start in range(0, len(int_ids), self.REBUILD_BATCH_SIZE):
+            batch_ids = int_ids[start:start + self.REBUILD_BATCH_SIZE]
+            self.index.add_with_ids(self._read_embeddings(batch_ids), batch_ids)
+
+    def _read_embeddings(self, int_ids):
+        """在读锁内读取原始向量（后台重建时与写入并发）
+        
+        Args:
+            int_ids: 内部ID数组
+            
+        Returns:
+            np.ndarray: float32向量矩阵
+        """
+        with self._lock.read_locked():
+            return self._embeddings.get(int_ids)
@@ -0,0 +1,496 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""BM25与向量混合检索的向量存储"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ai_services.utils.logger import get_logger
+from ai_services.vector_store.base_vector_store import BaseVectorStore, VectorStoreDocument, collapse_search_results
+from ai_services.vector_store.bm25_index import BM25Index
+
+logger = get_logger('hybrid_vector_store')
+
+
+class HybridVectorStore(BaseVectorStore):
+    """在向量存储旁维护BM25稀疏索引的混合检索存储
+
+    写入操作同时更新向量存储（配置项 ``vector_store``）和 :class:`BM25Index`。
+    检索模式（``search_mode`` 或调用时的 ``mode``）：
+
+    - ``hybrid``: 并发执行向量检索和BM25检索，各取 ``top_k * hybrid_candidate_factor`` 个候选，
+      用倒数排名融合（RRF，``score = Σ 1 / (rrf_k + rank)``）合并，分数越大越相关
+    - ``vector``: 只使用向量检索，返回向量存储的原始分数
+    - ``sparse``: 只使用BM25检索，返回BM25分数
+
+    BM25结果的元数据筛选在取回文档后进行。
+    """
+
+    # 支持的检索模式
+    SEARCH_MODES = ('hybrid', 'vector', 'sparse')
+
+    # 重建BM25索引时每批读取的文档数量
+    REBUILD_BATCH_SIZE = 10000
+
+    def _initialize(self):
+        """初始化混合检索存储"""
+        self.vector_store: BaseVectorStore = self.config.get('vector_store')
+        if self.vector_store is None:
+            raise ValueError("HybridVectorStore requires a vector_store")
+
+        self.search_mode = self.config.get('search_mode', 'hybrid')
+        if self.search_mode not in self.SEARCH_MODES:
+            raise ValueError(f"Unsupported search mode: {self.search_mode}")
+
+        self.rrf_k = self.config.get('rrf_k', 60)
+        self.candidate_factor = self.config.get('hybrid_candidate_factor', 4)
+        self.mmr_lambda = self.config.get('mmr_lambda', 0.5)
+
+        self.bm25 = BM25Index(
+            text_processor=self.config.get('text_processor'),
+            k1=self.config.get('bm25_k1', 1.5),
+            b=self.config.get('bm25_b', 0.75)
+        )
+
+        # 向量检索和BM25检索各占一个线程
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='hybrid-search')
+
+    def add_document(
+        self,
+        document: VectorStoreDocument
+    ) -> str:
+        """添加单个文档
+
+        Args:
+            document: 要添加的文档
+
+        Returns:
+            str: 文档ID
+        """
+        return self.add_documents([document])[0]
+
+    def add_documents(
+        self,
+        documents: List[VectorStoreDocument]
+    ) -> List[str]:
+        """批量添加文档到向量存储和BM25索引
+
+        向量存储开启近重复检测时，被合并到已有文档的近重复文档不加入BM25索引，
+        只有向量存储返回的ID与自身ID相同的文档才建立倒排索引。
+
+        Args:
+            documents: 要添加的文档列表
+
+        Returns:
+            List[str]: 文档ID列表
+        """
+        document_ids = self.vector_store.add_documents(documents)
+        self.bm25.add_many([
+            (doc.id, doc.content) for doc, document_id in zip(documents, document_ids) if document_id == doc.id
+        ])
+        return document_ids
+
+    def search(
+        self,
+        query: str,
+        embedding: Optional[List[float]] = None,
+        top_k: int = 5,
+        filters: Optional[Dict] = None,
+        mode: Optional[str] = None,
+        collapse_by_parent: bool = False,
+        mmr: bool = False,
+        mmr_lambda: Optional[float] = None
+    ) -> List[Tuple[VectorStoreDocument, float]]:
+        """搜索相关文档
+
+        Args:
+            query: 搜索查询
+            embedding: 查询向量（可选，如不提供则自动生成）
+            top_k: 返回的最大结果数
+            filters: 筛选条件（可选）
+            mode: 检索模式（可选，默认使用配置的search_mode）
+            collapse_by_parent: 是否按父文档折叠结果，同一文档的多个分块只返回最相关的一个
+            mmr: 是否使用最大边际相关性（MMR）重排，在相关的前提下减少内容重复的结果
+            mmr_lambda: MMR的相关性权重（可选，默认使用配置中的mmr_lambda）
+
+        Returns:
+            List[Tuple[VectorStoreDocument, float]]: 文档和分数的列表
+        """
+        return self.search_batch(
+            [query], embeddings=[embedding], top_k=top_k, filters=filters, mode=mode,
+            collapse_by_parent=collapse_by_parent, mmr=mmr, mmr_lambda=mmr_lambda
+        )[0]
+
+    def search_batch(
+        self,
+        queries: List[str],
+        embeddings: Optional[List[Optional[List[float]]]] = None,
+        top_k: int = 5,
+        filters: Optional[Dict] = None,
+        mode: Optional[str] = None,
+        collapse_by_parent: bool = False,
+        mmr: bool = False,
+        mmr_lambda: Optional[float] = None
+    ) -> List[List[Tuple[VectorStoreDocument, float]]]:
+        """批量搜索相关文档
+
+        Args:
+            queries: 搜索查询列表
+            embeddings: 与查询一一对应的查询向量列表（可选，如不提供则自动生成）
+            top_k: 每个查询返回的最大结果数
+            filters: 筛选条件（可选，对所有查询生效）
+            mode: 检索模式（可选，默认使用配置的search_mode）
+            collapse_by_parent: 是否按父文档折叠结果，同一文档的多个分块只返回最相关的一个
+            mmr: 是否使用最大边际相关性（MMR）重排，在相关的前提下减少内容重复的结果
+            mmr_lambda: MMR的相关性权重（可选，默认使用配置中的mmr_lambda）
+
+        Returns:
+            List[List[Tuple[VectorStoreDocument, float]]]: 每个查询的文档和分数列表
+        """
+        mode = mode or self.search_mode
+        if mode not in self.SEARCH_MODES:
+            raise ValueError(f"Unsupported search mode: {mode}")
+        if not queries:
+            return []
+
+        if mode == 'vector':
+            return self.vector_store.search_batch(
+                queries, embeddings=embeddings, top_k=top_k, filters=filters,
+                collapse_by_parent=collapse_by_parent, mmr=mmr, mmr_lambda=mmr_lambda
+            )
+
+        if mmr:
+            # MMR使用向量计算候选之间的相似度，纯BM25检索也需要查询向量
+            embeddings = self.vector_store._embed_queries(queries, embeddings)
+
+        # 候选数量只在这里放大一次：融合前的两路检索各取candidate_k个候选，
+        # 折叠或MMR时融合结果也保留candidate_k个，处理后仍尽量返回top_k个结果
+        candidate_k = top_k * self.candidate_factor
+        result_k = candidate_k if collapse_by_parent or mmr else top_k
+        if mode == 'sparse':
+            results = [self._sparse_search(query, result_k, filters) for query in queries]
+        else:
+            results = self._hybrid_search(queries, embeddings, result_k, filters, candidate_k)
+
+        if collapse_by_parent:
+            results = [collapse_search_results(hits, result_k if mmr else top_k) for hits in results]
+        if mmr:
+            lambda_mult = self.mmr_lambda if mmr_lambda is None else mmr_lambda
+            results = [
+                self._mmr_rerank(embedding, hits, top_k, lambda_mult)
+                for embedding, hits in zip(embeddings, results)
+            ]
+        return results
+
+    def _hybrid_search(
+        self,
+        queries: List[str],
+        embeddings: Optional[List[Optional[List[float]]]],
+        top_k: int,
+        filters: Optional[Dict] = None,
+        candidate_k: Optional[int] = None
+    ) -> List[List[Tuple[VectorStoreDocument, float]]]:
+        """并发执行向量检索和BM25检索并融合结果
+
+        Args:
+            queries: 搜索查询列表
+            embeddings: 与查询一一对应的查询向量列表（可选）
+            top_k: 每个查询返回的最大结果数
+            filters: 筛选条件（可选）
+            candidate_k: 每路检索取回的候选数量（可选，默认为top_k）
+
+        Returns:
+            List[List[Tuple[VectorStoreDocument, float]]]: 每个查询的文档和融合分数列表
+        """
+        # 两路检索并发执行
+        candidate_k = candidate_k or top_k
+        vector_future = self._executor.submit(
+            self.vector_store.search_batch, queries, embeddings, candidate_k, filters
+        )
+        sparse_future = self._executor.submit(
+            lambda: [self._sparse_search(query, candidate_k, filters) for query in queries]
+        )
+        vector_results = vector_future.result()
+        sparse_results = sparse_future.result()
+
+        return [
+            self._fuse([vector_hits, sparse_hits], top_k)
+            for vector_hits, sparse_hits in zip(vector_results, sparse_results)
+        ]
+
+    async def asearch_batch(
+        self,
+        queries: List[str],
+        embeddings: Optional[List[Optional[List[float]]]] = None,
+        top_k: int = 5,
+        filters: Optional[Dict] = None,
+        mode: Optional[str] = None,
+        collapse_by_parent: bool = False,
+        mmr: bool = False,
+        mmr_lambda: Optional[float] = None
+    ) -> List[List[Tuple[VectorStoreDocument, float]]]:
+        """异步批量搜索相关文档
+
+        Args:
+            queries: 搜索查询列表
+            embeddings: 与查询一一对应的查询向量列表（可选，如不提供则自动生成）
+            top_k: 每个查询返回的最大结果数
+            filters: 筛选条件（可选，对所有查询生效）
+            mode: 检索模式（可选，默认使用配置的search_mode）
+            collapse_by_parent: 是否按父文档折叠结果，同一文档的多个分块只返回最相关的一个
+            mmr: 是否使用最大边际相关性（MMR）重排，在相关的前提下减少内容重复的结果
+            mmr_lambda: MMR的相关性权重（可选，默认使用配置中的mmr_lambda）
+
+        Returns:
+            List[List[Tuple[VectorStoreDocument, float]]]: 每个查询的文档和分数列表
+        """
+        if not queries:
+            return []
+
+        # 纯BM25检索只有MMR重排时需要查询向量
+        if (mode or self.search_mode) != 'sparse' or mmr:
+            embeddings = await self.vector_store._aembed_queries(queries, embeddings)
+        return await self._run_async(
+            self.search_batch, queries, embeddings, top_k, filters, mode, collapse_by_parent, mmr, mmr_lambda
+        )
+
+    def search_range(
+        self,
+        query: str,
+        radius: float,
+        embedding: Optional[List[float]] = None,
+        max_results: Optional[int] = None,
+        filters: Optional[Dict] = None
+    ) -> List[Tuple[VectorStoreDocument, float]]:
+        """在向量存储中执行范围检索（BM25分数没有可比的半径，不参与范围检索）
+
+        Args:
+            query: 搜索查询
+            radius: 距离上限或相似度下限
+            embedding: 查询向量（可选，如不提供则自动生成）
+            max_results: 返回的最大结果数（可选，默认不限制）
+            filters: 筛选条件（可选）
+
+        Returns:
+            List[Tuple[VectorStoreDocument, float]]: 按相似度排序的文档和分数列表
+        """
+        return self.vector_store.search_range(query, radius, embedding, max_results, filters)
+
+    async def asearch_range(
+        self,
+        query: str,
+        radius: float,
+        embedding: Optional[List[float]] = None,
+        max_results: Optional[int] = None,
+        filters: Optional[Dict] = None
+    ) -> List[Tuple[VectorStoreDocument, float]]:
+        """异步在向量存储中执行范围检索
+
+        Args:
+            query: 搜索查询
+            radius: 距离上限或相似度下限
+            embedding: 查询向量（可选，如不提供则自动生成）
+            max_results: 返回的最大结果数（可选，默认不限制）
+            filters: 筛选条件（可选）
+
+        Returns:
+            List[Tuple[VectorStoreDocument, float]]: 按相似度排序的文档和分数列表
+        """
+        return await self.vector_store.asearch_range(query, radius, embedding, max_results, filters)
+
+    def get_document(
+        self,
+        document_id: str
+    ) -> Optional[VectorStoreDocument]:
+        """获取指定ID的文档
+
+        Args:
+            document_id: 文档ID
+
+        Returns:
+            Optional[VectorStoreDocument]: 文档对象，如果不存在则返回None
+        """
+        return self.vector_store.get_document(document_id)
+
+    def delete_document(
+        self,
+        document_id: str
+    ) -> bool:
+        """删除指定ID的文档
+
+        Args:
+            document_id: 文档ID
+
+        Returns:
+            bool: 是否删除成功
+        """
+        self.bm25.remove(document_id)
+        return self.vector_store.delete_document(document_id)
+
+    def delete_documents(
+        self,
+        document_ids: List[str]
+    ) -> int:
+        """批量删除文档
+
+        Args:
+            document_ids: 文档ID列表
+
+        Returns:
+            int: 实际删除的文档数量
+        """
+        for document_id in document_ids:
+            self.bm25.remove(document_id)
+        return self.vector_store.delete_documents(document_ids)
+
+    def clear(self) -> None:
+        """清空向量存储和BM25索引"""
+        self.vector_store.clear()
+        self.bm25.clear()
+
+    def save(self, path: Optional[str] = None) -> None:
+        """保存向量存储和BM25索引
+
+        Args:
+            path: 保存路径（可选，默认使用上次保存/加载的路径或配置项index_path）
+        """
+        path = self._resolve_path(path)
+        self.vector_store.save(path)
+        self.bm25.save(path)
+        self._persist_path = path
+
+    def load(self, path: Optional[str] = None) -> None:
+        """加载向量存储和BM25索引
+
+        BM25索引文件不存在时（例如由纯向量存储升级），根据已有文档重建。
+
+        Args:
+            path: 加载路径（可选，默认使用上次保存/加载的路径或配置项index_path）
+        """
+        path = self._resolve_path(path)
+        self.vector_store.load(path)
+
+        if os.path.exists(BM25Index.file_path(path)):
+            self.bm25.load(path)
+        else:
+            logger.info("BM25 index not found, rebuilding from stored documents")
+            self.bm25.clear()
+            cursor = None
+            while True:
+                documents, cursor = self.vector_store.list_documents_page(cursor, self.REBUILD_BATCH_SIZE)
+                self.bm25.add_many([(doc.id, doc.content) for doc in documents])
+                if cursor is None:
+                    break
+        self._persist_path = path
+
+    def list_documents_page(
+        self,
+        cursor: Optional[str] = None,
+        limit: int = 1000,
+        include_embeddings: bool = False
+    ) -> Tuple[List[VectorStoreDocument], Optional[str]]:
+        """按游标分页列出文档
+
+        Args:
+            cursor: 上一页返回的游标（可选，不提供时从头开始）
+            limit: 本页最多返回的文档数量
+            include_embeddings: 是否同时返回嵌入向量
+
+        Returns:
+            Tuple[List[VectorStoreDocument], Optional[str]]: 本页文档和下一页的游标，没有更多文档时游标为None
+        """
+        return self.vector_store.list_documents_page(cursor, limit, include_embeddings)
+
+    def count(self) -> int:
+        """获取文档数量
+
+        Returns:
+            int: 文档数量
+        """
+        return self.vector_store.count()
+
+    def _document_vectors(self, document_ids: List[str]) -> np.ndarray:
+        """从向量存储获取文档的已保存向量
+
+        Args:
+            document_ids: 文档ID列表
+
+        Returns:
+            np.ndarray: 与文档ID一一对应的float32向量矩阵
+        """
+        return self.vector_store._document_vectors(document_ids)
+
+    async def _aembed_documents(
+        self,
+        documents: List[VectorStoreDocument]
+    ) -> List[VectorStoreDocument]:
+        """异步为缺少嵌入向量的文档生成向量（由向量存储生成）
+
+        Args:
+            documents: 要添加的文档列表
+
+        Returns:
+            List[VectorStoreDocument]: 文档列表
+        """
+        return await self.vector_store._aembed_documents(documents)
+
+    def _sparse_search(
+        self,
+        query: str,
+        top_k: int,
+        filters: Optional[Dict] = None
+    ) -> List[Tuple[VectorStoreDocument, float]]:
+        """BM25检索并取回文档
+
+        Args:
+            query: 搜索查询
+            top_k: 返回的最大结果数
+            filters: 筛选条件（可选）
+
+        Returns:
+            List[Tuple[VectorStoreDocument, float]]: 文档和BM25分数的列表
+        """
+        # 有筛选条件时多取候选，筛选后仍尽量返回top_k个结果
+        fetch_k = top_k * self.candidate_factor if filters else top_k
+
+        results = []
+        for document_id, score in self.bm25.search(query, fetch_k):
+            document = self.vector_store.get_document(document_id)
+            if document is None:
+                continue
+            if filters and any(document.metadata.get(key) != value for key, value in filters.items()):
+                continue
+
+            results.append((document, score))
+            if len(results) >= top_k:
+                break
+        return results
+
+    def _fuse(
+        self,
+        result_lists: List[List[Tuple[VectorStoreDocument, float]]],
+        top_k: int
+    ) -> List[Tuple[VectorStoreDocument, float]]:
+        """倒数排名融合
+
+        Args:
+            result_lists: 各检索器按相关性排序的结果列表
+            top_k: 返回的最大结果数
+
+        Returns:
+            List[Tuple[VectorStoreDocument, float]]: 文档和融合分数的列表，按分数降序排列
+        """
+        scores: Dict[str, float] = {}
+        documents: Dict[str, VectorStoreDocument] = {}
+
+        for results in result_lists:
+            for rank, (document, _) in enumerate(results, start=1):
+                scores[document.id] = scores.get(document.id, 0.0) + 1.0 / (self.rrf_k + rank)
+                documents.setdefault(document.id, document)
+
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:top_k]
+        return [(documents[document_id], score) for document_id, score in ranked]
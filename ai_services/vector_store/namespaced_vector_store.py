@@ -0,0 +1,371 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""共用同一个FAISS存储的命名空间视图"""
+
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ai_services.vector_store.base_vector_store import BaseVectorStore, VectorStoreDocument
+from ai_services.vector_store.faiss_vector_store import FAISSVectorStore
+
+
+class NamespacedVectorStore(BaseVectorStore):
+    """把共享FAISS存储（配置项 ``vector_store``）中的一个命名空间（配置项 ``namespace``）包装为独立的向量存储
+
+    多个团队的小型文档集合共用同一个索引、嵌入模型和持久化文件，避免每个集合各自承担索引开销。
+    写入的文档在共享存储中的ID为 ``{namespace}/{文档ID}``，命名空间保存在元数据字段
+    ``namespace_field`` 中；检索时按该字段筛选，由共享存储的元数据倒排索引得到命名空间的ID集合作为ID选择器。
+    返回给调用方的文档ID和元数据不包含命名空间前缀和字段，不同命名空间可以使用相同的文档ID。
+
+    ``clear()`` 只删除本命名空间的文档，``save(path)`` / ``load(path)`` 单独保存和加载本命名空间；
+    不提供路径时 ``save()`` / ``load()`` 保存和加载整个共享存储。共享存储不能开启近重复检测（``dedup``）。
+    """
+
+    def _initialize(self):
+        """初始化命名空间视图"""
+        self.vector_store: FAISSVectorStore = self.config.get('vector_store')
+        if not isinstance(self.vector_store, FAISSVectorStore):
+            raise ValueError("NamespacedVectorStore requires a FAISSVectorStore as vector_store")
+        if self.vector_store.dedup:
+            # 近重复检测会跨命名空间匹配，导致文档被合并到其他命名空间的文档上
+            raise ValueError("Near-duplicate detection is not supported on a store shared by namespaces")
+
+        self.namespace = self.config.get('namespace')
+        if not self.namespace or not isinstance(self.namespace, str) or '/' in self.namespace:
+            raise ValueError("namespace must be a non-empty string without '/'")
+
+        self._prefix = f"{self.namespace}/"
+
+    def add_document(
+        self,
+        document: VectorStoreDocument
+    ) -> str:
+        """添加单个文档
+
+        Args:
+            document: 要添加的文档
+
+        Returns:
+            str: 文档ID
+        """
+        return self.add_documents([document])[0]
+
+    def add_documents(
+        self,
+        documents: List[VectorStoreDocument]
+    ) -> List[str]:
+        """批量添加文档到命名空间（ID已存在时替换）
+
+        生成的嵌入向量回写到传入的文档对象上。
+
+        Args:
+            documents: 要添加的文档列表
+
+        Returns:
+            List[str]: 文档ID列表
+        """
+        scoped = [self._scope_document(doc) for doc in documents]
+        document_ids = self.vector_store.add_documents(scoped)
+        for doc, scoped_doc in zip(documents, scoped):
+            doc.embedding = scoped_doc.embedding
+        return [self._unscope_id(document_id) for document_id in document_ids]
+
+    def search(
+        self,
+        query: str,
+        embedding: Optional[List[float]] = None,
+        top_k: int = 5,
+        filters: Optional[Dict] = None,
+        **kwargs
+    ) -> List[Tuple[VectorStoreDocument, float]]:
+        """在命名空间中搜索相似文档
+
+        Args:
+            query: 搜索查询
+            embedding: 查询向量（可选，如不提供则自动生成）
+            top_k: 返回的最大结果数
+            filters: 筛选条件（可选）
+            **kwargs: 共享存储支持的其他检索参数（如collapse_by_parent、mmr）
+
+        Returns:
+            List[Tuple[VectorStoreDocument, float]]: 文档和相似度分数的列表
+        """
+        return self.search_batch([query], [embedding], top_k, filters, **kwargs)[0]
+
+    def search_batch(
+        self,
+        queries: List[str],
+        embeddings: Optional[List[Optional[List[float]]]] = None,
+        top_k: int = 5,
+        filters: Optional[Dict] = None,
+        **kwargs
+    ) -> List[List[Tuple[VectorStoreDocument, float]]]:
+        """在命名空间中批量搜索相似文档
+
+        Args:
+            queries: 搜索查询列表
+            embeddings: 与查询一一对应的查询向量列表（可选，如不提供则自动生成）
+            top_k: 每个查询返回的最大结果数
+            filters: 筛选条件（可选，对所有查询生效）
+            **kwargs: 共享存储支持的其他检索参数
+
+        Returns:
+            List[List[Tuple[VectorStoreDocument, float]]]: 每个查询的文档和相似度分数列表
+        """
+        results = self.vector_store.search_batch(queries, embeddings, top_k, self._scope_filters(filters), **kwargs)
+        return [[(self._unscope_document(doc), score) for doc, score in hits] for hits in results]
+
+    def search_range(
+        self,
+        query: str,
+        radius: float,
+        embedding: Optional[List[float]] = None,
+        max_results: Optional[int] = None,
+        filters: Optional[Dict] = None
+    ) -> List[Tuple[VectorStoreDocument, float]]:
+        """在命名空间中搜索分数在半径范围内的所有文档
+
+        Args:
+            query: 搜索查询
+            radius: 距离上限（l2）或相似度下限（ip/cosine）
+            embedding: 查询向量（可选，如不提供则自动生成）
+            max_results: 返回的最大结果数（可选，默认不限制）
+            filters: 筛选条件（可选）
+
+        Returns:
+            List[Tuple[VectorStoreDocument, float]]: 按相似度排序的文档和分数列表
+        """
+        results = self.vector_store.search_range(query, radius, embedding, max_results, self._scope_filters(filters))
+        return [(self._unscope_document(doc), score) for doc, score in results]
+
+    def _embed_queries(
+        self,
+        queries: List[str],
+        embeddings: Optional[List[Optional[List[float]]]] = None
+    ) -> np.ndarray:
+        """使用共享存储的嵌入模型生成查询向量
+
+        Args:
+            queries: 搜索查询列表
+            embeddings: 与查询一一对应的查询向量列表（可选）
+
+        Returns:
+            np.ndarray: 查询向量矩阵
+        """
+        return self.vector_store._embed_queries(queries, embeddings)
+
+    def _document_vectors(self, document_ids: List[str]) -> np.ndarray:
+        """获取文档的已保存向量
+
+        Args:
+            document_ids: 文档ID列表
+
+        Returns:
+            np.ndarray: 与文档ID一一对应的向量矩阵
+        """
+        return self.vector_store._document_vectors([self._scope_id(document_id) for document_id in document_ids])
+
+    async def _aembed_documents(
+        self,
+        documents: List[VectorStoreDocument]
+    ) -> List[VectorStoreDocument]:
+        """使用共享存储的嵌入模型异步生成文档向量
+
+        Args:
+            documents: 要添加的文档列表
+
+        Returns:
+            List[VectorStoreDocument]: 文档列表
+        """
+        return await self.vector_store._aembed_documents(documents)
+
+    async def _aembed_queries(
+        self,
+        queries: List[str],
+        embeddings: Optional[List[Optional[List[float]]]] = None
+    ) -> Optional[List[Optional[List[float]]]]:
+        """使用共享存储的嵌入模型异步生成查询向量
+
+        Args:
+            queries: 搜索查询列表
+            embeddings: 与查询一一对应的查询向量列表（可选）
+
+        Returns:
+            Optional[List[Optional[List[float]]]]: 查询向量列表
+        """
+        return await self.vector_store._aembed_queries(queries, embeddings)
+
+    def get_document(
+        self,
+        document_id: str
+    ) -> Optional[VectorStoreDocument]:
+        """获取命名空间中指定ID的文档
+
+        Args:
+            document_id: 文档ID
+
+        Returns:
+            Optional[VectorStoreDocument]: 文档对象，如果不存在则返回None
+        """
+        document = self.vector_store.get_document(self._scope_id(document_id))
+        return self._unscope_document(document) if document is not None else None
+
+    def delete_document(
+        self,
+        document_id: str
+    ) -> bool:
+        """删除命名空间中指定ID的文档
+
+        Args:
+            document_id: 文档ID
+
+        Returns:
+            bool: 是否删除成功
+        """
+        return self.vector_store.delete_document(self._scope_id(document_id))
+
+    def delete_documents(
+        self,
+        document_ids: List[str]
+    ) -> int:
+        """批量删除命名空间中的文档
+
+        Args:
+            document_ids: 文档ID列表
+
+        Returns:
+            int: 实际删除的文档数量
+        """
+        return self.vector_store.delete_documents([self._scope_id(document_id) for document_id in document_ids])
+
+    def clear(self) -> None:
+        """删除命名空间中的所有文档"""
+        self.vector_store.drop_namespace(self.namespace)
+
+    def save(self, path: Optional[str] = None) -> None:
+        """保存命名空间
+
+        不提供路径时保存整个共享存储（使用共享存储已绑定的路径或配置项index_path），
+        命名空间随共享存储一起持久化。
+
+        Args:
+            path: 单独保存本命名空间的路径（可选）
+        """
+        if path is None:
+            self.vector_store.save()
+        else:
+            self.vector_store.save_namespace(self.namespace, path)
+
+    def load(self, path: Optional[str] = None) -> None:
+        """加载命名空间
+
+        不提供路径时从共享存储的默认路径重新加载整个共享存储；
+        提供路径时加载单独保存的命名空间，替换命名空间中现有的文档。
+
+        Args:
+            path: 单独保存的命名空间路径（可选）
+        """
+        if path is None:
+            self.vector_store.load()
+        else:
+            self.vector_store.load_namespace(self.namespace, path)
+
+    def count(self) -> int:
+        """获取命名空间中的文档数量
+
+        Returns:
+            int: 文档数量
+        """
+        return self.vector_store.list_namespaces().get(self.namespace, 0)
+
+    def list_documents_page(
+        self,
+        cursor: Optional[str] = None,
+        limit: int = 1000,
+        include_embeddings: bool = False
+    ) -> Tuple[List[VectorStoreDocument], Optional[str]]:
+        """按添加顺序分页列出命名空间中的文档
+
+        游标是下一个待读取的共享存储内部ID，由共享存储按命名空间字段筛选分页。
+
+        Args:
+            cursor: 上一页返回的游标（可选，不提供时从头开始）
+            limit: 本页最多返回的文档数量
+            include_embeddings: 是否同时返回嵌入向量
+
+        Returns:
+            Tuple[List[VectorStoreDocument], Optional[str]]: 本页文档和下一页的游标，没有更多文档时游标为None
+        """
+        documents, next_cursor = self.vector_store.list_documents_page(
+            cursor, limit, include_embeddings, filters=self._scope_filters(None)
+        )
+        return [self._unscope_document(doc) for doc in documents], next_cursor
+
+    def _scope_id(self, document_id: str) -> str:
+        """将文档ID转换为共享存储中的文档ID
+
+        Args:
+            document_id: 文档ID
+
+        Returns:
+            str: 加上命名空间前缀的文档ID
+        """
+        return self._prefix + document_id
+
+    def _unscope_id(self, document_id: str) -> str:
+        """将共享存储中的文档ID转换为文档ID
+
+        Args:
+            document_id: 共享存储中的文档ID
+
+        Returns:
+            str: 去掉命名空间前缀的文档ID（没有前缀时原样返回）
+        """
+        return document_id[len(self._prefix):] if document_id.startswith(self._prefix) else document_id
+
+    def _scope_filters(self, filters: Optional[Dict]) -> Dict:
+        """在筛选条件中加入命名空间
+
+        Args:
+            filters: 筛选条件（可选）
+
+        Returns:
+            Dict: 加入命名空间字段的筛选条件副本
+        """
+        return {**(filters or {}), self.vector_store.namespace_field: self.namespace}
+
+    def _scope_document(self, document: VectorStoreDocument) -> VectorStoreDocument:
+        """转换为写入共享存储的文档
+
+        Args:
+            document: 调用方传入的文档
+
+        Returns:
+            VectorStoreDocument: 文档ID加上前缀、元数据加入命名空间字段的文档副本
+        """
+        return VectorStoreDocument(
+            id=self._scope_id(document.id),
+            content=document.content,
+            metadata={**(document.metadata or {}), self.vector_store.namespace_field: self.namespace},
+            embedding=document.embedding
+        )
+
+    def _unscope_document(self, document: VectorStoreDocument) -> VectorStoreDocument:
+        """转换为返回给调用方的文档
+
+        Args:
+            document: 共享存储中的文档
+
+        Returns:
+            VectorStoreDocument: 文档ID去掉前缀、元数据去掉命名空间字段的文档副本
+        """
+        metadata = dict(document.metadata)
+        metadata.pop(self.vector_store.namespace_field, None)
+        return VectorStoreDocument(
+            id=self._unscope_id(document.id),
+            content=document.content,
+            metadata=metadata,
+            embedding=document.embedding
+        )
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""查询向量缓存"""
+
+import hashlib
+import threading
+import unicodedata
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ai_services.utils.cache_manager import FileCache, LRUCache
+
+
+class QueryEmbeddingCache:
+    """规范化查询文本 -> 查询向量的缓存
+
+    查询文本经过NFKC规范化、去除首尾空白、合并连续空白并转为小写后作为缓存键，
+    键中同时包含嵌入模型名称，更换模型不会命中旧向量。
+    内存层为容量有限的LRU缓存（可设置过期时间）；指定 ``cache_dir`` 时增加文件缓存层，
+    进程重启后仍可命中。命中任意一层都计为命中，同一批中重复的查询只生成一次。
+    """
+
+    def __init__(
+        self,
+        max_size: int = 10000,
+        ttl: Optional[int] = None,
+        cache_dir: Optional[str] = None,
+        model_name: str = ''
+    ):
+        """初始化查询向量缓存
+
+        Args:
+            max_size: 内存缓存的最大查询数量
+            ttl: 缓存过期时间（秒），None表示永不过期
+            cache_dir: 文件缓存目录（可选）
+            model_name: 嵌入模型名称
+        """
+        self.ttl = ttl
+        self.model_name = model_name
+        self._memory = LRUCache(max_size=max_size, default_ttl=ttl)
+        self._file = FileCache(cache_dir) if cache_dir else None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        """规范化查询文本
+
+        Args:
+            text: 查询文本
+
+        Returns:
+            str: 规范化后的文本
+        """
+        return ' '.join(unicodedata.normalize('NFKC', text).split()).lower()
+
+    def embed(
+        self,
+        queries: List[str],
+        embed_fn: Callable[[List[str]], List[Any]]
+    ) -> List[np.ndarray]:
+        """获取查询向量，未命中的查询（批内去重后）调用embed_fn生成
+
+        Args:
+            queries: 查询文本列表
+            embed_fn: 批量生成查询向量的函数
+
+        Returns:
+            List[np.ndarray]: 与查询一一对应的float32查询向量
+        """
+        keys, found, missing = self._lookup(queries)
+        if missing:
+            self._store(found, missing, embed_fn(list(missing.values())))
+        return [found[key] for key in keys]
+
+    async def aembed(
+        self,
+        queries: List[str],
+        embed_fn: Callable[[List[str]], Awaitable[List[Any]]]
+    ) -> List[np.ndarray]:
+        """异步获取查询向量，未命中的查询（批内去重后）等待embed_fn生成
+
+        Args:
+            queries: 查询文本列表
+            embed_fn: 批量生成查询向量的协程函数
+
+        Returns:
+            List[np.ndarray]: 与查询一一对应的float32查询向量
+        """
+        keys, found, missing = self._lookup(queries)
+        if missing:
+            self._store(found, missing, await embed_fn(list(missing.values())))
+        return [found[key] for key in keys]
+
+    def stats(self) -> Dict[str, Any]:
+        """获取缓存统计信息
+
+        Returns:
+            Dict[str, Any]: 命中次数、未命中次数、命中率、内存缓存大小和容量
+        """
+        memory_stats = self._memory.stats()
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0,
+                'size': memory_stats['size'],
+                'max_size': memory_stats['max_size']
+            }
+
+    def clear(self) -> None:
+        """清空缓存"""
+        self._memory.clear()
+        if self._file is not None:
+            self._file.clear()
+
+    def _key(self, query: str) -> str:
+        """计算缓存键（可安全用作文件名）
+
+        Args:
+            query: 查询文本
+
+        Returns:
+            str: 缓存键
+        """
+        text = f"{self.model_name}\n{self.normalize(query)}"
+        return f"query_embedding_{hashlib.sha1(text.encode('utf-8')).hexdigest()}"
+
+    def _get(self, key: str) -> Optional[np.ndarray]:
+        """依次从内存层和文件层读取缓存
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            Optional[np.ndarray]: 查询向量，未命中时返回None
+        """
+        embedding = self._memory.get(key)
+        if embedding is not None or self._file is None:
+            return embedding
+
+        embedding = self._file.get(key)
+        if embedding is not None:
+            # 文件层命中时回填内存层
+            self._memory.set(key, embedding)
+        return embedding
+
+    def _lookup(self, queries: List[str]) -> Tuple[List[str], Dict[str, np.ndarray], Dict[str, str]]:
+        """查找缓存并记录命中统计
+
+        Args:
+            queries: 查询文本列表
+
+        Returns:
+            Tuple[List[str], Dict[str, np.ndarray], Dict[str, str]]:
+                与查询一一对应的缓存键、已命中的向量，以及未命中的缓存键到查询文本的映射（已去重）
+        """
+        keys = [self._key(query) for query in queries]
+        found: Dict[str, np.ndarray] = {}
+        missing: Dict[str, str] = {}
+
+        for key, query in zip(keys, queries):
+            if key in found or key in missing:
+                continue
+            embedding = self._get(key)
+            if embedding is None:
+                missing[key] = query
+            else:
+                found[key] = embedding
+
+        with self._lock:
+            self.hits += len(queries) - len(missing)
+            self.misses += len(missing)
+
+        return keys, found, missing
+
+    def _store(self, found: Dict[str, np.ndarray], missing: Dict[str, str], generated: List[Any]) -> None:
+        """写入新生成的查询向量
+
+        Args:
+            found: 已命中的向量（新生成的向量也加入其中）
+            missing: 未命中的缓存键到查询文本的映射
+            generated: 与missing顺序一致的新生成向量
+        """
+        for key, embedding in zip(missing, generated):
+            embedding = np.asarray(embedding, dtype=np.float32)
+            found[key] = embedding
+            self._memory.set(key, embedding)
+            if self._file is not None:
+                self._file.set(key, embedding, self.ttl)
@@ -0,0 +1,409 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""分片向量存储实现"""
+
+import hashlib
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ai_services.utils.logger import get_logger
+from ai_services.vector_store.base_vector_store import (
+    BaseVectorStore, VectorStoreDocument, collapse_search_results, merge_search_results
+)
+from ai_services.vector_store.faiss_vector_store import FAISSVectorStore
+
+logger = get_logger('sharded_vector_store')
+
+
+class ShardedVectorStore(BaseVectorStore):
+    """按文档ID哈希分片的向量存储
+
+    文档按ID的MD5哈希分配到 ``num_shards`` 个FAISSVectorStore分片中。
+    检索时在线程池中并行查询各分片（FAISS检索期间释放GIL），再用堆合并各分片的前top_k个结果。
+    除 ``num_shards``、``search_workers`` 和嵌入模型、查询向量缓存的配置外，其余配置原样传给每个分片。
+    文档向量和查询向量只在分片存储中生成一次，再传给各分片。
+    同一文档的近重复文档可能分配到不同分片，因此不支持近重复检测（``dedup``）。
+    """
+
+    def _initialize(self):
+        """初始化分片向量存储"""
+        shard_config = dict(self.config)
+        self.num_shards = shard_config.pop('num_shards', 4)
+        search_workers = shard_config.pop('search_workers', self.num_shards)
+        if self.num_shards < 1:
+            raise ValueError("num_shards must be at least 1")
+        if shard_config.get('dedup'):
+            # 各分片只能检测本分片内的近重复文档
+            raise ValueError("Near-duplicate detection is not supported by ShardedVectorStore")
+        for key in self.EMBEDDING_CONFIG_KEYS:
+            shard_config.pop(key, None)
+
+        self.shards = [FAISSVectorStore(**shard_config) for _ in range(self.num_shards)]
+        self._executor = ThreadPoolExecutor(max_workers=max(1, search_workers), thread_name_prefix='vector-shard')
+
+        # 嵌入模型（可选），文档向量和查询向量在分片存储中统一生成
+        self._init_embedding()
+
+    def shard_for(self, document_id: str) -> int:
+        """计算文档所属的分片
+
+        Args:
+            document_id: 文档ID
+
+        Returns:
+            int: 分片编号
+        """
+        digest = hashlib.md5(document_id.encode('utf-8')).digest()
+        return int.from_bytes(digest[:8], 'little') % self.num_shards
+
+    def add_document(
+        self,
+        document: VectorStoreDocument
+    ) -> str:
+        """添加单个文档到对应分片
+
+        Args:
+            document: 要添加的文档
+
+        Returns:
+            str: 文档ID
+        """
+        return self.add_documents([document])[0]
+
+    def add_documents(
+        self,
+        documents: List[VectorStoreDocument]
+    ) -> List[str]:
+        """批量添加文档，统一生成嵌入向量后按分片分组并行写入
+
+        Args:
+            documents: 要添加的文档列表
+
+        Returns:
+            List[str]: 文档ID列表
+        """
+        self._embed_documents(documents)
+
+        groups: Dict[int, List[int]] = {}
+        for i, doc in enumerate(documents):
+            groups.setdefault(self.shard_for(doc.id), []).append(i)
+
+        futures = {
+            shard: self._executor.submit(self.shards[shard].add_documents, [documents[i] for i in positions])
+            for shard, positions in groups.items()
+        }
+
+        document_ids: List[str] = [doc.id for doc in documents]
+        for shard, future in futures.items():
+            for i, document_id in zip(groups[shard], future.result()):
+                document_ids[i] = document_id
+        return document_ids
+
+    def search(
+        self,
+        query: str,
+        embedding: Optional[List[float]] = None,
+        top_k: int = 5,
+        filters: Optional[Dict] = None,
+        collapse_by_parent: bool = False,
+        mmr: bool = False,
+        mmr_lambda: Optional[float] = None
+    ) -> List[Tuple[VectorStoreDocument, float]]:
+        """在所有分片中搜索相似文档
+
+        Args:
+            query: 搜索查询
+            embedding: 查询向量（可选，如不提供则自动生成）
+            top_k: 返回的最大结果数
+            filters: 筛选条件（可选）
+            collapse_by_parent: 是否按父文档折叠结果，同一文档的多个分块只返回最相关的一个
+            mmr: 是否使用最大边际相关性（MMR）重排，在相关的前提下减少内容重复的结果
+            mmr_lambda: MMR的相关性权重（可选，默认使用配置中的mmr_lambda）
+
+        Returns:
+            List[Tuple[VectorStoreDocument, float]]: 文档和相似度分数的列表
+        """
+        return self.search_batch(
+            [query], embeddings=[embedding], top_k=top_k, filters=filters,
+            collapse_by_parent=collapse_by_parent, mmr=mmr, mmr_lambda=mmr_lambda
+        )[0]
+
+    def search_batch(
+        self,
+        queries: List[str],
+        embeddings: Optional[List[Optional[List[float]]]] = None,
+        top_k: int = 5,
+        filters: Optional[Dict] = None,
+        collapse_by_parent: bool = False,
+        mmr: bool = False,
+        mmr_lambda: Optional[float] = None
+    ) -> List[List[Tuple[VectorStoreDocument, float]]]:
+        """批量搜索相似文档，每个分片执行一次批量检索
+
+        Args:
+            queries: 搜索查询列表
+            embeddings: 与查询一一对应的查询向量列表（可选，如不提供则自动生成）
+            top_k: 每个查询返回的最大结果数
+            filters: 筛选条件（可选，对所有查询生效）
+            collapse_by_parent: 是否按父文档折叠结果，同一文档的多个分块只返回最相关的一个
+            mmr: 是否使用最大边际相关性（MMR）重排，在相关的前提下减少内容重复的结果
+            mmr_lambda: MMR的相关性权重（可选，默认使用配置中的mmr_lambda）
+
+        Returns:
+            List[List[Tuple[VectorStoreDocument, float]]]: 每个查询的文档和相似度分数列表
+        """
+        if not queries:
+            return []
+
+        if mmr:
+            # 合并各分片的候选文档后再做MMR，候选之间的相似度跨分片计算
+            shard = self.shards[0]
+            embeddings = self._embed_queries(queries, embeddings)
+            results = self.search_batch(
+                queries, embeddings, top_k * shard.mmr_candidate_factor, filters, collapse_by_parent
+            )
+            lambda_mult = shard.mmr_lambda if mmr_lambda is None else mmr_lambda
+            return [
+                self._mmr_rerank(embedding, hits, top_k, lambda_mult)
+                for embedding, hits in zip(embeddings, results)
+            ]
+
+        if collapse_by_parent:
+            # 同一文档的分块可能分布在不同分片中，合并各分片结果后再折叠
+            results = self.search_batch(queries, embeddings, top_k * self.shards[0].collapse_candidate_factor, filters)
+            return [collapse_search_results(hits, top_k) for hits in results]
+
+        embeddings = self._embed_queries(queries, embeddings)
+
+        futures = [
+            self._executor.submit(shard.search_batch, queries, embeddings, top_k, filters)
+            for shard in self.shards
+        ]
+        shard_results = [future.result() for future in futures]
+
+        return [
+            merge_search_results([results[i] for results in shard_results], top_k, self.shards[0].higher_is_better)
+            for i in range(len(queries))
+        ]
+
+    def search_range(
+        self,
+        query: str,
+        radius: float,
+        embedding: Optional[List[float]] = None,
+        max_results: Optional[int] = None,
+        filters: Optional[Dict] = None
+    ) -> List[Tuple[VectorStoreDocument, float]]:
+        """在所有分片中并行执行范围检索
+
+        Args:
+            query: 搜索查询
+            radius: 距离上限（l2）或相似度下限（ip/cosine）
+            embedding: 查询向量（可选，如不提供则自动生成）
+            max_results: 返回的最大结果数（可选，默认不限制）
+            filters: 筛选条件（可选）
+
+        Returns:
+            List[Tuple[VectorStoreDocument, float]]: 按相似度排序的文档和分数列表
+        """
+        embedding = self._embed_queries([query], [embedding])[0]
+
+        futures = [
+            self._executor.submit(shard.search_range, query, radius, embedding, max_results, filters)
+            for shard in self.shards
+        ]
+        shard_results = [future.result() for future in futures]
+
+        top_k = max_results if max_results is not None else sum(len(results) for results in shard_results)
+        return merge_search_results(shard_results, top_k, self.shards[0].higher_is_better)
+
+    def get_document(
+        self,
+        document_id: str
+    ) -> Optional[VectorStoreDocument]:
+        """获取指定ID的文档
+
+        Args:
+            document_id: 文档ID
+
+        Returns:
+            Optional[VectorStoreDocument]: 文档对象，如果不存在则返回None
+        """
+        return self.shards[self.shard_for(document_id)].get_document(document_id)
+
+    def delete_document(
+        self,
+        document_id: str
+    ) -> bool:
+        """删除指定ID的文档
+
+        Args:
+            document_id: 文档ID
+
+        Returns:
+            bool: 是否删除成功
+        """
+        return self.shards[self.shard_for(document_id)].delete_document(document_id)
+
+    def delete_documents(
+        self,
+        document_ids: List[str]
+    ) -> int:
+        """批量删除文档，按分片分组后并行删除
+
+        Args:
+            document_ids: 文档ID列表
+
+        Returns:
+            int: 实际删除的文档数量
+        """
+        groups: Dict[int, List[str]] = {}
+        for document_id in dict.fromkeys(document_ids):
+            groups.setdefault(self.shard_for(document_id), []).append(document_id)
+
+        futures = [
+            self._executor.submit(self.shards[shard].delete_documents, ids)
+            for shard, ids in groups.items()
+        ]
+        return sum(future.result() for future in futures)
+
+    def clear(self) -> None:
+        """清空所有分片"""
+        for shard in self.shards:
+            shard.clear()
+
+    def save(self, path: Optional[str] = None) -> None:
+        """保存所有分片
+
+        每个分片保存到 ``{path}_shard{i}``，分片数量记录在 ``{path}_shards.json``。
+
+        Args:
+            path: 保存路径（可选，默认使用上次保存/加载的路径或配置项index_path）
+        """
+        path = self._resolve_path(path)
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+
+        futures = [
+            self._executor.submit(shard.save, self._shard_path(path, i))
+            for i, shard in enumerate(self.shards)
+        ]
+        for future in futures:
+            future.result()
+
+        with open(f"{path}_shards.json", 'w', encoding='utf-8') as f:
+            json.dump({'num_shards': self.num_shards}, f)
+        self._persist_path = path
+
+    def load(self, path: Optional[str] = None) -> None:
+        """加载所有分片
+
+        Args:
+            path: 加载路径（可选，默认使用上次保存/加载的路径或配置项index_path）
+        """
+        path = self._resolve_path(path)
+
+        with open(f"{path}_shards.json", 'r', encoding='utf-8') as f:
+            num_shards = json.load(f).get('num_shards')
+        if num_shards != self.num_shards:
+            # 哈希分配依赖分片数量，分片数量不同时无法直接加载
+            raise ValueError(f"Saved store has {num_shards} shards, but num_shards is {self.num_shards}")
+
+        futures = [
+            self._executor.submit(shard.load, self._shard_path(path, i))
+            for i, shard in enumerate(self.shards)
+        ]
+        for future in futures:
+            future.result()
+
+        self._persist_path = path
+        logger.info(f"Loaded {self.count()} documents from {self.num_shards} shards")
+
+    def count(self) -> int:
+        """获取所有分片的文档总数
+
+        Returns:
+            int: 文档数量
+        """
+        return sum(shard.count() for shard in self.shards)
+
+    def list_documents(self) -> List[VectorStoreDocument]:
+        """列出所有分片中的文档
+
+        Returns:
+            List[VectorStoreDocument]: 文档列表
+        """
+        return [doc for shard in self.shards for doc in shard.list_documents()]
+
+    def list_documents_page(
+        self,
+        cursor: Optional[str] = None,
+        limit: int = 1000,
+        include_embeddings: bool = False
+    ) -> Tuple[List[VectorStoreDocument], Optional[str]]:
+        """依次遍历各分片，分页列出文档
+
+        游标格式为 ``{分片编号}:{分片内游标}``。
+
+        Args:
+            cursor: 上一页返回的游标（可选，不提供时从头开始）
+            limit: 本页最多返回的文档数量
+            include_embeddings: 是否同时返回嵌入向量
+
+        Returns:
+            Tuple[List[VectorStoreDocument], Optional[str]]: 本页文档和下一页的游标，没有更多文档时游标为None
+        """
+        shard, shard_cursor = 0, None
+        if cursor is not None:
+            shard_text, _, shard_cursor = cursor.partition(':')
+            if not shard_text.isdigit() or not shard_cursor:
+                raise ValueError(f"Invalid cursor: {cursor}")
+            shard = int(shard_text)
+
+        documents: List[VectorStoreDocument] = []
+        while shard < self.num_shards and len(documents) < limit:
+            page, shard_cursor = self.shards[shard].list_documents_page(
+                shard_cursor, limit - len(documents), include_embeddings
+            )
+            documents.extend(page)
+            if shard_cursor is None:
+                shard += 1
+
+        if shard >= self.num_shards:
+            return documents, None
+        return documents, f"{shard}:{shard_cursor or 0}"
+
+    @staticmethod
+    def _shard_path(path: str, shard: int) -> str:
+        """获取分片的保存路径
+
+        Args:
+            path: 分片存储的保存路径
+            shard: 分片编号
+
+        Returns:
+            str: 分片的保存路径
+        """
+        return f"{path}_shard{shard}"
+
+    def _document_vectors(self, document_ids: List[str]) -> np.ndarray:
+        """按分片分组获取文档的已保存向量
+
+        Args:
+            document_ids: 文档ID列表
+
+        Returns:
+            np.ndarray: 与文档ID一一对应的float32向量矩阵
+        """
+        groups: Dict[int, List[int]] = {}
+        for i, document_id in enumerate(document_ids):
+            groups.setdefault(self.shard_for(document_id), []).append(i)
+
+        vectors = np.zeros((len(document_ids), self.shards[0].dimension), dtype=np.float32)
+        for shard, positions in groups.items():
+            vectors[positions] = self.shards[shard]._document_vectors([document_ids[i] for i in positions])
+        return vectors
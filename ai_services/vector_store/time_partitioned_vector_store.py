@@ -0,0 +1,795 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""按日期分区的向量存储实现"""
+
+import calendar
+import glob
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+from ai_services.utils.logger import get_logger
+from ai_services.vector_store.base_vector_store import (
+    BaseVectorStore, VectorStoreDocument, collapse_search_results, merge_search_results
+)
+from ai_services.vector_store.faiss_vector_store import FAISSVectorStore
+
+logger = get_logger('time_partitioned_vector_store')
+
+DateLike = Union[date, datetime, str]
+
+
+class TimePartitionedVectorStore(BaseVectorStore):
+    """按元数据日期分区的向量存储
+
+    文档按元数据 ``partition_field``（默认 ``date``，ISO 8601日期或时间字符串）写入按天、周或月
+    （``partition_granularity``）划分的FAISSVectorStore分区。分区键分别为 ``2024-03-15``、
+    ``2024-W11``（ISO周）和 ``2024-03``。
+
+    检索时传入 ``start_date`` / ``end_date`` 只查询与日期范围重叠的分区；
+    分区只有一部分在范围内时，通过该分区元数据倒排索引中的日期值确定候选文档。
+    过期分区可以通过 :meth:`drop_partition` / :meth:`drop_partitions_before` 整体删除，
+    不需要逐个删除向量。除 ``partition_field``、``partition_granularity``、``search_workers``
+    和嵌入模型、查询向量缓存的配置外，其余配置原样传给每个分区。
+    文档向量和查询向量只在分区存储中生成一次，再传给各分区；开启近重复检测（``dedup``）时只检测同一分区内的近重复文档。
+    """
+
+    # 支持的分区粒度
+    GRANULARITIES = ('day', 'week', 'month')
+    # 删除分区后清理文档映射时每次持有分区表锁处理的文档数
+    FORGET_BATCH_SIZE = 1024
+
+    def _initialize(self):
+        """初始化日期分区向量存储"""
+        partition_config = dict(self.config)
+        self.partition_field = partition_config.pop('partition_field', 'date')
+        self.granularity = partition_config.pop('partition_granularity', 'day')
+        search_workers = partition_config.pop('search_workers', 4)
+        if self.granularity not in self.GRANULARITIES:
+            raise ValueError(f"Unsupported partition granularity: {self.granularity}")
+        for key in self.EMBEDDING_CONFIG_KEYS:
+            partition_config.pop(key, None)
+
+        self._partition_config = partition_config
+        self.partitions: Dict[str, FAISSVectorStore] = {}
+        # 文档ID -> 分区键，与分区表一起由_partitions_lock保护
+        self._document_partitions: Dict[str, str] = {}
+        self._partitions_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max(1, search_workers), thread_name_prefix='vector-partition')
+
+        # 合并各分区结果时的排序方向
+        metric = self.config.get('metric', self.config.get('similarity_metric', 'l2')).lower()
+        self.higher_is_better = metric != 'l2'
+        self.collapse_candidate_factor = self.config.get('collapse_candidate_factor', 4)
+        self.mmr_lambda = self.config.get('mmr_lambda', 0.5)
+        self.mmr_candidate_factor = self.config.get('mmr_candidate_factor', 4)
+
+        # 嵌入模型（可选），文档向量和查询向量在分区存储中统一生成
+        self._init_embedding()
+
+    @staticmethod
+    def _to_date(value: DateLike) -> date:
+        """将日期值转换为date
+
+        Args:
+            value: date、datetime或ISO 8601日期/时间字符串
+
+        Returns:
+            date: 日期
+        """
+        if isinstance(value, datetime):
+            return value.date()
+        if isinstance(value, date):
+            return value
+        if isinstance(value, str):
+            try:
+                return date.fromisoformat(value[:10])
+            except ValueError:
+                pass
+        raise ValueError(f"Invalid date: {value!r}")
+
+    def partition_for(self, value: DateLike) -> str:
+        """计算日期所属的分区
+
+        Args:
+            value: 日期
+
+        Returns:
+            str: 分区键
+        """
+        day = self._to_date(value)
+        if self.granularity == 'day':
+            return day.isoformat()
+        if self.granularity == 'week':
+            year, week, _ = day.isocalendar()
+            return f"{year}-W{week:02d}"
+        return f"{day.year}-{day.month:02d}"
+
+    def partition_bounds(self, key: str) -> Tuple[date, date]:
+        """获取分区覆盖的日期范围
+
+        Args:
+            key: 分区键
+
+        Returns:
+            Tuple[date, date]: 分区的第一天和最后一天
+        """
+        if self.granularity == 'day':
+            day = date.fromisoformat(key)
+            return day, day
+        if self.granularity == 'week':
+            year, week = key.split('-W')
+            monday = date.fromisocalendar(int(year), int(week), 1)
+            return monday, date.fromordinal(monday.toordinal() + 6)
+        year, month = (int(part) for part in key.split('-'))
+        return date(year, month, 1), date(year, month, calendar.monthrange(year, month)[1])
+
+    def list_partitions(self) -> List[str]:
+        """列出所有分区
+
+        Returns:
+            List[str]: 按日期排序的分区键
+        """
+        with self._partitions_lock:
+            return sorted(self.partitions)
+
+    def add_document(
+        self,
+        document: VectorStoreDocument
+    ) -> str:
+        """添加单个文档到对应分区
+
+        Args:
+            document: 要添加的文档
+
+        Returns:
+            str: 文档ID
+        """
+        return self.add_documents([document])[0]
+
+    def add_documents(
+        self,
+        documents: List[VectorStoreDocument]
+    ) -> List[str]:
+        """批量添加文档，按分区分组后并行写入
+
+        日期值为date/datetime对象时转换为ISO 8601字符串保存（不修改传入文档的元数据），
+        生成的嵌入向量回写到传入的文档对象上。已存在于其他分区的文档（日期发生变化）先从原分区中删除。
+
+        Args:
+            documents: 要添加的文档列表
+
+        Returns:
+            List[str]: 文档ID列表（开启近重复检测时，近重复文档为分区中已有文档的ID）
+        """
+        partitioned = [self._document_partition(doc) for doc in documents]
+        self._embed_documents([doc for _, doc in partitioned])
+
+        groups: Dict[str, List[Tuple[int, VectorStoreDocument]]] = {}
+        for i, (key, normalized) in enumerate(partitioned):
+            documents[i].embedding = normalized.embedding
+            groups.setdefault(key, []).append((i, normalized))
+
+        # 按原分区分组后批量删除
+        moved: Dict[str, Tuple[FAISSVectorStore, List[str]]] = {}
+        for key, entries in groups.items():
+            for _, doc in entries:
+                previous = self._find_partition(doc.id)
+                if previous is not None and previous[0] != key:
+                    moved.setdefault(previous[0], (previous[1], []))[1].append(doc.id)
+        for partition, document_ids in moved.values():
+            partition.delete_documents(document_ids)
+        with self._partitions_lock:
+            for _, document_ids in moved.values():
+                for document_id in document_ids:
+                    self._document_partitions.pop(document_id, None)
+
+        futures = {
+            key: self._executor.submit(self._get_or_create_partition(key).add_documents, [doc for _, doc in entries])
+            for key, entries in groups.items()
+        }
+
+        document_ids: List[str] = [doc.id for doc in documents]
+        for key, future in futures.items():
+            added_ids = future.result()
+            with self._partitions_lock:
+                for (i, doc), document_id in zip(groups[key], added_ids):
+                    document_ids[i] = document_id
+                    # 合并到已有文档的近重复文档没有单独保存
+                    if document_id == doc.id:
+                        self._document_partitions[document_id] = key
+        return document_ids
+
+    def search(
+        self,
+        query: str,
+        embedding: Optional[List[float]] = None,
+        top_k: int = 5,
+        filters: Optional[Dict] = None,
+        start_date: Optional[DateLike] = None,
+        end_date: Optional[DateLike] = None,
+        collapse_by_parent: bool = False,
+        mmr: bool = False,
+        mmr_lambda: Optional[float] = None
+    ) -> List[Tuple[VectorStoreDocument, float]]:
+        """在与日期范围重叠的分区中搜索相似文档
+
+        Args:
+            query: 搜索查询
+            embedding: 查询向量（可选，如不提供则自动生成）
+            top_k: 返回的最大结果数
+            filters: 筛选条件（可选）
+            start_date: 起始日期（可选，包含）
+            end_date: 结束日期（可选，包含）
+            collapse_by_parent: 是否按父文档折叠结果，同一文档的多个分块只返回最相关的一个
+            mmr: 是否使用最大边际相关性（MMR）重排，在相关的前提下减少内容重复的结果
+            mmr_lambda: MMR的相关性权重（可选，默认使用配置中的mmr_lambda）
+
+        Returns:
+            List[Tuple[VectorStoreDocument, float]]: 文档和分数的列表
+        """
+        return self.search_batch(
+            [query], embeddings=[embedding], top_k=top_k, filters=filters, start_date=start_date,
+            end_date=end_date, collapse_by_parent=collapse_by_parent, mmr=mmr, mmr_lambda=mmr_lambda
+        )[0]
+
+    def search_batch(
+        self,
+        queries: List[str],
+        embeddings: Optional[List[Optional[List[float]]]] = None,
+        top_k: int = 5,
+        filters: Optional[Dict] = None,
+        start_date: Optional[DateLike] = None,
+        end_date: Optional[DateLike] = None,
+        collapse_by_parent: bool = False,
+        mmr: bool = False,
+        mmr_lambda: Optional[float] = None
+    ) -> List[List[Tuple[VectorStoreDocument, float]]]:
+        """批量搜索相似文档，与日期范围重叠的分区并行检索
+
+        Args:
+            queries: 搜索查询列表
+            embeddings: 与查询一一对应的查询向量列表（可选，如不提供则自动生成）
+            top_k: 每个查询返回的最大结果数
+            filters: 筛选条件（可选，对所有查询生效）
+            start_date: 起始日期（可选，包含）
+            end_date: 结束日期（可选，包含）
+            collapse_by_parent: 是否按父文档折叠结果，同一文档的多个分块只返回最相关的一个
+            mmr: 是否使用最大边际相关性（MMR）重排，在相关的前提下减少内容重复的结果
+            mmr_lambda: MMR的相关性权重（可选，默认使用配置中的mmr_lambda）
+
+        Returns:
+            List[List[Tuple[VectorStoreDocument, float]]]: 每个查询的文档和分数列表
+        """
+        if not queries:
+            return []
+
+        if mmr:
+            embeddings = self._embed_queries(queries, embeddings)
+            results = self.search_batch(
+                queries, embeddings, top_k * self.mmr_candidate_factor, filters, start_date, end_date,
+                collapse_by_parent
+            )
+            lambda_mult = self.mmr_lambda if mmr_lambda is None else mmr_lambda
+            return [
+                self._mmr_rerank(embedding, hits, top_k, lambda_mult)
+                for embedding, hits in zip(embeddings, results)
+            ]
+
+        if collapse_by_parent:
+            # 同一文档的分块可能分布在不同分区中，合并各分区结果后再折叠
+            results = self.search_batch(
+                queries, embeddings, top_k * self.collapse_candidate_factor, filters, start_date, end_date
+            )
+            return [collapse_search_results(hits, top_k) for hits in results]
+
+        partitions = self._select_partitions(start_date, end_date)
+        if not partitions:
+            return [[] for _ in queries]
+
+        embeddings = self._embed_queries(queries, embeddings)
+        futures = [
+            self._executor.submit(self._search_partition, partition, queries, embeddings, top_k, filters, date_range)
+            for partition, date_range in partitions
+        ]
+        partition_results = [future.result() for future in futures]
+
+        return [
+            merge_search_results([results[i] for results in partition_results], top_k, self.higher_is_better)
+            for i in range(len(queries))
+        ]
+
+    def search_range(
+        self,
+        query: str,
+        radius: float,
+        embedding: Optional[List[float]] = None,
+        max_results: Optional[int] = None,
+        filters: Optional[Dict] = None,
+        start_date: Optional[DateLike] = None,
+        end_date: Optional[DateLike] = None
+    ) -> List[Tuple[VectorStoreDocument, float]]:
+        """在与日期范围重叠的分区中并行执行范围检索
+
+        Args:
+            query: 搜索查询
+            radius: 距离上限（l2）或相似度下限（ip/cosine）
+            embedding: 查询向量（可选，如不提供则自动生成）
+            max_results: 返回的最大结果数（可选，默认不限制）
+            filters: 筛选条件（可选）
+            start_date: 起始日期（可选，包含）
+            end_date: 结束日期（可选，包含）
+
+        Returns:
+            List[Tuple[VectorStoreDocument, float]]: 按相似度排序的文档和分数列表
+        """
+        partitions = self._select_partitions(start_date, end_date)
+        if not partitions:
+            return []
+
+        embedding = self._embed_queries([query], [embedding])[0]
+        futures = [
+            self._executor.submit(
+                partition.search_range, query, radius, embedding,
+                max_results if date_range is None else None, filters
+            )
+            for partition, date_range in partitions
+        ]
+
+        partition_results = []
+        for future, (_, date_range) in zip(futures, partitions):
+            results = future.result()
+            if date_range is not None:
+                # 范围检索返回半径内的全部结果，部分重叠的分区按日期筛选后仍是精确结果
+                results = [
+                    (document, score) for document, score in results
+                    if self._in_range(document.metadata.get(self.partition_field), *date_range)
+                ]
+            partition_results.append(results)
+
+        top_k = max_results if max_results is not None else sum(len(results) for results in partition_results)
+        return merge_search_results(partition_results, top_k, self.higher_is_better)
+
+    def get_document(
+        self,
+        document_id: str
+    ) -> Optional[VectorStoreDocument]:
+        """获取指定ID的文档
+
+        Args:
+            document_id: 文档ID
+
+        Returns:
+            Optional[VectorStoreDocument]: 文档对象，如果不存在则返回None
+        """
+        found = self._find_partition(document_id)
+        return found[1].get_document(document_id) if found else None
+
+    def delete_document(
+        self,
+        document_id: str
+    ) -> bool:
+        """删除指定ID的文档
+
+        Args:
+            document_id: 文档ID
+
+        Returns:
+            bool: 是否删除成功
+        """
+        return self.delete_documents([document_id]) > 0
+
+    def delete_documents(
+        self,
+        document_ids: List[str]
+    ) -> int:
+        """批量删除文档，按分区分组后批量删除
+
+        Args:
+            document_ids: 文档ID列表
+
+        Returns:
+            int: 实际删除的文档数量
+        """
+        groups: Dict[str, Tuple[FAISSVectorStore, List[str]]] = {}
+        for document_id in dict.fromkeys(document_ids):
+            found = self._find_partition(document_id)
+            if found is not None:
+                groups.setdefault(found[0], (found[1], []))[1].append(document_id)
+
+        deleted = sum(partition.delete_documents(ids) for partition, ids in groups.values())
+        with self._partitions_lock:
+            for _, ids in groups.values():
+                for document_id in ids:
+                    self._document_partitions.pop(document_id, None)
+        return deleted
+
+    def drop_partition(self, key: str) -> bool:
+        """整体删除一个分区
+
+        只从分区表中移除该分区，不逐个删除向量；已保存的分区文件同时删除，并更新分区清单。
+
+        Args:
+            key: 分区键
+
+        Returns:
+            bool: 分区是否存在
+        """
+        return bool(self._drop_partitions([key]))
+
+    def drop_partitions_before(self, value: DateLike) -> List[str]:
+        """删除所有早于指定日期的分区（分区最后一天早于该日期）
+
+        Args:
+            value: 日期
+
+        Returns:
+            List[str]: 被删除的分区键
+        """
+        cutoff = self._to_date(value)
+        return self._drop_partitions([key for key in self.list_partitions() if self.partition_bounds(key)[1] < cutoff])
+
+    def clear(self) -> None:
+        """删除所有分区"""
+        self._drop_partitions(self.list_partitions())
+
+    def save(self, path: Optional[str] = None) -> None:
+        """保存所有分区
+
+        每个分区保存到 ``{path}_part_{分区键}``，分区清单记录在 ``{path}_partitions.json``。
+
+        Args:
+            path: 保存路径（可选，默认使用上次保存/加载的路径或配置项index_path）
+        """
+        path = self._resolve_path(path)
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+
+        with self._partitions_lock:
+            partitions = dict(self.partitions)
+        futures = [
+            self._executor.submit(partition.save, self._partition_path(path, key))
+            for key, partition in partitions.items()
+        ]
+        for future in futures:
+            future.result()
+
+        self._write_manifest(path)
+        self._persist_path = path
+
+    def load(self, path: Optional[str] = None) -> None:
+        """加载所有分区
+
+        Args:
+            path: 加载路径（可选，默认使用上次保存/加载的路径或配置项index_path）
+        """
+        path = self._resolve_path(path)
+
+        with open(f"{path}_partitions.json", 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest.get('granularity') != self.granularity:
+            raise ValueError(
+                f"Saved store is partitioned by {manifest.get('granularity')}, "
+                f"but partition_granularity is {self.granularity}"
+            )
+
+        partitions = {key: FAISSVectorStore(**self._partition_config) for key in manifest.get('partitions', [])}
+        futures = [
+            self._executor.submit(partition.load, self._partition_path(path, key))
+            for key, partition in partitions.items()
+        ]
+        for future in futures:
+            future.result()
+
+        document_partitions = {
+            document_id: key
+            for key, partition in partitions.items()
+            for document_id in partition.list_document_ids()
+        }
+        with self._partitions_lock:
+            self.partitions = partitions
+            self._document_partitions = document_partitions
+        self._persist_path = path
+        logger.info(f"Loaded {self.count()} documents from {len(partitions)} partitions")
+
+    def count(self) -> int:
+        """获取所有分区的文档总数
+
+        Returns:
+            int: 文档数量
+        """
+        with self._partitions_lock:
+            partitions = list(self.partitions.values())
+        return sum(partition.count() for partition in partitions)
+
+    def list_documents_page(
+        self,
+        cursor: Optional[str] = None,
+        limit: int = 1000,
+        include_embeddings: bool = False
+    ) -> Tuple[List[VectorStoreDocument], Optional[str]]:
+        """按日期顺序遍历各分区，分页列出文档
+
+        游标格式为 ``{分区键}:{分区内游标}``。游标所在的分区被删除时，从下一个分区开始。
+
+        Args:
+            cursor: 上一页返回的游标（可选，不提供时从头开始）
+            limit: 本页最多返回的文档数量
+            include_embeddings: 是否同时返回嵌入向量
+
+        Returns:
+            Tuple[List[VectorStoreDocument], Optional[str]]: 本页文档和下一页的游标，没有更多文档时游标为None
+        """
+        keys = self.list_partitions()
+        position, partition_cursor = 0, None
+        if cursor is not None:
+            key, _, partition_cursor = cursor.partition(':')
+            if not key or not partition_cursor:
+                raise ValueError(f"Invalid cursor: {cursor}")
+            position = next((i for i, existing in enumerate(keys) if existing >= key), len(keys))
+            if position < len(keys) and keys[position] != key:
+                partition_cursor = None
+
+        documents: List[VectorStoreDocument] = []
+        while position < len(keys) and len(documents) < limit:
+            partition = self.partitions.get(keys[position])
+            if partition is not None:
+                page, partition_cursor = partition.list_documents_page(
+                    partition_cursor, limit - len(documents), include_embeddings
+                )
+                documents.extend(page)
+            else:
+                partition_cursor = None
+            if partition_cursor is None:
+                position += 1
+
+        if position >= len(keys):
+            return documents, None
+        return documents, f"{keys[position]}:{partition_cursor or 0}"
+
+    def _get_or_create_partition(self, key: str) -> FAISSVectorStore:
+        """获取分区，不存在时创建
+
+        Args:
+            key: 分区键
+
+        Returns:
+            FAISSVectorStore: 分区
+        """
+        with self._partitions_lock:
+            partition = self.partitions.get(key)
+            if partition is None:
+                partition = self.partitions[key] = FAISSVectorStore(**self._partition_config)
+            return partition
+
+    def _drop_partitions(self, keys: List[str]) -> List[str]:
+        """从分区表中移除分区，并删除已保存的分区文件
+
+        持有分区表锁时只移除分区本身，文档到分区的映射在后台分批清理（见_forget_partition_documents）。
+
+        Args:
+            keys: 分区键列表
+
+        Returns:
+            List[str]: 实际删除的分区键
+        """
+        with self._partitions_lock:
+            dropped = {key: self.partitions.pop(key) for key in keys if key in self.partitions}
+            if dropped and not self.partitions:
+                self._document_partitions = {}
+        if not dropped:
+            return []
+
+        for key, partition in dropped.items():
+            partition.close()
+            if self._document_partitions:
+                self._executor.submit(self._forget_partition_documents, key, partition)
+
+        if self._persist_path:
+            # 先更新分区清单，再删除分区文件
+            self._write_manifest(self._persist_path)
+            for key in dropped:
+                partition_path = glob.escape(self._partition_path(self._persist_path, key))
+                for file_path in glob.glob(f"{partition_path}_*"):
+                    os.remove(file_path)
+
+        logger.info(f"Dropped {len(dropped)} partitions: {', '.join(dropped)}")
+        return list(dropped)
+
+    def _document_partition(self, document: VectorStoreDocument) -> Tuple[str, VectorStoreDocument]:
+        """计算文档所属的分区
+
+        日期值为date/datetime对象时返回元数据中日期转换为ISO 8601字符串的文档副本，否则返回原文档。
+
+        Args:
+            document: 文档
+
+        Returns:
+            Tuple[str, VectorStoreDocument]: 分区键和写入分区的文档
+        """
+        value = (document.metadata or {}).get(self.partition_field)
+        if value is None:
+            raise ValueError(f"Document {document.id} has no '{self.partition_field}' metadata")
+        key = self.partition_for(value)
+        if isinstance(value, str):
+            return key, document
+        return key, VectorStoreDocument(
+            id=document.id,
+            content=document.content,
+            metadata={**document.metadata, self.partition_field: value.isoformat()},
+            embedding=document.embedding
+        )
+
+    def _changed_documents(self, documents: List[VectorStoreDocument]) -> List[VectorStoreDocument]:
+        """先统一日期值的格式，再与已保存的文档比较
+
+        Args:
+            documents: 文档列表
+
+        Returns:
+            List[VectorStoreDocument]: 需要写入的文档
+        """
+        return super()._changed_documents([self._document_partition(doc)[1] for doc in documents])
+
+    def _find_partition(self, document_id: str) -> Optional[Tuple[str, FAISSVectorStore]]:
+        """查找文档所在的分区
+
+        Args:
+            document_id: 文档ID
+
+        Returns:
+            Optional[Tuple[str, FAISSVectorStore]]: 分区键和分区，文档不存在时返回None
+        """
+        with self._partitions_lock:
+            key = self._document_partitions.get(document_id)
+            partition = self.partitions.get(key) if key is not None else None
+        # 分区删除后映射在后台清理，清理前的映射可能指向已删除分区或同名的新分区
+        if partition is None or document_id not in partition:
+            return None
+        return key, partition
+
+    def _forget_partition_documents(self, key: str, partition: FAISSVectorStore) -> None:
+        """分批从文档到分区的映射中移除已删除分区的文档
+
+        每批只短暂持有分区表锁；同一分区键已重新创建且包含该文档时保留映射。
+
+        Args:
+            key: 已删除分区的分区键
+            partition: 已删除的分区
+        """
+        document_ids = partition.list_document_ids()
+        for start in range(0, len(document_ids), self.FORGET_BATCH_SIZE):
+            with self._partitions_lock:
+                current = self.partitions.get(key)
+                for document_id in document_ids[start:start + self.FORGET_BATCH_SIZE]:
+                    if self._document_partitions.get(document_id) != key:
+                        continue
+                    if current is None or document_id not in current:
+                        del self._document_partitions[document_id]
+
+    def _select_partitions(
+        self,
+        start_date: Optional[DateLike],
+        end_date: Optional[DateLike]
+    ) -> List[Tuple[FAISSVectorStore, Optional[Tuple[Optional[date], Optional[date]]]]]:
+        """选择与日期范围重叠的分区
+
+        Args:
+            start_date: 起始日期（可选，包含）
+            end_date: 结束日期（可选，包含）
+
+        Returns:
+            List[Tuple[FAISSVectorStore, Optional[Tuple]]]: 分区和需要在分区内筛选的日期范围，
+                分区完全在范围内时日期范围为None
+        """
+        start = self._to_date(start_date) if start_date is not None else None
+        end = self._to_date(end_date) if end_date is not None else None
+
+        with self._partitions_lock:
+            partitions = list(self.partitions.items())
+
+        selected = []
+        for key, partition in partitions:
+            first, last = self.partition_bounds(key)
+            if (start is not None and last < start) or (end is not None and first > end):
+                continue
+            covered = (start is None or start <= first) and (end is None or last <= end)
+            selected.append((partition, None if covered else (start, end)))
+        return selected
+
+    def _search_partition(
+        self,
+        partition: FAISSVectorStore,
+        queries: List[str],
+        embeddings: List[Optional[List[float]]],
+        top_k: int,
+        filters: Optional[Dict],
+        date_range: Optional[Tuple[Optional[date], Optional[date]]]
+    ) -> List[List[Tuple[VectorStoreDocument, float]]]:
+        """在单个分区中检索，分区部分重叠时只检索日期范围内的文档
+
+        Args:
+            partition: 分区
+            queries: 搜索查询列表
+            embeddings: 查询向量列表
+            top_k: 每个查询返回的最大结果数
+            filters: 筛选条件（可选）
+            date_range: 分区内的日期范围（可选）
+
+        Returns:
+            List[List[Tuple[VectorStoreDocument, float]]]: 每个查询的文档和分数列表
+        """
+        if date_range is None:
+            return partition.search_batch(queries, embeddings, top_k, filters)
+
+        return partition.search_batch_where(
+            queries, embeddings, top_k, self.partition_field,
+            lambda value: self._in_range(value, *date_range), filters
+        )
+
+    def _in_range(self, value: Any, start: Optional[date], end: Optional[date]) -> bool:
+        """检查日期值是否在范围内
+
+        Args:
+            value: 日期值
+            start: 起始日期（可选，包含）
+            end: 结束日期（可选，包含）
+
+        Returns:
+            bool: 是否在范围内
+        """
+        try:
+            day = self._to_date(value)
+        except ValueError:
+            return False
+        return (start is None or day >= start) and (end is None or day <= end)
+
+    def _write_manifest(self, path: str) -> None:
+        """写入分区清单
+
+        Args:
+            path: 保存路径
+        """
+        manifest = {
+            'partition_field': self.partition_field,
+            'granularity': self.granularity,
+            'partitions': self.list_partitions()
+        }
+        with open(f"{path}_partitions.json.tmp", 'w', encoding='utf-8') as f:
+            json.dump(manifest, f)
+        os.replace(f"{path}_partitions.json.tmp", f"{path}_partitions.json")
+
+    @staticmethod
+    def _partition_path(path: str, key: str) -> str:
+        """获取分区的保存路径
+
+        Args:
+            path: 分区存储的保存路径
+            key: 分区键
+
+        Returns:
+            str: 分区的保存路径
+        """
+        return f"{path}_part_{key}"
+
+    def _document_vectors(self, document_ids: List[str]) -> np.ndarray:
+        """按分区获取文档的已保存向量
+
+        Args:
+            document_ids: 文档ID列表
+
+        Returns:
+            np.ndarray: 与文档ID一一对应的float32向量矩阵
+        """
+        vectors = []
+        for document_id in document_ids:
+            found = self._find_partition(document_id)
+            if found is None:
+                raise KeyError(document_id)
+            vectors.append(found[1]._document_vectors([document_id])[0])
+        return np.array(vectors, dtype=np.float32)
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""向量存储的预写日志"""
+
+import json
+import os
+import struct
+import zlib
+from typing import Dict, Iterator, Optional, Tuple
+
+import numpy as np
+
+
+class WriteAheadLog:
+    """追加写入的操作日志
+
+    每条记录的格式为：操作类型（1字节）+ JSON长度（4字节）+ 向量字节数（4字节）
+    + JSON + float32向量 + 前面所有字节的CRC32（4字节）。
+    重放时遇到不完整或校验失败的记录（进程在写入中途退出）即停止，并截断到最后一条完整记录。
+    每次写入完整快照后换用新一代的日志文件，快照数据文件中记录对应的代数，
+    因此快照写入后、旧日志删除前退出时，旧日志中的操作不会被重复重放。
+    """
+
+    # 操作类型
+    OP_ADD = 1
+    OP_DELETE = 2
+    OP_CLEAR = 3
+    OP_UPDATE_METADATA = 4
+
+    _HEADER = struct.Struct('<BII')
+    _CRC = struct.Struct('<I')
+
+    def __init__(self, path: str, generation: int = 0, fsync: bool = False):
+        """初始化预写日志
+
+        Args:
+            path: 向量存储的保存路径前缀
+            generation: 日志代数（与快照对应）
+            fsync: 每次写入后是否调用fsync（可抵御断电，但写入变慢）
+        """
+        self.path = self.file_path(path, generation)
+        self.generation = generation
+        self.fsync = fsync
+        self.count = 0
+        self._file = None
+
+    @staticmethod
+    def file_path(path: str, generation: int = 0) -> str:
+        """获取日志文件路径
+
+        Args:
+            path: 向量存储的保存路径前缀
+            generation: 日志代数
+
+        Returns:
+            str: 日志文件路径
+        """
+        return f"{path}_wal_{generation}.bin"
+
+    def append_add(
+        self,
+        int_id: int,
+        document_id: str,
+        content: str,
+        metadata: Optional[Dict],
+        vector
+    ) -> None:
+        """记录添加文档操作
+
+        Args:
+            int_id: 内部ID
+            document_id: 文档ID
+            content: 文档内容
+            metadata: 文档元数据
+            vector: 文档向量
+        """
+        header = {'int_id': int_id, 'id': document_id, 'content': content, 'metadata': metadata or {}}
+        self._append(self.OP_ADD, header, np.asarray(vector, dtype=np.float32).tobytes())
+
+    def append_delete(self, document_id: str) -> None:
+        """记录删除文档操作
+
+        Args:
+            document_id: 文档ID
+        """
+        self._append(self.OP_DELETE, {'id': document_id})
+
+    def append_update_metadata(self, document_id: str, metadata: Dict) -> None:
+        """记录更新文档元数据操作
+
+        Args:
+            document_id: 文档ID
+            metadata: 新的元数据
+        """
+        self._append(self.OP_UPDATE_METADATA, {'id': document_id, 'metadata': metadata})
+
+    def append_clear(self) -> None:
+        """记录清空操作"""
+        self._append(self.OP_CLEAR, {})
+
+    def flush(self) -> None:
+        """将已写入的记录刷新到磁盘"""
+        if self._file is not None:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def replay(self) -> Iterator[Tuple[int, Dict, Optional[np.ndarray]]]:
+        """按写入顺序读取日志中的完整记录
+
+        Returns:
+            Iterator[Tuple[int, Dict, Optional[np.ndarray]]]: 操作类型、记录内容和向量（非添加操作为None）
+        """
+        self.count = 0
+        if not os.path.exists(self.path):
+            return
+
+        valid_size = 0
+        with open(self.path, 'rb') as f:
+            while True:
+                header_bytes = f.read(self._HEADER.size)
+                if len(header_bytes) < self._HEADER.size:
+                    break
+
+                op, json_size, vector_size = self._HEADER.unpack(header_bytes)
+                body = f.read(json_size + vector_size)
+                crc_bytes = f.read(self._CRC.size)
+                if len(body) < json_size + vector_size or len(crc_bytes) < self._CRC.size:
+                    break
+                if zlib.crc32(header_bytes + body) != self._CRC.unpack(crc_bytes)[0]:
+                    break
+
+                record = json.loads(body[:json_size].decode('utf-8'))
+                vector = np.frombuffer(body[json_size:], dtype=np.float32) if vector_size else None
+                valid_size = f.tell()
+                self.count += 1
+                yield op, record, vector
+
+        # 截断末尾不完整的记录，后续追加从完整记录之后开始
+        if valid_size < os.path.getsize(self.path):
+            with open(self.path, 'r+b') as f:
+                f.truncate(valid_size)
+
+    def remove(self) -> None:
+        """删除日志文件（新的快照写入后调用）"""
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        self.count = 0
+
+    def close(self) -> None:
+        """关闭日志文件"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _append(self, op: int, record: Dict, vector_bytes: bytes = b'') -> None:
+        """追加一条记录
+
+        Args:
+            op: 操作类型
+            record: 记录内容
+            vector_bytes: 向量字节
+        """
+        if self._file is None:
+            self._file = open(self.path, 'ab')
+
+        body = json.dumps(record, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        data = self._HEADER.pack(op, len(body), len(vector_bytes)) + body + vector_bytes
+        self._file.write(data + self._CRC.pack(zlib.crc32(data)))
+
+        # 刷新到操作系统，进程崩溃后记录不会丢失
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+        self.count += 1